@@ -1,27 +1,39 @@
-# This file is used to calibrate the "mode" brightness -- currently set to 30000
-# So you should run and see what a normal brightness for a finger over the sensor looks like and modify the src/main.py THRESHOLD value accordingly.
+# This file shows the light levels the auto-calibration (src/sensing/calibrate.py)
+# settles on. main.py no longer needs a hand-tuned THRESHOLD: it is only the starting
+# value until the calibrator has seen a second of samples. Run this, tap the sensor
+# a few times and watch "dark" move to halfway between the room light and your finger.
 
 
 
-from machine import Pin, ADC
+from machine import ADC
 import time
 
+from sensing.calibrate import Calibrator
+
 ADC_PIN = 28  # GP28 = ADC2
+INVERT = False  # main.py's wiring (lower = darker); True for the maintest wiring
 
 # --- hardware setup ---
 ldr = ADC(ADC_PIN)
+cal = Calibrator(invert=INVERT)
 
 print("Reading photoresistor values...")
 print("Cover the sensor to see the value drop.")
-print("The value is from 0 to 65535, where a higher value is darker.")
+print("The value is from 0 to 65535. Levels below are brightness: higher is brighter.")
 print("---------------------------------------------------------------")
 
+n = 0
 while True:
-    # 1) read sensor
+    # 1) read the sensor at 100 Hz, as main.py's sampler does, and feed the calibrator
     raw_value = ldr.read_u16()
-    
-    # 2) print the raw value to the terminal
-    print(f"Raw ADC Value: {raw_value}")
-    
+    cal.update(raw_value)
+    n += 1
+
+    # 2) print what it has learned every 200 ms
+    if n % 20 == 0:
+        state = "ready" if cal.ready else "warming up"
+        print(f"Raw ADC Value: {raw_value}  ambient={cal.ambient} floor={cal.floor} "
+              f"dark={cal.dark} light={cal.light} ({state})")
+
     # 3) add a small delay
-    time.sleep_ms(200)
\ No newline at end of file
+    time.sleep_ms(10)
@@ -1,7 +1,14 @@
 # main.py — Light → Tone (simple & simultaneous)
 # Pins: LDR on GP28 (ADC2), Buzzer on GP16 (PWM), optional mute button on GP14→GND
+# Needs src/hal/, src/sensing/, src/dsp/, src/audio/ and src/diag/ copied to the Pico
 
-from machine import Pin, ADC, PWM
+from machine import Pin, ADC
+from array import array
+from audio.tables import exp_curve
+from diag.rt import Line, RealTime
+from dsp.filters import EMA, FULL
+from hal.pwm_driver import PWMDriver
+from sensing.sampler import Sampler
 import time
 
 # --- pin config ---
@@ -10,55 +17,80 @@ PWM_PIN = 16          # GP16 → buzzer +
 BTN_MUTE_PIN = 14     # button to GND (internal pull-up)
 
 ldr = ADC(ADC_PIN)
-buz = PWM(Pin(PWM_PIN))
+buz = PWMDriver(PWM_PIN)  # skips register writes that wouldn't change anything
 btn = Pin(BTN_MUTE_PIN, Pin.IN, Pin.PULL_UP)
 
 # --- tone config (tweak these if you like) ---
 MIN_F = 200           # lowest pitch (Hz)
 MAX_F = 1800          # highest pitch (Hz)
 DUTY  = 30000         # loudness (0..65535) — keep in range
-ALPHA = 0.15          # smoothing (0..1), higher = more responsive
+ALPHA = 0.15          # smoothing per sample (0..1), higher = more responsive
+SAMPLE_HZ = 100       # sensor sample rate, independent of the loop below
+BATCH = 64            # most samples handled per loop iteration
+PERIOD_MS = 10        # loop period
+REALTIME = True       # GC only runs in the loop's idle slack, not mid-iteration
 
-buz.duty_u16(0)       # start silent
 sound_on = True
 smooth = None
 last_btn = 1
 last_print = time.ticks_ms()
+sampler = Sampler(ldr, rate_hz=SAMPLE_HZ)
+sampler.start()
+buf = array("H", bytes(2 * BATCH))
+ema = EMA(ALPHA)
+rt = RealTime(PERIOD_MS, enabled=REALTIME)
+line = Line(160)      # telemetry is formatted here, without building strings
 
-def map_exp(z: float) -> int:
-    """nonlinear map 0..1 -> MIN_F..MAX_F (feels nicer to the ear)"""
-    return int(MIN_F + (MAX_F - MIN_F) * (z ** 1.8))
+# nonlinear map brightness -> MIN_F..MAX_F (feels nicer to the ear)
+# brightness 0..FULL in, Hz out, read from an interpolated table built once
+map_exp = exp_curve(MIN_F, MAX_F, 1.8).lookup
 
+rt.start()
 while True:
-    # 1) read sensor
-    raw = ldr.read_u16()              # 0..65535, higher = darker with this wiring
-    norm = raw / 65535.0              # 0..1
-    val  = 1.0 - norm                 # invert so BRIGHTER = HIGHER pitch
+    rt.begin()
+    # 1) take every sample the timer collected since last time, as one batch
+    n = sampler.read_into(buf)
+    if n:
+        raw = buf[n - 1]              # 0..65535, higher = darker with this wiring
 
-    # 2) smooth it a bit so pitch isn't jittery
-    smooth = val if smooth is None else (ALPHA * val + (1 - ALPHA) * smooth)
+        # 2) smooth it a bit so pitch isn't jittery (integer EMA over the batch)
+        smooth = FULL - ema.process(buf, n)   # invert so BRIGHTER = HIGHER pitch
+    if smooth is None:
+        rt.end()
+        rt.wait()
+        continue
 
     # 3) map to frequency and play
     freq = map_exp(smooth)
     if sound_on:
-        buz.freq(freq)
-        buz.duty_u16(DUTY)
+        buz.set_u16(freq, DUTY)
     else:
-        buz.duty_u16(0)
+        buz.stop()
 
     # 4) mute button (edge-detected, simple debounce)
     cur = btn.value()
     if cur == 0 and last_btn == 1:    # pressed
         sound_on = not sound_on
         if not sound_on:
-            buz.duty_u16(0)
+            buz.stop()
         time.sleep_ms(20)             # debounce
     last_btn = cur
 
-    # 5) lightweight telemetry (every ~0.5 s)
+    # 5) lightweight telemetry (every ~0.5 s), norm/val in hundredths
     if time.ticks_diff(time.ticks_ms(), last_print) > 500:
-        print(f"raw={raw} norm={norm:.2f} val={val:.2f} f={freq}Hz on={sound_on}")
+        line.field(b"raw", raw)
+        line.field(b"norm", raw * 100 // FULL, 2)
+        line.field(b"val", (FULL - raw) * 100 // FULL, 2)
+        line.field(b"f_hz", freq)
+        line.field(b"on", sound_on)
+        line.field(b"jitter_us", sampler.jitter_max_us)
+        line.field(b"dropped", sampler.dropped)
+        line.field(b"pwm_writes", buz.writes)
+        line.field(b"skipped", buz.skipped)
+        line.field(b"alloc", rt.allocated)  # bytes the previous iteration allocated
+        line.emit()
         last_print = time.ticks_ms()
 
-    # keep sleep >= 0 (negative sleeps are undefined in MicroPython)
-    time.sleep_ms(10)
+    # sleep to the next 10 ms tick, collecting garbage first if there is time
+    rt.end()
+    rt.wait()
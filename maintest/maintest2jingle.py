@@ -3,8 +3,16 @@
 # Modes:
 #   - Continuous: brightness -> pitch (theremin style)
 #   - Jingle: entering a brightness range plays a short melody for that range
-
-from machine import Pin, ADC, PWM
+# Needs src/hal/, src/sensing/, src/dsp/, src/audio/ and src/diag/ copied to the Pico
+
+from machine import Pin, ADC
+from array import array
+from audio.tables import exp_curve
+from diag.rt import Line, RealTime
+from hal.pwm_driver import PWMDriver
+from dsp.filters import EMA, FULL, Hysteresis, to_u16
+from sensing.calibrate import Calibrator
+from sensing.sampler import Sampler
 import time
 
 # ---------- Pins ----------
@@ -14,15 +22,18 @@ BTN_MUTE_PIN = 14      # to GND (internal pull-up)
 BTN_MODE_PIN = 15      # to GND (internal pull-up)
 
 ldr = ADC(ADC_PIN)
-buz = PWM(Pin(PWM_PIN))
+buz = PWMDriver(PWM_PIN)  # skips register writes that wouldn't change anything
 btn_mute = Pin(BTN_MUTE_PIN, Pin.IN, Pin.PULL_UP)
 btn_mode = Pin(BTN_MODE_PIN, Pin.IN, Pin.PULL_UP)
 
 # ---------- Audio settings ----------
 DUTY = 30000           # 0..65535 (~46%)
 MIN_F, MAX_F = 200, 1800
-ALPHA = 0.15           # smoothing factor (0..1)
-buz.duty_u16(0)
+ALPHA = 0.15           # smoothing factor per sample (0..1)
+SAMPLE_HZ = 100        # sensor sample rate, independent of the main loop
+BATCH = 64             # most samples handled per loop iteration
+PERIOD_MS = 10         # loop period
+REALTIME = True        # GC only runs between notes and in loop slack, never mid-note
 
 # ---------- App state ----------
 sound_on = True
@@ -30,22 +41,25 @@ jingle_mode = False    # False = continuous pitch, True = jingle by range
 last_mute = 1
 last_mode = 1
 last_print = time.ticks_ms()
-smooth = None
+smooth = None          # smoothed brightness, 0..FULL
+sampler = Sampler(ldr, rate_hz=SAMPLE_HZ)
+buf = array("H", bytes(2 * BATCH))
+ema = EMA(ALPHA)
+cal = Calibrator(invert=True)  # bins follow the room's recent brightness range
 
 # ---------- Helpers ----------
-def map_exp(z: float) -> int:
-    """Nonlinear map 0..1 -> MIN_F..MAX_F (feels nicer)."""
-    return int(MIN_F + (MAX_F - MIN_F) * (z ** 1.8))
+# Nonlinear map brightness -> MIN_F..MAX_F (feels nicer).
+# brightness 0..FULL in, Hz out, read from an interpolated table built once
+map_exp = exp_curve(MIN_F, MAX_F, 1.8).lookup
 
 def set_tone(freq: int, duty=DUTY):
     if sound_on:
-        buz.freq(int(freq))
-        buz.duty_u16(duty)
+        buz.set_u16(freq, duty)
     else:
-        buz.duty_u16(0)
+        buz.stop()
 
 def silence():
-    buz.duty_u16(0)
+    buz.stop()
 
 def edge_pressed(pin: Pin, last: int) -> (bool, int):
     cur = pin.value()
@@ -84,6 +98,7 @@ JINGLE_SUPER = [
 ]
 
 # Brightness bins: val in [0..1], lower->darker, higher->brighter
+# 0..1 spans the calibrated range, from the darkest to the brightest recent readings
 BINS = [
     (0.00, 0.25, JINGLE_LOW,   "LOW"),
     (0.25, 0.55, JINGLE_MID,   "MID"),
@@ -96,17 +111,13 @@ ENTER_TIME = None
 HOLD_MS = 350          # must remain in bin for this long to trigger
 HYST = 0.04            # hysteresis buffer
 
-def classify(value_01: float, cur_bin_idx):
-    """Return new bin idx if value is in a bin (with hysteresis)."""
-    for i, (lo, hi, *_rest) in enumerate(BINS):
-        if cur_bin_idx == i:
-            lo_h = max(0.0, lo - HYST)
-            hi_h = min(1.0, hi + HYST)
-        else:
-            lo_h, hi_h = lo, hi
-        if lo_h <= value_01 < hi_h:
-            return i
-    return None
+# integer bin edges for the shared classifier (BINS stay in 0..1 for readability)
+binner = Hysteresis([to_u16(lo) for lo, *_rest in BINS] + [to_u16(BINS[-1][1])], to_u16(HYST))
+
+def classify(value: int, cur_bin_idx):
+    """Return new bin idx if value (0..FULL) is in a bin (with hysteresis)."""
+    i = binner.classify(value, -1 if cur_bin_idx is None else cur_bin_idx)
+    return None if i < 0 else i
 
 def play_jingle(seq):
     """Blocking jingle playback with mute-check."""
@@ -132,12 +143,17 @@ def play_jingle(seq):
                 jingle_mode = not jingle_mode
             time.sleep_ms(2)
         silence()
-        time.sleep_ms(gap)
+        rt.pause(gap)  # a known-quiet window: garbage is collected here if needed
 
 # ---------- Main loop ----------
 print("Mode: Continuous (press Mode button to switch). Mute toggles sound.")
+sampler.start()
+rt = RealTime(PERIOD_MS, enabled=REALTIME)
+line = Line(160)  # telemetry is formatted here, without building strings
+rt.start()
 
 while True:
+    rt.begin()
     # Buttons
     p, last_mute = edge_pressed(btn_mute, last_mute)
     if p:
@@ -151,18 +167,23 @@ while True:
         jingle_mode = not jingle_mode
         print("Mode:", "JINGLE" if jingle_mode else "CONTINUOUS")
 
-    # Sensor read
-    raw = ldr.read_u16()
-    norm = raw / 65535.0
-    val = 1.0 - norm
-    smooth = val if smooth is None else (ALPHA * val + (1 - ALPHA) * smooth)
+    # Sensor read: every sample the timer collected since last time, as one batch
+    n = sampler.read_into(buf)
+    if n:
+        raw = buf[n - 1]
+        cal.process(buf, n)
+        smooth = FULL - ema.process(buf, n)  # invert so brighter -> higher
+    if smooth is None:
+        rt.end()
+        rt.wait()
+        continue
 
     if not jingle_mode:
         # Continuous theremin-style
         set_tone(map_exp(smooth))
     else:
         # Jingle mode
-        new_bin = classify(smooth, CUR_BIN)
+        new_bin = classify(cal.normalize(smooth), CUR_BIN)
         now = time.ticks_ms()
         if new_bin != CUR_BIN:
             CUR_BIN = new_bin
@@ -173,12 +194,22 @@ while True:
                     _, _, seq, name = BINS[CUR_BIN]
                     print("Jingle:", name)
                     play_jingle(seq)
+                    sampler.flush()  # drop samples that piled up while it played
+                    rt.resync()
                     ENTER_TIME = time.ticks_ms()
         silence()  # quiet between jingles
 
+    # telemetry, fractions of FULL in fixed point
     if time.ticks_diff(time.ticks_ms(), last_print) > 600:
-        mode = "JINGLE" if jingle_mode else "CONTINUOUS"
-        print(f"raw={raw} val={val:.2f} smooth={smooth:.2f} mode={mode} on={sound_on}")
+        line.field(b"raw", raw)
+        line.field(b"val", (FULL - raw) * 100 // FULL, 2)
+        line.field(b"smooth", smooth * 100 // FULL, 2)
+        line.write(b" mode=JINGLE" if jingle_mode else b" mode=CONTINUOUS")
+        line.field(b"on", sound_on)
+        line.field(b"jitter_us", sampler.jitter_max_us)
+        line.field(b"alloc", rt.allocated)  # bytes the previous iteration allocated
+        line.emit()
         last_print = time.ticks_ms()
 
-    time.sleep_ms(10)
+    rt.end()
+    rt.wait()
@@ -3,8 +3,16 @@
 # Behavior:
 #   - JINGLE mode is primary: when brightness sits in a bin for HOLD_MS, play that bin's jingle.
 #   - When light is moving fast (wiggling), briefly play a continuous pitch for immediate feedback.
-
-from machine import Pin, ADC, PWM
+# Needs src/hal/, src/sensing/, src/dsp/, src/audio/ and src/diag/ copied to the Pico
+
+from machine import ADC
+from array import array
+from audio.tables import exp_curve
+from diag.rt import Line, RealTime
+from hal.pwm_driver import PWMDriver
+from dsp.filters import EMA, FULL, Hysteresis, MotionWindow, to_u16
+from sensing.calibrate import Calibrator
+from sensing.sampler import Sampler
 import time
 
 # ---------- Pins ----------
@@ -12,13 +20,16 @@ ADC_PIN = 28           # GP28 = ADC2
 PWM_PIN = 16           # GP16 -> buzzer +
 
 ldr = ADC(ADC_PIN)
-buz = PWM(Pin(PWM_PIN))
+buz = PWMDriver(PWM_PIN)  # skips register writes that wouldn't change anything
 
 # ---------- Audio settings ----------
 DUTY = 30000           # 0..65535 (~46%)
 MIN_F, MAX_F = 200, 1800
-ALPHA = 0.15           # smoothing for brightness (0..1)
-buz.duty_u16(0)
+ALPHA = 0.15           # smoothing for brightness, per sample (0..1)
+SAMPLE_HZ = 100        # sensor sample rate, independent of the main loop
+BATCH = 64             # most samples handled per loop iteration
+PERIOD_MS = 10         # loop period
+REALTIME = True        # GC only runs between notes and in loop slack, never mid-note
 
 # ---------- Jingle logic ----------
 HOLD_MS = 350          # must remain in bin this long to trigger the jingle
@@ -26,20 +37,19 @@ HYST = 0.04            # hysteresis around bin boundaries to reduce flutter
 
 # When the light is moving quickly, play continuous tone for responsiveness
 CONTINUOUS_WHEN_MOVING = True
-MOTION_WINDOW = 20     # samples (~200 ms at 10 ms loop)
+MOTION_WINDOW = 20     # samples (200 ms at SAMPLE_HZ)
 MOTION_THRESH = 0.06   # avg |delta| over window above this => "moving"
 
 # ---------- Helpers ----------
-def map_exp(z: float) -> int:
-    """Nonlinear map 0..1 -> MIN_F..MAX_F (sounds more natural)."""
-    return int(MIN_F + (MAX_F - MIN_F) * (z ** 1.8))
+# Nonlinear map brightness -> MIN_F..MAX_F (sounds more natural).
+# brightness 0..FULL in, Hz out, read from an interpolated table built once
+map_exp = exp_curve(MIN_F, MAX_F, 1.8).lookup
 
 def set_tone(freq: int, duty=DUTY):
-    buz.freq(int(freq))
-    buz.duty_u16(duty)
+    buz.set_u16(freq, duty)
 
 def silence():
-    buz.duty_u16(0)
+    buz.stop()
 
 def hz(note_name: str) -> int:
     TABLE = {
@@ -69,6 +79,7 @@ JINGLE_SUPER = [
 ]
 
 # Brightness bins: val in [0..1], lower->darker, higher->brighter (we invert sensor below)
+# 0..1 spans the calibrated range, from the darkest to the brightest recent readings
 BINS = [
     (0.00, 0.25, JINGLE_LOW,   "LOW"),
     (0.25, 0.55, JINGLE_MID,   "MID"),
@@ -76,17 +87,13 @@ BINS = [
     (0.85, 1.01, JINGLE_SUPER, "SUPER"),
 ]
 
-def classify(value_01: float, cur_bin_idx):
-    """Return new bin idx if value is in a bin (with hysteresis)."""
-    for i, (lo, hi, *_rest) in enumerate(BINS):
-        if cur_bin_idx == i:
-            lo_h = max(0.0, lo - HYST)
-            hi_h = min(1.0, hi + HYST)
-        else:
-            lo_h, hi_h = lo, hi
-        if lo_h <= value_01 < hi_h:
-            return i
-    return None
+# integer bin edges for the shared classifier (BINS stay in 0..1 for readability)
+binner = Hysteresis([to_u16(lo) for lo, *_rest in BINS] + [to_u16(BINS[-1][1])], to_u16(HYST))
+
+def classify(value: int, cur_bin_idx):
+    """Return new bin idx if value (0..FULL) is in a bin (with hysteresis)."""
+    i = binner.classify(value, -1 if cur_bin_idx is None else cur_bin_idx)
+    return None if i < 0 else i
 
 def play_jingle(seq):
     """Blocking jingle playback (short)."""
@@ -96,47 +103,53 @@ def play_jingle(seq):
         while time.ticks_diff(t_end, time.ticks_ms()) > 0:
             time.sleep_ms(2)
         silence()
-        time.sleep_ms(gap)
+        rt.pause(gap)  # a known-quiet window: garbage is collected here if needed
 
 # ---------- Main loop ----------
 print("JINGLE mode active (no buttons). Wiggle light = continuous tone; hold steady = jingle.")
 
-smooth = None
+smooth = None          # smoothed brightness, 0..FULL
 CUR_BIN = None
 ENTER_TIME = None
 
-# for motion detection
-hist = [0.0] * MOTION_WINDOW
-hist_i = 0
-avg_motion = 0.0
-last_smooth = None
+# shared integer filters; motion = avg |delta| of the smoothed value
+ema = EMA(ALPHA)
+motion = MotionWindow(MOTION_WINDOW)
+motion_thresh = to_u16(MOTION_THRESH)
+cal = Calibrator(invert=True)  # bins follow the room's recent brightness range
+buf = array("H", bytes(2 * BATCH))
 last_print = time.ticks_ms()
+sampler = Sampler(ldr, rate_hz=SAMPLE_HZ)
+sampler.start()
+rt = RealTime(PERIOD_MS, enabled=REALTIME)
+line = Line(160)       # telemetry is formatted here, without building strings
+rt.start()
 
 while True:
-    # Sensor read (invert so brighter -> larger)
-    raw = ldr.read_u16()              # 0..65535 ; higher = darker with this wiring
-    norm = raw / 65535.0
-    val = 1.0 - norm                  # 0..1, brighter -> higher
-    smooth = val if smooth is None else (ALPHA * val + (1 - ALPHA) * smooth)
-
-    # Motion metric (avg |delta| over the last MOTION_WINDOW samples)
-    if last_smooth is None:
-        delta = 0.0
-    else:
-        delta = abs(smooth - last_smooth)
-    last_smooth = smooth
-    avg_motion += (delta - hist[hist_i]) / MOTION_WINDOW
-    hist[hist_i] = delta
-    hist_i = (hist_i + 1) % MOTION_WINDOW
+    rt.begin()
+    # Sensor read: every sample the timer collected since last time, as one batch
+    n = sampler.read_into(buf)
+    if n:
+        raw = buf[n - 1]                  # 0..65535 ; higher = darker with this wiring
+        cal.process(buf, n)
+        # smooth in place, then feed the smoothed samples to the motion metric
+        # (avg |delta| over the last MOTION_WINDOW samples)
+        ema.process(buf, n, out=buf)
+        motion.process(buf, n)
+        smooth = FULL - ema.value         # invert so brighter -> larger
+    if smooth is None:
+        rt.end()
+        rt.wait()
+        continue
 
     # If moving a lot, give immediate audio feedback via continuous tone
-    if CONTINUOUS_WHEN_MOVING and avg_motion > MOTION_THRESH:
+    if CONTINUOUS_WHEN_MOVING and motion.moving(motion_thresh):
         set_tone(map_exp(smooth))
         # Reset jingle hold timer so we don't accidentally trigger during motion
         ENTER_TIME = time.ticks_ms()
     else:
         # Jingle mode (primary): trigger on bin entry after HOLD_MS
-        new_bin = classify(smooth, CUR_BIN)
+        new_bin = classify(cal.normalize(smooth), CUR_BIN)
         now = time.ticks_ms()
         if new_bin != CUR_BIN:
             CUR_BIN = new_bin
@@ -147,14 +160,23 @@ while True:
                     _, _, seq, name = BINS[CUR_BIN]
                     print("Jingle:", name)
                     play_jingle(seq)
+                    sampler.flush()  # drop samples that piled up while it played
+                    rt.resync()
                     ENTER_TIME = time.ticks_ms()  # avoid immediate retrigger
         # Keep quiet between jingles so it feels snappy
         silence()
 
-    # Telemetry every ~0.6s (handy for tuning)
+    # Telemetry every ~0.6s (handy for tuning); fractions of FULL in fixed point
     if time.ticks_diff(time.ticks_ms(), last_print) > 600:
-        print(f"raw={raw} val={val:.2f} smooth={smooth:.2f} motion={avg_motion:.3f}")
+        line.field(b"raw", raw)
+        line.field(b"val", (FULL - raw) * 100 // FULL, 2)
+        line.field(b"smooth", smooth * 100 // FULL, 2)
+        line.field(b"motion", motion.mean * 1000 // FULL, 3)
+        line.field(b"jitter_us", sampler.jitter_max_us)
+        line.field(b"alloc", rt.allocated)  # bytes the previous iteration allocated
+        line.emit()
         last_print = time.ticks_ms()
 
-    time.sleep_ms(10)
+    rt.end()
+    rt.wait()
 
@@ -0,0 +1,110 @@
+# sim/__init__.py
+# Host-side simulator for running the Pico code on a PC: stand-ins for the
+# machine, micropython and _thread modules, MicroPython's time.ticks_*/sleep_* functions
+# on a virtual clock, scripted ADC inputs and a log of every PWM write.
+#
+#   import sim
+#   sim.install()
+#   sim.set_adc(28, sim.traces.pulses([1000, 1300], 80))
+#   import main                 # the real src/main.py
+#   ...
+#
+# or run a whole script: python -m sim --until-ms 20000 src/main.py
+import asyncio
+import gc
+import sys
+import time
+
+from sim import traces  # noqa: F401  (re-exported for scripts)
+from sim.timebase import TimeUp, VirtualClock, ticks_add, ticks_diff
+
+clock = VirtualClock()
+pwm_log = []  # (t_us, gpio, "freq"|"duty", value) for every PWM register write
+heap_locked = 0
+_installed = False
+
+
+def install(*, realtime=False, read_cost_us=1):
+    """
+    Put the stand-ins in place: sys.modules["machine"], ["micropython"],
+    ["_thread"], and the MicroPython-only names in time, asyncio and gc. Resets
+    the clock and log, so it can be called again between runs. Returns the clock.
+    """
+    global clock, _installed
+    clock = VirtualClock(realtime=realtime, read_cost_us=read_cost_us)
+    pwm_log.clear()
+
+    from sim import _thread, machine, micropython
+
+    machine._adc_sources.clear()
+    machine._pin_sources.clear()
+    sys.modules["machine"] = machine
+    sys.modules["micropython"] = micropython
+    sys.modules["_thread"] = _thread
+
+    time.ticks_ms = lambda: clock.ticks_ms()
+    time.ticks_us = lambda: clock.ticks_us()
+    time.ticks_cpu = lambda: clock.ticks_us()
+    time.ticks_diff = ticks_diff
+    time.ticks_add = ticks_add
+    time.sleep_ms = lambda ms: clock.sleep_us(int(ms * 1000))
+    time.sleep_us = lambda us: clock.sleep_us(int(us))
+    asyncio.sleep_ms = _async_sleep_ms
+    if not hasattr(gc, "mem_free"):
+        gc.mem_free = lambda: 200000
+        gc.mem_alloc = lambda: 40000
+    _installed = True
+    return clock
+
+
+async def _async_sleep_ms(ms):
+    if clock.realtime:
+        await asyncio.sleep(ms / 1000)
+    else:
+        clock.sleep_us(int(ms * 1000))
+        await asyncio.sleep(0)
+
+
+def set_adc(gpio, trace):
+    from sim import machine
+
+    machine.set_adc(gpio, trace)
+
+
+def set_pin(gpio, trace):
+    from sim import machine
+
+    machine.set_pin(gpio, trace)
+
+
+def tones(gpio=None):
+    """
+    The PWM log folded into what was audible: (t_us, gpio, freq, duty) whenever a
+    pin's frequency or duty changed. duty 0 means silence.
+    """
+    state = {}
+    out = []
+    for t, pin, what, value in pwm_log:
+        if gpio is not None and pin != gpio:
+            continue
+        freq, duty = state.get(pin, (1000, 0))
+        if what == "freq":
+            freq = value
+        else:
+            duty = value
+        if state.get(pin) != (freq, duty):
+            state[pin] = (freq, duty)
+            out.append((t, pin, freq, duty))
+    return out
+
+
+def onsets(gpio=None):
+    """Times (us) and frequencies of each note start: silence -> sound, or a new freq."""
+    out = []
+    last = {}
+    for t, pin, freq, duty in tones(gpio):
+        prev = last.get(pin)
+        if duty and (prev is None or not prev[1] or prev[0] != freq):
+            out.append((t, pin, freq))
+        last[pin] = (freq, duty)
+    return out
@@ -0,0 +1,82 @@
+# sim/__main__.py
+# python -m sim [options] script.py [args...]
+# Runs a device script (src/main.py, a maintest, a test script) on the simulator.
+#
+#   python -m sim --until-ms 30000 --adc 28=pulses:1000,1300 src/main.py
+#   python -m sim --adc 28=recording.csv --pwm-log pwm.csv maintest/maintest.py
+import argparse
+import os
+import runpy
+import sys
+import time
+
+import sim
+from sim import traces
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def parse_trace(spec):
+    """
+    A number (constant reading), "pulses:<start_ms>,...[/width_ms[/base/level]]",
+    or the path of a "t_ms,value" recording.
+    """
+    if spec.startswith("pulses:"):
+        starts, *rest = spec[7:].split("/")
+        levels = {}
+        if len(rest) == 3:
+            levels = {"base": int(rest[1]), "level": int(rest[2])}
+        width = int(rest[0]) if rest else 80
+        return traces.pulses([int(s) for s in starts.split(",")], width, **levels)
+    try:
+        return int(spec)
+    except ValueError:
+        return traces.recorded(spec)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m sim")
+    ap.add_argument("--until-ms", type=int, help="stop after this much device time")
+    ap.add_argument("--adc", action="append", default=[], metavar="GPIO=TRACE")
+    ap.add_argument("--pin", action="append", default=[], metavar="GPIO=TRACE")
+    ap.add_argument("--pwm-log", help="write every PWM write to this CSV file")
+    ap.add_argument("--realtime", action="store_true", help="run at wall-clock speed")
+    ap.add_argument("script")
+    ap.add_argument("args", nargs=argparse.REMAINDER)
+    args = ap.parse_args(argv)
+
+    clock = sim.install(realtime=args.realtime)
+    for opt, setter in ((args.adc, sim.set_adc), (args.pin, sim.set_pin)):
+        for item in opt:
+            gpio, _, spec = item.partition("=")
+            setter(int(gpio), parse_trace(spec))
+    if args.until_ms is not None:
+        clock.stop_after(args.until_ms)
+
+    sys.path[:0] = [os.path.dirname(os.path.abspath(args.script)), SRC]
+    sys.argv = [args.script] + args.args
+    t0 = time.perf_counter()
+    try:
+        runpy.run_path(args.script, run_name="__main__")
+    except sim.TimeUp:
+        pass
+    except KeyboardInterrupt:
+        print("\n[sim] interrupted")
+    wall = time.perf_counter() - t0
+
+    device_ms = clock.now_us / 1000
+    speed = device_ms / 1000 / wall if wall else 0
+    print(
+        f"[sim] {device_ms:.0f} ms of device time in {wall * 1000:.0f} ms "
+        f"({speed:.0f}x), {len(sim.pwm_log)} PWM writes",
+        file=sys.stderr,
+    )
+    if args.pwm_log:
+        with open(args.pwm_log, "w") as f:
+            f.write("t_us,gpio,reg,value\n")
+            for row in sim.pwm_log:
+                f.write("%d,%d,%s,%d\n" % row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+# sim/_thread.py
+# Stand-in for MicroPython's _thread. A second core can't run in virtual time
+# (both cores would be moving the one clock), so start_new_thread() fails the
+# way it does on a board whose core 1 is already taken and callers fall back to
+# a single core. With realtime=True it starts a real host thread instead.
+import _thread as _host
+
+import sim
+
+
+def start_new_thread(func, args, kwargs=None):
+    if not sim.clock.realtime:
+        raise OSError("core1 in use")
+    return _host.start_new_thread(func, args, kwargs or {})
+
+
+def __getattr__(name):
+    return getattr(_host, name)
@@ -0,0 +1,176 @@
+# sim/machine.py
+# Stand-in for MicroPython's machine module (the parts this project uses).
+# ADC and input pins read from scripted traces, PWM writes are logged with the
+# virtual time they happened at, and Timers run off the simulator clock.
+import sim
+
+_adc_sources = {}  # gpio -> trace, see sim.traces
+_pin_sources = {}
+
+
+def set_adc(gpio, trace):
+    """Feed ADC reads on gpio (26..29) from a trace, or a constant 0..65535."""
+    _adc_sources[gpio] = trace
+
+
+def set_pin(gpio, trace):
+    """Feed Pin.value() reads on gpio from a trace, or a constant 0/1."""
+    _pin_sources[gpio] = trace
+
+
+def _read(source, default):
+    if source is None:
+        return default
+    if callable(source):
+        return source(sim.clock.now_us)
+    return source
+
+
+def _gpio(pin):
+    return pin.id if isinstance(pin, Pin) else pin
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, id, mode=-1, pull=-1, *, value=None):
+        self.id = id
+        self.mode = mode
+        self.pull = pull
+        self._out = 0 if value is None else value
+
+    def init(self, mode=-1, pull=-1, *, value=None):
+        self.mode = mode
+        self.pull = pull
+        if value is not None:
+            self._out = value
+
+    def value(self, v=None):
+        if v is not None:
+            self._out = 1 if v else 0
+            return None
+        if self.mode == Pin.OUT:
+            return self._out
+        idle = 1 if self.pull == Pin.PULL_UP else 0
+        return 1 if _read(_pin_sources.get(self.id), idle) else 0
+
+    __call__ = value
+
+    def on(self):
+        self._out = 1
+
+    def off(self):
+        self._out = 0
+
+    def toggle(self):
+        self._out ^= 1
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, hard=False):
+        pass  # edges aren't simulated; poll value() instead
+
+
+class ADC:
+    CORE_TEMP = 4
+
+    def __init__(self, pin):
+        gpio = _gpio(pin)
+        # ADC(0..3) are channels, ADC(26..29) GPIOs; both name the same inputs
+        self.gpio = gpio + 26 if gpio < 4 else gpio
+
+    def read_u16(self):
+        v = int(_read(_adc_sources.get(self.gpio), 32768))
+        return 0 if v < 0 else 65535 if v > 65535 else v
+
+
+class PWM:
+    """Every write is appended to sim.pwm_log as (t_us, gpio, "freq"|"duty", value)."""
+
+    def __init__(self, pin, *, freq=None, duty_u16=None):
+        self.gpio = _gpio(pin)
+        self._freq = 1000
+        self._duty = 0
+        if freq is not None:
+            self.freq(freq)
+        if duty_u16 is not None:
+            self.duty_u16(duty_u16)
+
+    def freq(self, hz=None):
+        if hz is None:
+            return self._freq
+        if not 8 <= hz <= 62500000:
+            raise ValueError("freq too small")
+        self._freq = int(hz)
+        sim.pwm_log.append((sim.clock.now_us, self.gpio, "freq", self._freq))
+
+    def duty_u16(self, duty=None):
+        if duty is None:
+            return self._duty
+        self._duty = max(0, min(65535, int(duty)))
+        sim.pwm_log.append((sim.clock.now_us, self.gpio, "duty", self._duty))
+
+    def deinit(self):
+        self._duty = 0
+        sim.pwm_log.append((sim.clock.now_us, self.gpio, "duty", 0))
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, **kwargs):
+        self.generation = 0
+        self.callback = None
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, *, mode=PERIODIC, freq=-1, period=-1, callback=None, hard=True):
+        self.deinit()
+        if freq > 0:
+            self.period_us = int(1e6 / freq)
+        elif period > 0:
+            self.period_us = int(period * 1000)
+        else:
+            raise ValueError("need freq or period")
+        self.mode = mode
+        self.callback = callback
+        sim.clock.schedule(self, sim.clock.now_us + self.period_us, self.generation)
+
+    def deinit(self):
+        self.generation += 1  # drops anything already scheduled
+
+    def fire(self, deadline):
+        if self.mode == Timer.PERIODIC:
+            sim.clock.schedule(self, deadline + self.period_us, self.generation)
+        if self.callback is not None:
+            self.callback(self)
+
+
+def disable_irq():
+    sim.clock.irq_off += 1
+    return sim.clock.irq_off - 1
+
+
+def enable_irq(state):
+    sim.clock.irq_off = state
+
+
+def unique_id():
+    return b"\xe6\x61\x41\x04\x03\x2b\x2a\x2d"
+
+
+def freq(hz=None):
+    return 150000000 if hz is None else None
+
+
+def idle():
+    sim.clock.now()
+
+
+def reset():
+    raise SystemExit("machine.reset()")
@@ -0,0 +1,43 @@
+# sim/micropython.py
+# Stand-in for MicroPython's micropython module.
+import sim
+
+
+def const(x):
+    return x
+
+
+def native(f):
+    return f
+
+
+viper = native
+
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+
+def schedule(func, arg):
+    func(arg)
+
+
+def heap_lock():
+    sim.heap_locked += 1
+
+
+def heap_unlock():
+    sim.heap_locked -= 1
+    return sim.heap_locked
+
+
+def mem_info(verbose=False):
+    print("mem: simulated, no heap figures")
+
+
+def opt_level(level=None):
+    return 0 if level is None else None
+
+
+def kbd_intr(chr):
+    pass
@@ -0,0 +1,104 @@
+# sim/timebase.py
+# The simulator's clock. In virtual mode time only moves when device code sleeps
+# (or reads the clock, at a small cost per read), so a sleep_ms(100) returns at
+# once and a minute of device time runs in well under a second. machine.Timer
+# callbacks fire at their exact deadlines while time is moved forward, the way
+# interrupts would cut into a real sleep.
+import heapq
+import time
+
+TICKS_PERIOD = 1 << 30  # MicroPython's ticks_* wrap at 2**30 on rp2
+
+
+class TimeUp(BaseException):
+    """
+    Raised once the clock passes its stop time. A BaseException so device code's
+    own `except Exception` handlers don't swallow it.
+    """
+
+
+class VirtualClock:
+    """
+    Microsecond clock that drives the simulated machine module.
+
+    realtime=True follows the host's monotonic clock instead (sleeps really sleep),
+    which is what code that talks to real network peers needs. Timers still fire
+    from the clock, whenever it is read or slept on.
+    """
+
+    def __init__(self, *, realtime=False, read_cost_us=1):
+        self.realtime = realtime
+        self.read_cost_us = read_cost_us  # keeps busy-wait loops moving in virtual time
+        self.now_us = 0
+        self.stop_at_us = None
+        self.irq_off = 0  # > 0 while disable_irq() is in effect
+        self._t0 = time.monotonic()
+        self._timers = []  # heap of (deadline_us, seq, timer, generation)
+        self._seq = 0
+        self._firing = False
+
+    # ---------- Reading ----------
+    def now(self):
+        """Current time in us; also lets any timer that has come due run first."""
+        if self.realtime:
+            self._goto(int((time.monotonic() - self._t0) * 1e6))
+        else:
+            self._goto(self.now_us + self.read_cost_us)
+        return self.now_us
+
+    def ticks_ms(self):
+        return (self.now() // 1000) % TICKS_PERIOD
+
+    def ticks_us(self):
+        return self.now() % TICKS_PERIOD
+
+    # ---------- Moving forward ----------
+    def sleep_us(self, us):
+        if us <= 0:
+            self.now()
+        elif self.realtime:
+            time.sleep(us / 1e6)
+            self.now()
+        else:
+            self._goto(self.now_us + us)
+
+    def run_for(self, ms):
+        """Let ms of device time pass (alias of a sleep, for test scripts)."""
+        self.sleep_us(ms * 1000)
+
+    def stop_after(self, ms):
+        """Raise TimeUp from the clock once ms more of device time have passed."""
+        self.stop_at_us = self.now_us + ms * 1000
+
+    # ---------- Timers ----------
+    def schedule(self, timer, deadline_us, generation):
+        self._seq += 1
+        heapq.heappush(self._timers, (deadline_us, self._seq, timer, generation))
+
+    def _goto(self, target):
+        if not self._firing and not self.irq_off:
+            self._firing = True
+            try:
+                while self._timers and self._timers[0][0] <= target:
+                    deadline, _, timer, gen = heapq.heappop(self._timers)
+                    if gen != timer.generation:
+                        continue  # deinit() or init() since this was scheduled
+                    if deadline > self.now_us:
+                        self.now_us = deadline
+                    timer.fire(deadline)
+            finally:
+                self._firing = False
+        if target > self.now_us:
+            self.now_us = target
+        if self.stop_at_us is not None and self.now_us >= self.stop_at_us:
+            self.stop_at_us = None
+            raise TimeUp()
+
+
+def ticks_diff(a, b):
+    d = (a - b) % TICKS_PERIOD
+    return d - TICKS_PERIOD if d >= TICKS_PERIOD // 2 else d
+
+
+def ticks_add(a, delta):
+    return (a + delta) % TICKS_PERIOD
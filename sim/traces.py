@@ -0,0 +1,77 @@
+# sim/traces.py
+# Scripted sensor inputs: each helper returns a function of virtual time (us) that
+# machine.set_adc() / set_pin() use to answer reads. Values are raw ADC counts
+# (0..65535). The defaults follow main.py, where a low count means dark; the
+# maintest wiring is the other way round, so pass base/level explicitly there.
+import bisect
+import random
+
+BRIGHT = 50000
+DARK = 5000
+
+
+def constant(value):
+    return lambda t_us: value
+
+
+def steps(points):
+    """Sample-and-hold through [(t_ms, value), ...]; the first value holds before it."""
+    points = sorted(points)
+    times = [t * 1000 for t, _ in points]
+    values = [v for _, v in points]
+
+    def read(t_us):
+        i = bisect.bisect_right(times, t_us) - 1
+        return values[max(i, 0)]
+
+    return read
+
+
+def pulses(starts_ms, width_ms, *, base=BRIGHT, level=DARK):
+    """base, with level held for width_ms from each start, e.g. finger taps."""
+    points = [(0, base)]
+    for t in starts_ms:
+        points += [(t, level), (t + width_ms, base)]
+    return steps(points)
+
+
+def ramp(t0_ms, t1_ms, v0, v1):
+    """v0 until t0, a straight line to v1 at t1, then v1."""
+
+    def read(t_us):
+        t = t_us / 1000
+        if t <= t0_ms:
+            return v0
+        if t >= t1_ms:
+            return v1
+        return v0 + (v1 - v0) * (t - t0_ms) / (t1_ms - t0_ms)
+
+    return read
+
+
+def noisy(trace, amplitude, *, seed=0):
+    """trace plus uniform noise of +-amplitude counts, repeatable for a given seed."""
+    rng = random.Random(seed)
+    return lambda t_us: trace(t_us) + rng.uniform(-amplitude, amplitude)
+
+
+def recorded(path, *, loop=False):
+    """
+    Replay a recording: a text file of "t_ms,value" lines (other lines such as a
+    header or # comments are skipped). With loop=True it repeats end to end.
+    """
+    points = []
+    with open(path) as f:
+        for line in f:
+            parts = line.strip().split(",")
+            try:
+                points.append((float(parts[0]), int(float(parts[1]))))
+            except (ValueError, IndexError):
+                continue
+    if not points:
+        raise ValueError(f"no samples in {path}")
+    read = steps(points)
+    if not loop:
+        return read
+    period_us = int(max(t for t, _ in points) * 1000) or 1
+    return lambda t_us: read(t_us % period_us)
@@ -0,0 +1,125 @@
+# bench_api.py
+# To be run on a student's computer (not the Pico)
+# Per-request latency of the Device Service API over one keep-alive connection,
+# written in the same JSON format as src/tests/bench.py:
+#
+#   python bench_api.py --ip 192.168.1.101 --out api.json
+#   python bench_api.py --sim --out api.json    # service running in the simulator
+#   python bench_api.py --sim --dual-core       # ...with the synth on a second thread
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from net import wire  # noqa: E402
+
+TONE = {"freq": 440, "ms": 5, "duty": 0.0}
+MELODY = {"notes": [{"freq": 440 + 20 * i, "ms": 5} for i in range(16)]}
+REQUESTS = [
+    ("GET", "/health", None),
+    ("GET", "/sensor", None),
+    ("GET", "/status", None),
+    ("GET", "/sensor/history?since=-10000&step=1000", None),
+    ("POST", "/tone", TONE),
+    ("POST", "/melody", MELODY),
+]
+# the same bodies in the binary encoding of net/wire.py, reported as *_bin
+BINARY = [("/tone", wire.encode_tone(TONE)), ("/melody", wire.encode_melody(MELODY))]
+
+
+def summarise(values):
+    v = sorted(values)
+    n = len(v)
+    return {
+        "unit": "ms",
+        "n": n,
+        "mean": sum(v) / n,
+        "p50": v[n // 2],
+        "p95": v[min(n - 1, n * 95 // 100)],
+        "max": v[-1],
+    }
+
+
+def bench(base_url, n):
+    results = {}
+    with requests.Session() as s:
+        runs = [(m, p, {"json": b}, "") for m, p, b in REQUESTS]
+        headers = {"Content-Type": wire.CTYPE.decode()}
+        runs += [("POST", p, {"data": b, "headers": headers}, "_bin") for p, b in BINARY]
+        for method, path, kwargs, suffix in runs:
+            times = []
+            for i in range(n + 5):
+                t0 = time.perf_counter()
+                r = s.request(method, base_url + path, timeout=2, **kwargs)
+                r.raise_for_status()
+                if i >= 5:  # the first few warm up the connection and caches
+                    times.append((time.perf_counter() - t0) * 1000)
+            name = "api_" + method.lower() + path.split("?")[0].replace("/", "_") + suffix
+            results[name] = summarise(times)
+            results[name]["bytes"] = len(r.request.body or b"")
+            print(name, results[name])
+    return results
+
+
+def start_sim_service(port, dual_core=False):
+    """
+    Run the real DeviceService in this process on the simulator, wall-clock paced.
+    dual_core plays the notes through audio/core1.py, on a second host thread.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path[:0] = [os.path.join(here, "..", ".."), os.path.join(here, "..")]
+    import sim
+
+    sim.install(realtime=True)
+    import asyncio
+
+    import machine
+    from audio.core1 import SynthCore
+    from audio.synth import Synth
+    from hal.pwm_driver import PWMDriver
+    from net.service import DeviceService
+
+    synth = Synth(PWMDriver(16))
+    svc = DeviceService(SynthCore(synth) if dual_core else synth, machine.ADC(28))
+    threading.Thread(target=lambda: asyncio.run(svc.run(port=port)), daemon=True).start()
+    time.sleep(0.5)
+
+
+def git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True
+        )
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Measure Device Service request latency")
+    ap.add_argument("--ip", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=80)
+    ap.add_argument("-n", type=int, default=100, help="requests per endpoint")
+    ap.add_argument("--sim", action="store_true", help="benchmark a simulated device")
+    ap.add_argument("--dual-core", action="store_true", help="--sim with audio/core1.py")
+    ap.add_argument("--out", default="api.json")
+    args = ap.parse_args()
+
+    if args.sim:
+        args.port = 8080 if args.port == 80 else args.port
+        start_sim_service(args.port, dual_core=args.dual_core)
+    results = bench(f"http://{args.ip}:{args.port}", args.n)
+    meta = {"target": args.ip, "sim": args.sim, "commit": git_commit()}
+    if args.sim:
+        meta["dual_core"] = args.dual_core
+    meta["time"] = time.time()
+    with open(args.out, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=1)
+    print("Wrote", args.out)
@@ -0,0 +1,50 @@
+# bench_compare.py
+# To be run on a student's computer (not the Pico)
+# Compares two benchmark result files (from src/tests/bench.py or bench_api.py)
+# and exits with status 1 if anything got noticeably slower:
+#
+#   python bench_compare.py before.json after.json
+
+import argparse
+import json
+import sys
+
+STATS = ("p50", "p95")
+
+
+def compare(old, new, tolerance):
+    """Rows of (name, stat, old, new, regressed) for results present in both runs."""
+    rows = []
+    for name in sorted(set(old) & set(new)):
+        for stat in STATS:
+            a, b = old[name][stat], new[name][stat]
+            # a relative slowdown, and more than one unit so 0 -> 1 ms isn't flagged
+            regressed = b > a * (1 + tolerance) and b - a > 1
+            rows.append((name, stat, a, b, regressed))
+    return rows
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Compare two benchmark result files")
+    ap.add_argument("before")
+    ap.add_argument("after")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown")
+    args = ap.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    if before["meta"].get("sim") != after["meta"].get("sim"):
+        print("warning: comparing a simulator run with a hardware run")
+
+    rows = compare(before["results"], after["results"], args.tolerance)
+    worse = 0
+    for name, stat, a, b, regressed in rows:
+        unit = after["results"][name]["unit"]
+        flag = "  SLOWER" if regressed else ""
+        print(f"{name:<28} {stat:<4} {a:>10.2f} -> {b:>10.2f} {unit}{flag}")
+        worse += regressed
+    for name in sorted(set(before["results"]) ^ set(after["results"])):
+        print(f"{name:<28} only in one run")
+    sys.exit(1 if worse else 0)
@@ -0,0 +1,33 @@
+# clocksync.py
+# To be run on a student's computer (not the Pico)
+# Conductor side of the NTP-style /sync exchange. Devices keep the offset between
+# our clock and theirs, so notes can be sent ahead of time with absolute timestamps.
+
+import time
+
+_EPOCH = time.monotonic()
+
+
+def now_ms():
+    """The conductor clock: milliseconds since this process started."""
+    return int((time.monotonic() - _EPOCH) * 1000)
+
+
+def sync_clock(session, url, *, rounds=8, timeout=0.5):
+    """
+    Run `rounds` ping exchanges against one device's /sync endpoint. Each request
+    carries the timestamps of the previous round, which the device uses to update
+    its offset estimate. Returns the device's (offset_ms, delay_ms).
+    """
+    prev = None
+    reply = {}
+    for _ in range(rounds + 1):
+        body = {"t0": now_ms()}
+        if prev:
+            body["prev"] = prev
+        r = session.post(url, json=body, timeout=timeout)
+        t3 = now_ms()
+        r.raise_for_status()
+        reply = r.json()
+        prev = [body["t0"], reply["t1"], reply["t2"], t3]
+    return reply["offset_ms"], reply.get("delay_ms")
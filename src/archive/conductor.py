@@ -2,9 +2,14 @@
 # To be run on a student's computer (not the Pico)
 # Requires the 'requests' library: pip install requests
 
-import requests
+import sys
 import time
 
+from clocksync import now_ms
+from fanout import FanOut
+from midicompile import compile_midi
+from udpcast import NoteCaster, part_mask
+
 # --- Configuration ---
 # Students should populate this list with the IP address(es of their Picos
 PICO_IPS = [
@@ -24,6 +29,8 @@ C5 = 523
 
 # A simple melody: "Twinkle, Twinkle, Little Star"
 # Format: (note_frequency, duration_in_ms)
+# note_frequency may also be a tuple, e.g. (C4, E4, G4), to play a chord on Picos
+# with several buzzers; single-buzzer Picos play its last note.
 SONG = [
     (C4, 400),
     (C4, 400),
@@ -41,26 +48,135 @@ SONG = [
     (C4, 800),
 ]
 
+MELODY_MAX_NOTES = 64  # most notes a Pico accepts in one /melody request
+
 # --- Conductor Logic ---
 
 
+# One persistent connection per Pico; every note goes out to all of them concurrently.
+orchestra = FanOut(PICO_IPS, timeout=0.5)
+# With --udp, notes go out as one multicast datagram each instead (see udpcast.py);
+# HTTP is still used for the clock sync.
+caster = None
+
+
 def play_note_on_all_picos(freq, ms):
     """Sends a /tone POST request to every Pico in the list."""
-    print(f"Playing note: {freq}Hz for {ms}ms on all devices.")
-
+    if caster is not None:
+        caster.note(freq, ms, duty=0.5)
+        print(f"Playing note: {freq}Hz for {ms}ms (UDP).")
+        return
     payload = {"freq": freq, "ms": ms, "duty": 0.5}
+    result = orchestra.post("/tone", payload)
+
+    print(f"Playing note: {freq}Hz for {ms}ms on all devices "
+          f"(spread {result.spread_ms:.1f} ms).")
+    for ip, err in result.errors.items():
+        print(f"Error contacting {ip}: {err}")
+
+
+def play_song_scheduled(song, *, phrase_len=16, lead_ms=300):
+    """
+    Sync every Pico's clock, then upload the song a phrase at a time with absolute
+    start times. Each device plays from its own clock, so network jitter only
+    matters for the upload, not for when the notes sound.
+    """
+    sync_orchestra()
+
+    t = now_ms() + lead_ms
+    if caster is not None:
+        notes = []
+        for freq, ms in song:
+            notes.append((t, freq, ms, 0.5, 0xFFFF))
+            t += int(ms * 1.1)
+        broadcast_scheduled(notes, lead_ms)
+        return
+    for i in range(0, len(song), phrase_len):
+        notes = []
+        for freq, ms in song[i : i + phrase_len]:
+            notes.append({"freq": freq, "ms": ms, "duty": 0.5, "at": t})
+            t += int(ms * 1.1)
+
+        # upload each phrase lead_ms before it starts, appended to what is still queued
+        time.sleep(max(0.0, (notes[0]["at"] - lead_ms - now_ms()) / 1000))
+        result = orchestra.post("/melody", {"notes": notes, "append": i > 0})
+        print(f"Uploaded notes {i}-{i + len(notes) - 1} "
+              f"(upload spread {result.spread_ms:.1f} ms)")
+        for ip, err in result.errors.items():
+            print(f"Error contacting {ip}: {err}")
+        if orchestra.trace:
+            orchestra.collect_traces()
 
-    for ip in PICO_IPS:
-        url = f"http://{ip}/tone"
-        try:
-            # We use a short timeout because we don't need to wait for a response
-            # This makes the orchestra play more in sync.
-            requests.post(url, json=payload, timeout=0.1)
-        except requests.exceptions.Timeout:
-            # This is expected, we can ignore it
-            pass
-        except requests.exceptions.RequestException as e:
-            print(f"Error contacting {ip}: {e}")
+    time.sleep(max(0.0, (t - now_ms()) / 1000))
+
+
+def play_midi_scheduled(path, *, voices=1, window_ms=4000, lead_ms=300):
+    """
+    Compile a MIDI file into one part per Pico (see midicompile.py) and play it
+    like play_song_scheduled(), except every device gets its own notes. Each
+    window_ms of music is uploaded lead_ms before it starts.
+    """
+    compiled = compile_midi(path, len(PICO_IPS), voices=voices)
+    print(f"Compiled {path}: {compiled.stats}")
+    sync_orchestra()
+
+    t0 = now_ms() + lead_ms
+    if caster is not None:
+        # Pico i must be serving udp_part=i
+        notes = [
+            (n["at"], n["freq"], n["ms"], n["duty"], part_mask(i))
+            for i in range(len(PICO_IPS))
+            for n in compiled.melody_notes(i, t0)
+        ]
+        broadcast_scheduled(sorted(notes, key=lambda n: n[0]), lead_ms)
+        return
+    parts = {ip: compiled.melody_notes(i, t0) for i, ip in enumerate(PICO_IPS)}
+    pos = dict.fromkeys(PICO_IPS, 0)
+    started = set()
+    end = t0 + compiled.stats["length_ms"]
+    for window in range(t0, end, window_ms):
+        time.sleep(max(0.0, (window - lead_ms - now_ms()) / 1000))
+        # a busy window can take more than one request per device
+        while True:
+            payloads = {}
+            for ip, notes in parts.items():
+                i = pos[ip]
+                j = i
+                while j < len(notes) and j - i < MELODY_MAX_NOTES:
+                    if notes[j]["at"] >= window + window_ms:
+                        break
+                    j += 1
+                if j > i:
+                    payloads[ip] = {"notes": notes[i:j], "append": ip in started}
+                    pos[ip] = j
+                    started.add(ip)
+            if not payloads:
+                break
+            result = orchestra.post_each("/melody", payloads)
+            for ip, err in result.errors.items():
+                print(f"Error contacting {ip}: {err}")
+        if orchestra.trace:
+            orchestra.collect_traces()
+
+    time.sleep(max(0.0, (end - now_ms()) / 1000))
+
+
+def broadcast_scheduled(notes, lead_ms):
+    """
+    Send (at, freq, ms, duty, parts) notes, sorted by at, over UDP: each one
+    lead_ms before it should sound, then wait for the last one to end.
+    """
+    for at, freq, ms, duty, parts in notes:
+        time.sleep(max(0.0, (at - lead_ms - now_ms()) / 1000))
+        caster.note(freq, ms, duty=duty, at=at, parts=parts)
+    end = max((at + ms for at, _f, ms, _d, _p in notes), default=now_ms())
+    time.sleep(max(0.0, (end - now_ms()) / 1000))
+    print(f"Sent {caster.sent} datagrams.")
+
+
+def sync_orchestra():
+    for ip, result in orchestra.sync_clocks().items():
+        print(f"Clock sync {ip}: {result}")
 
 
 if __name__ == "__main__":
@@ -68,6 +184,15 @@ if __name__ == "__main__":
     print(f"Found {len(PICO_IPS)} devices in the orchestra.")
     print("Press Ctrl+C to stop.")
 
+    # python conductor.py [--live | --midi song.mid] --trace: report per-device
+    # latency (network, parsing, audio start) at the end
+    orchestra.trace = "--trace" in sys.argv
+    # --binary: send /tone and /melody bodies in the compact encoding (net/wire.py)
+    orchestra.binary = "--binary" in sys.argv
+    if "--udp" in sys.argv:
+        # python conductor.py [--live | --midi song.mid] --udp
+        caster = NoteCaster()
+
     try:
         # Give a moment for everyone to get ready
         print("\nStarting in 3...")
@@ -78,13 +203,36 @@ if __name__ == "__main__":
         time.sleep(1)
         print("Go!\n")
 
-        # Play the song
-        for note, duration in SONG:
-            play_note_on_all_picos(note, duration)
-            # Wait for the note's duration plus a small gap before playing the next one
-            time.sleep(duration / 1000 * 1.1)
+        if "--midi" in sys.argv:
+            # python conductor.py --midi song.mid: every Pico plays its own part
+            play_midi_scheduled(sys.argv[sys.argv.index("--midi") + 1])
+        elif "--live" in sys.argv:
+            # Send every note at the moment it should sound
+            if orchestra.trace:
+                sync_orchestra()  # only needed to split out the network time
+            next_note = time.perf_counter()
+            for n, (note, duration) in enumerate(SONG):
+                play_note_on_all_picos(note, duration)
+                if orchestra.trace and n % 16 == 15:
+                    orchestra.collect_traces()
+                # Wait for the note's duration plus a small gap before the next one.
+                # Keep to an absolute schedule so request time doesn't stretch the tempo.
+                next_note += duration / 1000 * 1.1
+                time.sleep(max(0.0, next_note - time.perf_counter()))
+        else:
+            # Default: clock-synced, pre-scheduled playback
+            play_song_scheduled(SONG)
 
         print("\nSong finished!")
+        print(f"Onset spread across devices: {orchestra.summary()}")
+        if orchestra.trace:
+            orchestra.collect_traces()
+            for ip, stats in orchestra.trace_summary().items():
+                print(f"Latency {ip}: {stats}")
 
     except KeyboardInterrupt:
         print("\nConductor stopped by user.")
+    finally:
+        orchestra.close()
+        if caster is not None:
+            caster.close()
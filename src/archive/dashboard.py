@@ -1,7 +1,8 @@
 # dashboard.py
 # To be run on a student's computer (not the Pico)
 
-import requests
+import asyncio
+import json
 import time
 
 # --- Configuration ---
@@ -10,28 +11,100 @@ PICO_IPS = [
     "192.168.1.101",
 ]
 
-
-def get_device_status(ip):
-    """Fetches /health and /sensor data from a single device."""
-    status = {"ip": ip, "device_id": "N/A", "status": "Error", "norm": 0.0}
-    try:
-        # Get health status
-        health_res = requests.get(f"http://{ip}/health", timeout=1)
-        health_res.raise_for_status()
-        health_data = health_res.json()
-        status.update(health_data)
-        status["status"] = health_data.get("status", "Unknown")
-
-        # Get sensor data
-        sensor_res = requests.get(f"http://{ip}/sensor", timeout=1)
-        sensor_res.raise_for_status()
-        sensor_data = sensor_res.json()
-        status["norm"] = sensor_data.get("norm", 0.0)
-
-    except requests.exceptions.RequestException as e:
-        status["status"] = f"Offline ({type(e).__name__})"
-
-    return status
+REFRESH_S = 1.0  # how often the dashboard redraws
+DEADLINE_S = 0.5  # per-device budget for one poll; slower devices show cached values
+STALE_AFTER_S = 10.0  # after this long without an answer a device is shown as offline
+
+
+class DevicePoller:
+    """
+    Polls one Pico over a persistent HTTP/1.1 connection. Uses the combined
+    /status endpoint, falling back to /health + /sensor on older firmware, and
+    remembers the last good reading so a slow device doesn't blank the dashboard.
+    """
+
+    def __init__(self, ip, port=80):
+        self.ip = ip
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.combined = True  # cleared if the device has no /status endpoint
+        self.last = {"device_id": "N/A", "norm": 0.0}
+        self.last_ok = None  # time.monotonic() of the last successful poll
+
+    async def poll(self, deadline_s):
+        try:
+            data = await asyncio.wait_for(self._fetch(), deadline_s)
+        except (OSError, ValueError, EOFError, IndexError, asyncio.TimeoutError) as e:
+            # a truncated body (IncompleteReadError is an EOFError), a garbage status
+            # line, or the connection mid-response: start over next time, and keep
+            # it to this device, so the others still show
+            self._close()
+            return self._status(f"Offline ({type(e).__name__})")
+        self.last.update(data)
+        self.last_ok = time.monotonic()
+        return self._status(data.get("status", "Unknown"))
+
+    async def _fetch(self):
+        if self.combined:
+            code, data = await self._get("/status")
+            if code != 404:
+                return data
+            self.combined = False
+        _, data = await self._get("/health")
+        _, sensor = await self._get("/sensor")
+        data.update(sensor)
+        return data
+
+    async def _get(self, path):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.ip, self.port)
+        self.writer.write(f"GET {path} HTTP/1.1\r\nHost: {self.ip}\r\n\r\n".encode())
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed")
+        code = int(status_line.split()[1])
+        length, keep_alive = 0, True
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode().partition(":")
+            name = name.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "connection" and value.strip().lower() == "close":
+                keep_alive = False
+        body = await self.reader.readexactly(length)
+        if not keep_alive:
+            self._close()
+        if code >= 400 and code != 404:
+            raise ValueError(f"HTTP {code}")
+        return code, json.loads(body) if code == 200 else {}
+
+    def _status(self, state):
+        age = None if self.last_ok is None else time.monotonic() - self.last_ok
+        if not state.startswith("Offline"):
+            shown = state
+        elif age is not None and age < STALE_AFTER_S:
+            shown = "Stale"  # keep showing the cached reading for a while
+        else:
+            shown = state
+        status = {"ip": self.ip, "status": shown, "age": age}
+        status.update((k, v) for k, v in self.last.items() if k != "status")
+        return status
+
+    def _close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def poll_all(pollers, deadline_s=DEADLINE_S):
+    """Poll every device concurrently; the whole round takes at most deadline_s."""
+    return await asyncio.gather(*(p.poll(deadline_s) for p in pollers))
 
 
 def render_dashboard(statuses):
@@ -56,12 +129,21 @@ def render_dashboard(statuses):
     print("-" * 60)
 
 
+async def main():
+    pollers = [DevicePoller(ip) for ip in PICO_IPS]
+    loop = asyncio.get_running_loop()
+    next_refresh = loop.time()
+    while True:
+        all_statuses = await poll_all(pollers)
+        render_dashboard(all_statuses)
+        # Refresh every second, however long the poll took
+        next_refresh += REFRESH_S
+        await asyncio.sleep(max(0.0, next_refresh - loop.time()))
+
+
 if __name__ == "__main__":
     try:
-        while True:
-            all_statuses = [get_device_status(ip) for ip in PICO_IPS]
-            render_dashboard(all_statuses)
-            time.sleep(1)  # Refresh every second
+        asyncio.run(main())
 
     except KeyboardInterrupt:
         print("\nDashboard stopped.")
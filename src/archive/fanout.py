@@ -0,0 +1,227 @@
+# fanout.py
+# To be run on a student's computer (not the Pico)
+# Sends one request to every Pico at (nearly) the same moment.
+
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from clocksync import now_ms, sync_clock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from net import wire  # noqa: E402
+
+HEADERS = {"Content-Type": "application/json"}
+BINARY_HEADERS = {"Content-Type": wire.CTYPE.decode()}
+ENCODERS = {"/tone": wire.encode_tone, "/melody": wire.encode_melody}
+TRACED = ("/tone", "/melody")  # requests that get a trace id when tracing is on
+STAGES = ("net_ms", "parse_ms", "wait_ms", "late_ms")  # as reported by GET /trace
+
+
+class FanOutResult:
+    """What happened when one request was sent to every device."""
+
+    def __init__(self, arrivals, errors):
+        # ip -> estimated arrival time on the device (perf_counter seconds, send + RTT/2)
+        self.arrivals = arrivals
+        # ip -> short error string for devices that did not answer in time
+        self.errors = errors
+
+    @property
+    def spread_ms(self):
+        """Time between the first and last device receiving the request."""
+        if len(self.arrivals) < 2:
+            return 0.0
+        t = self.arrivals.values()
+        return (max(t) - min(t)) * 1000
+
+
+class FanOut:
+    """
+    Keeps one keep-alive connection per device and fires requests to all of them
+    concurrently from a thread pool, so the last device is not waiting behind the
+    others. Every call records the onset spread so it can be watched as devices
+    are added, and failed requests are counted per device.
+
+    With trace=True, /tone and /melody requests carry a trace id and the send
+    time, and collect_traces() fetches each device's per-stage timings of them.
+    With binary=True they are sent in the compact encoding of net/wire.py.
+    """
+
+    def __init__(self, ips, *, timeout=0.5, port=80, trace=False, binary=False):
+        self.ips = list(ips)
+        self.timeout = timeout
+        self.port = port
+        self.trace = trace
+        self.binary = binary
+        # ids start from the wall clock so a restarted conductor doesn't reuse old ones
+        self._trace_id = int(time.time() * 1000) & 0xFFFFFFF
+        self._since = dict.fromkeys(self.ips, self._trace_id)
+        self.traces = {ip: {} for ip in self.ips}  # ip -> trace id -> stage timings
+        self.failures = {ip: Counter() for ip in self.ips}  # ip -> error -> count
+        self.sessions = {}
+        for ip in self.ips:
+            s = requests.Session()
+            # a single pooled connection per device is all we need, and keeps it warm
+            s.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+            self.sessions[ip] = s
+        self.pool = ThreadPoolExecutor(max_workers=max(1, len(self.ips)))
+        self.spreads = []
+
+    def post(self, path, payload):
+        return self._send(path, dict.fromkeys(self.ips, payload))
+
+    def post_each(self, path, payloads):
+        """Like post(), with a payload per device (ip -> payload); others are skipped."""
+        return self._send(path, payloads)
+
+    def _send(self, path, payloads):
+        trace_id = None
+        if self.trace and path in TRACED:
+            self._trace_id += 1
+            trace_id = self._trace_id
+        # the barrier lines the workers up so they all send at the same instant
+        gate = threading.Barrier(len(payloads)) if payloads else None
+        futures = {
+            ip: self.pool.submit(self._post, ip, path, payload, gate, trace_id)
+            for ip, payload in payloads.items()
+        }
+
+        arrivals, errors = {}, {}
+        for ip, fut in futures.items():
+            ok, value = fut.result()
+            if ok:
+                arrivals[ip] = value
+            else:
+                errors[ip] = value
+                self.failures[ip][value] += 1
+        result = FanOutResult(arrivals, errors)
+        self.spreads.append(result.spread_ms)
+        return result
+
+    def _post(self, ip, path, payload, gate, trace_id):
+        url = f"http://{ip}:{self.port}{path}"
+        try:
+            gate.wait(timeout=self.timeout)
+        except threading.BrokenBarrierError:
+            pass
+        t0 = time.perf_counter()
+        if trace_id is not None:
+            payload = dict(payload, trace=trace_id, sent=now_ms())
+        if self.binary and path in ENCODERS:
+            body, headers = ENCODERS[path](payload), BINARY_HEADERS
+        else:
+            body, headers = json.dumps(payload).encode(), HEADERS
+        try:
+            r = self.sessions[ip].post(
+                url, data=body, headers=headers, timeout=self.timeout
+            )
+            r.raise_for_status()
+        except requests.exceptions.Timeout:
+            return False, "timeout"
+        except requests.exceptions.RequestException as e:
+            return False, type(e).__name__
+        t1 = time.perf_counter()
+        return True, t0 + (t1 - t0) / 2
+
+    def sync_clocks(self, rounds=8):
+        """
+        Run the /sync exchange with every device concurrently. Returns
+        ip -> (offset_ms, delay_ms), or ip -> error string for failed devices.
+        """
+
+        def one(ip):
+            url = f"http://{ip}:{self.port}/sync"
+            try:
+                return sync_clock(
+                    self.sessions[ip], url, rounds=rounds, timeout=self.timeout
+                )
+            except requests.exceptions.RequestException as e:
+                return type(e).__name__
+
+        return dict(zip(self.ips, self.pool.map(one, self.ips)))
+
+    def collect_traces(self):
+        """
+        Fetch new GET /trace records from every device into self.traces. A note
+        that has not started yet is reported without late_ms, so it is fetched
+        again next time; one the synth skipped for being over already comes back
+        with "dropped" set. Devices only keep their last 32 traced requests, so
+        call this at least that often.
+        """
+
+        def one(ip):
+            url = f"http://{ip}:{self.port}/trace"
+            got = self.traces[ip]
+            since = self._since[ip]
+            while True:
+                try:
+                    r = self.sessions[ip].get(
+                        url, params={"since": since}, timeout=self.timeout
+                    )
+                    r.raise_for_status()
+                    page = r.json()["traces"]
+                except requests.exceptions.RequestException as e:
+                    self.failures[ip][type(e).__name__] += 1
+                    return
+                if not page:
+                    break
+                for rec in page:
+                    got[rec["id"]] = rec
+                since = page[-1]["id"]
+            pending = [i for i, rec in got.items() if rec["late_ms"] is None]
+            self._since[ip] = min(pending) - 1 if pending else since
+
+        list(self.pool.map(one, self.ips))
+
+    def trace_summary(self):
+        """
+        Per device: p50/p95/max (ms) of each traced stage, failed requests and
+        first notes dropped for starting too late to sound.
+        net_ms is conductor send to request line on the device (needs a clock sync
+        first), parse_ms reading and parsing the body, wait_ms the scheduled lead
+        before the first note and late_ms how far behind schedule it started.
+        """
+        out = {}
+        for ip in self.ips:
+            recs = self.traces[ip].values()
+            stats = {
+                "traced": len(recs),
+                "dropped": sum(1 for r in recs if r.get("dropped")),
+                "failures": dict(self.failures[ip]),
+            }
+            for stage in STAGES:
+                v = sorted(r[stage] for r in recs if r[stage] is not None)
+                if v:
+                    n = len(v)
+                    stats[stage] = {
+                        "p50": v[n // 2],
+                        "p95": v[min(n - 1, n * 95 // 100)],
+                        "max": v[-1],
+                    }
+            out[ip] = stats
+        return out
+
+    def summary(self):
+        """Onset spread statistics (ms) over every request sent so far."""
+        if not self.spreads:
+            return {"notes": 0}
+        return {
+            "notes": len(self.spreads),
+            "mean_ms": statistics.fmean(self.spreads),
+            "median_ms": statistics.median(self.spreads),
+            "max_ms": max(self.spreads),
+        }
+
+    def close(self):
+        self.pool.shutdown(wait=False)
+        for s in self.sessions.values():
+            s.close()
@@ -0,0 +1,311 @@
+# midicompile.py
+# To be run on a student's computer (not the Pico)
+# Turns a standard MIDI file into one part per Pico: chords and overlapping tracks
+# are split into monophonic lines, which are then dealt out to the devices. Results
+# are cached by file hash, so replaying a piece doesn't parse it again.
+#
+#   python midicompile.py song.mid --devices 8 --out parts/
+
+import bisect
+import hashlib
+import json
+import os
+import struct
+import sys
+
+# the packed score format is shared with the firmware (src/audio/score.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from audio.score import encode_events  # noqa: E402
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".midicache")
+CACHE_VERSION = 1  # bump when the compiler's output changes
+PERCUSSION_CHANNEL = 9  # General MIDI drums; pitches there aren't notes
+LEGATO_MS = 30  # overlaps shorter than this are trimmed instead of needing a new part
+MIN_NOTE_MS = 40  # a note is only cut short for a new one after sounding this long
+RANGE = (48, 96)  # C3..C7: notes outside are moved by octaves (buzzers can't go low)
+
+
+class Note:
+    __slots__ = ("start", "dur", "pitch", "vel")
+
+    def __init__(self, start, dur, pitch, vel):
+        self.start = start  # ms from the start of the piece
+        self.dur = dur
+        self.pitch = pitch
+        self.vel = vel  # 0.0..1.0
+
+    @property
+    def end(self):
+        return self.start + self.dur
+
+
+# ---------- MIDI parsing ----------
+def parse_midi(data, *, skip_drums=True):
+    """Notes of a format 0 or 1 standard MIDI file, sorted by start time."""
+    if data[:4] != b"MThd":
+        raise ValueError("not a MIDI file")
+    hlen, fmt, ntrks, division = struct.unpack(">IHHH", data[4:14])
+    if fmt > 1:
+        raise ValueError(f"MIDI format {fmt} is not supported")
+
+    pos = 8 + hlen
+    tempos = []  # (tick, us_per_quarter)
+    raw = []  # (start_tick, end_tick, pitch, velocity)
+    for _ in range(ntrks):
+        if data[pos : pos + 4] != b"MTrk":
+            raise ValueError("bad track header")
+        (tlen,) = struct.unpack(">I", data[pos + 4 : pos + 8])
+        _parse_track(data, pos + 8, pos + 8 + tlen, skip_drums, tempos, raw)
+        pos += 8 + tlen
+
+    to_ms = _tick_clock(division, tempos)
+    notes = []
+    for t0, t1, pitch, vel in raw:
+        start = to_ms(t0)
+        dur = to_ms(t1) - start
+        if dur > 0:
+            notes.append(Note(start, dur, pitch, vel / 127))
+    notes.sort(key=lambda n: (n.start, -n.pitch))
+    return notes
+
+
+def _parse_track(data, pos, end, skip_drums, tempos, raw):
+    tick = 0
+    status = 0
+    sounding = {}  # (channel, pitch) -> [(start_tick, velocity)], oldest first
+    while pos < end:
+        delta, pos = _varlen(data, pos)
+        tick += delta
+        b = data[pos]
+        if b & 0x80:
+            status = b
+            pos += 1
+        elif not status:
+            raise ValueError("running status without a status byte")
+
+        if status == 0xFF:  # meta event
+            kind = data[pos]
+            n, pos = _varlen(data, pos + 1)
+            if kind == 0x51 and n == 3:
+                tempos.append((tick, int.from_bytes(data[pos : pos + 3], "big")))
+            pos += n
+            status = 0  # meta and sysex events cancel running status
+            continue
+        if status in (0xF0, 0xF7):  # sysex
+            n, pos = _varlen(data, pos)
+            pos += n
+            status = 0
+            continue
+
+        kind = status & 0xF0
+        chan = status & 0x0F
+        if kind in (0xC0, 0xD0):
+            pos += 1
+            continue
+        a, v = data[pos], data[pos + 1]
+        pos += 2
+        if kind not in (0x80, 0x90) or (skip_drums and chan == PERCUSSION_CHANNEL):
+            continue
+        key = (chan, a)
+        if kind == 0x90 and v:
+            sounding.setdefault(key, []).append((tick, v))
+        elif sounding.get(key):
+            t0, vel = sounding[key].pop(0)
+            raw.append((t0, tick, a, vel))
+    # notes never switched off end with the track
+    for (_chan, pitch), started in sounding.items():
+        for t0, vel in started:
+            raw.append((t0, tick, pitch, vel))
+
+
+def _varlen(data, pos):
+    value = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        value = (value << 7) | (b & 0x7F)
+        if not b & 0x80:
+            return value, pos
+
+
+def _tick_clock(division, tempos):
+    """Function converting an absolute tick to ms, following tempo changes."""
+    if division & 0x8000:
+        # SMPTE timing: -frames per second in the high byte, ticks per frame low
+        fps = 256 - (division >> 8)
+        per_tick = 1000 / (fps * (division & 0xFF))
+        return lambda tick: round(tick * per_tick)
+
+    # (start_tick, start_ms, ms_per_tick), at 120 bpm until the file says otherwise
+    segments = [(0, 0.0, 500 / division)]
+    for t, us in sorted(tempos):
+        t0, ms0, per = segments[-1]
+        segments.append((t, ms0 + (t - t0) * per, us / 1000 / division))
+    starts = [s[0] for s in segments]
+
+    def to_ms(t):
+        t0, ms0, per = segments[bisect.bisect_right(starts, t) - 1]
+        return round(ms0 + (t - t0) * per)
+
+    return to_ms
+
+
+# ---------- Part splitting ----------
+def split_parts(notes, max_parts):
+    """
+    Reduce any polyphony to at most max_parts monophonic lines. Each note goes to
+    the free part whose last pitch is closest, so lines move smoothly; when every
+    part is busy the longest-sounding note is cut short, as the Synth does when it
+    runs out of voices. Returns (parts, dropped_count).
+    """
+    parts = []
+    dropped = 0
+    for n in notes:
+        best = None
+        for part in parts:
+            last = part[-1]
+            if last.end > n.start + LEGATO_MS:
+                continue
+            if best is None or abs(last.pitch - n.pitch) < abs(best[-1].pitch - n.pitch):
+                best = part
+        if best is None and len(parts) < max_parts:
+            parts.append([n])
+            continue
+        if best is None:
+            best = min(parts, key=lambda p: p[-1].start)
+            if n.start - best[-1].start < MIN_NOTE_MS:
+                dropped += 1
+                continue
+        last = best[-1]
+        if last.end > n.start:
+            last.dur = n.start - last.start
+        best.append(n)
+    return parts, dropped
+
+
+def fold_range(notes, lo=RANGE[0], hi=RANGE[1]):
+    """Move notes outside lo..hi by whole octaves until they fit."""
+    for n in notes:
+        while n.pitch < lo:
+            n.pitch += 12
+        while n.pitch > hi:
+            n.pitch -= 12
+
+
+def assign_parts(parts, n_devices, voices=1):
+    """
+    Deal parts out to devices, `voices` parts per device at most: the busiest
+    parts first, each to the least-loaded device, preferring one whose parts sit
+    in a nearby range. Devices left idle double the busiest parts.
+    Returns a list of part lists, one per device.
+    """
+    devices = [[] for _ in range(n_devices)]
+    load = [0] * n_devices
+    order = sorted(parts, key=len, reverse=True)
+    for part in order:
+        centre = _centre(part)
+
+        def cost(i):
+            near = min((abs(_centre(p) - centre) for p in devices[i]), default=0)
+            return (load[i], near)
+
+        free = [i for i in range(n_devices) if len(devices[i]) < voices]
+        if not free:
+            break
+        i = min(free, key=cost)
+        devices[i].append(part)
+        load[i] += len(part)
+
+    k = 0
+    for dev in devices:
+        if not dev and order:
+            dev.append(order[k % len(order)])
+            k += 1
+    return devices
+
+
+def _centre(part):
+    return sum(n.pitch for n in part) / len(part)
+
+
+# ---------- Compiling and caching ----------
+class Compiled:
+    """Per-device note lists, each as (pitch, velocity, start_ms, duration_ms) events."""
+
+    def __init__(self, devices, stats):
+        self.devices = devices
+        self.stats = stats
+
+    def score(self, i):
+        """Device i's part in the packed binary score format."""
+        return encode_events(self.devices[i])
+
+    def melody_notes(self, i, t0):
+        """Device i's notes as /melody entries with conductor timestamps from t0."""
+        return [
+            {
+                "freq": round(440 * 2 ** ((pitch - 69) / 12)),
+                "ms": dur,
+                "duty": round(max(0.05, 0.5 * vel), 3),
+                "at": t0 + start,
+            }
+            for pitch, vel, start, dur in self.devices[i]
+        ]
+
+
+def compile_midi(path, n_devices, *, voices=1, cache_dir=CACHE_DIR):
+    """Compile a MIDI file for n_devices with `voices` buzzers each, using the cache."""
+    with open(path, "rb") as f:
+        data = f.read()
+    key = hashlib.sha256(data).hexdigest()[:24]
+    cache = os.path.join(cache_dir, f"{key}-{n_devices}x{voices}-v{CACHE_VERSION}.json")
+    try:
+        with open(cache) as f:
+            cached = json.load(f)
+        devices = [[tuple(e) for e in d] for d in cached["devices"]]
+        return Compiled(devices, cached["stats"])
+    except (OSError, ValueError, KeyError):
+        pass
+
+    notes = parse_midi(data)
+    fold_range(notes)
+    parts, dropped = split_parts(notes, n_devices * voices)
+    devices = []
+    for dev in assign_parts(parts, n_devices, voices):
+        # a note trimmed to nothing by a legato overlap is dropped here
+        events = [(n.pitch, round(n.vel, 3), n.start, n.dur) for p in dev for n in p]
+        events = sorted([e for e in events if e[3] > 0], key=lambda e: e[2])
+        devices.append(events)
+    stats = {
+        "notes": len(notes),
+        "parts": len(parts),
+        "dropped": dropped,
+        "length_ms": max((n.end for n in notes), default=0),
+        "per_device": [len(d) for d in devices],
+    }
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = cache + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"devices": devices, "stats": stats}, f)
+    os.replace(tmp, cache)
+    return Compiled(devices, stats)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Split a MIDI file into per-Pico scores")
+    ap.add_argument("midi")
+    ap.add_argument("--devices", type=int, required=True)
+    ap.add_argument("--voices", type=int, default=1, help="buzzers per device")
+    ap.add_argument("--out", help="directory for device_NN.score files")
+    args = ap.parse_args()
+
+    compiled = compile_midi(args.midi, args.devices, voices=args.voices)
+    print(json.dumps(compiled.stats))
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+        for i in range(args.devices):
+            with open(os.path.join(args.out, f"device_{i:02d}.score"), "wb") as f:
+                f.write(compiled.score(i))
@@ -0,0 +1,60 @@
+# udpcast.py
+# To be run on a student's computer (not the Pico)
+# Sends notes to every Pico with one UDP datagram each (multicast or broadcast),
+# instead of one HTTP request per device. Picos listen when started with
+# main.serve(udp_part=...); the datagram format is in net/packet.py.
+
+import os
+import random
+import socket
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from net.packet import ALL_PARTS, MAX_PARTS, pack  # noqa: E402
+
+PORT = 5005
+GROUP = "239.5.5.5"  # must match net/udp.py; "255.255.255.255" to broadcast
+
+
+class NoteCaster:
+    """
+    One socket, one datagram per note whatever the number of devices. Every
+    datagram can be sent `repeat` times to ride out packet loss on busy Wi-Fi;
+    devices drop the copies by sequence number.
+    """
+
+    def __init__(self, group=GROUP, port=PORT, *, ttl=1, repeat=1):
+        self.addr = (group, port)
+        self.repeat = repeat
+        self.session = random.randrange(256)  # tells devices this is a new run
+        self.seq = 0
+        self.sent = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+
+    def note(self, freq, ms, *, duty=0.5, at=None, parts=ALL_PARTS):
+        """
+        Play freq (Hz, or a tuple of them for a chord) for ms on every device whose
+        part is in the parts bitmask: at conductor time `at` (see clocksync.now_ms,
+        devices must be synced over HTTP first) or as soon as it arrives.
+        """
+        for f in freq if isinstance(freq, (tuple, list)) else (freq,):
+            self.seq += 1
+            data = pack(self.session, self.seq, f, ms, duty=duty, at=at, parts=parts)
+            for _ in range(self.repeat):
+                self.sock.sendto(data, self.addr)
+                self.sent += 1
+
+    def close(self):
+        self.sock.close()
+
+
+def part_mask(*parts):
+    """Bitmask for the given part numbers (0..15)."""
+    mask = 0
+    for p in parts:
+        if not 0 <= p < MAX_PARTS:
+            raise ValueError(f"part must be in 0..{MAX_PARTS - 1}")
+        mask |= 1 << p
+    return mask
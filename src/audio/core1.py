@@ -0,0 +1,255 @@
+# audio/core1.py
+# Runs the Synth scheduler on the Pico's second core. Core 0 (sensing, HTTP, UDP)
+# only writes commands into a single-producer/single-consumer ring; core 1 drains
+# it and services the scheduler every period_us, so note timing no longer depends
+# on how long core 0 spends parsing a request. No locks are taken: core 0 only
+# writes the head index, core 1 only the tail, and a record is filled in before
+# the head index that publishes it moves.
+import asyncio
+import time
+from array import array
+
+from audio.synth import Synth
+from diag import metrics
+
+SIZE = 64  # ring records; a power of two
+PERIOD_US = 1000  # core 1 services the synth this often
+DUTY_FULL = 65535
+NO_PITCH = 255  # a raw-Hz note
+
+# record ops
+NOTE = 1  # start_ms (relative to the COMMIT's at), freq, duty, ms, pitch
+COMMIT = 2  # replace the melody with the notes sent since the last COMMIT
+COMMIT_APPEND = 3  # the same, merged into what is still queued
+CANCEL = 4
+
+# words of SynthCore.state, each written by one side only
+_HEAD = 0  # core 0: next record to write
+_TAIL = 1  # core 1: next record to read
+_RUN = 2  # core 0: set to 0 to ask core 1 to stop
+_ALIVE = 3  # core 1: cleared as its loop exits
+_BUSY = 4  # core 1: synth.busy() as of its last pass
+
+
+class SynthCore:
+    """
+    Stands in for a Synth on core 0: play(), play_hz() and cancel() go through
+    the ring to core 1 and return at once; busy() and voices read what core 1
+    leaves behind. start() launches core 1. Where it can't be had (firmware
+    without _thread, core 1 already taken, the simulator) the ring is drained
+    from a machine.Timer on this core instead, as Synth.start_timer() does.
+
+    When the ring is full, a caller outside asyncio waits for core 1 to make
+    room. Once run() is going as an asyncio task (DeviceService starts it) the
+    overflow goes to a backlog that task feeds in as room frees up, so an HTTP
+    handler never stalls the event loop. play_score(), note_on() and note_off()
+    stay on the Synth itself.
+    """
+
+    def __init__(self, synth, *, size=SIZE, period_us=PERIOD_US):
+        if size & (size - 1):
+            raise ValueError("size must be a power of two")
+        self.synth = synth
+        self.mask = size - 1
+        self.period_us = period_us
+        self.ops = bytearray(size)
+        self.starts = array("i", bytes(4 * size))
+        self.freqs = array("H", bytes(2 * size))
+        self.duties = array("H", bytes(2 * size))
+        self.lengths = array("I", bytes(4 * size))
+        self.pitches = bytearray(size)
+        self.state = array("I", bytes(4 * 5))
+        self.on_core1 = False  # False while stopped or running from the Timer
+        self._timer = None
+        self._batch = []  # core 1: notes waiting for their COMMIT
+        self._backlog = []  # core 0: records waiting for room, while run() feeds them
+        self._feeding = False
+        self.waits = metrics.counter(b"core1_ring_waits")  # producer found it full
+        metrics.gauge(b"core1_ring_depth", self.depth)
+
+    # ---------- Synth interface (core 0) ----------
+    @property
+    def voices(self):
+        return self.synth.voices
+
+    @property
+    def on_start(self):
+        return self.synth.on_start
+
+    @on_start.setter
+    def on_start(self, fn):
+        # called on core 1, so it must stick to preallocated state (as TraceLog does)
+        self.synth.on_start = fn
+
+    def play(self, events, *, at=None, append=False):
+        """Synth.play() on core 1; returns the number of events sent."""
+        master = self.synth.master
+        seq = []
+        for pitch, velocity, start, dur in events:
+            Synth._check(pitch, velocity)
+            seq.append((start, Synth.midi_to_hz(pitch), velocity * master, dur, pitch))
+        return self._send(seq, at, append)
+
+    def play_hz(self, events, *, at=None, append=False):
+        """Synth.play_hz() on core 1; returns the number of events sent."""
+        seq = []
+        for freq, duty, start, dur in events:
+            Synth._check_hz(freq, duty)
+            seq.append((start, freq, duty, dur, NO_PITCH))
+        return self._send(seq, at, append)
+
+    def cancel(self):
+        # anything still in the backlog is cancelled anyway; core 1 also drops
+        # notes of a melody whose COMMIT was in the backlog
+        self._backlog.clear()
+        self._put(CANCEL, 0, 0, 0, 0, NO_PITCH)
+
+    def busy(self) -> bool:
+        st = self.state
+        return st[_HEAD] != st[_TAIL] or st[_BUSY] != 0 or len(self._backlog) > 0
+
+    def depth(self) -> int:
+        """Records written but not yet taken by core 1."""
+        st = self.state
+        return (st[_HEAD] - st[_TAIL]) & self.mask
+
+    def _send(self, seq, at, append):
+        # everything was checked first: a message is never left half-written
+        for start, freq, duty, dur, pitch in seq:
+            self._put(NOTE, start, freq, duty, dur, pitch)
+        if at is None:
+            at = time.ticks_ms()
+        self._put(COMMIT_APPEND if append else COMMIT, at, 0, 0, 0, NO_PITCH)
+        return len(seq)
+
+    def _put(self, op, start, freq, duty, ms, pitch):
+        st = self.state
+        if self._feeding and (self._backlog or self._full()):
+            self.waits.inc()
+            self._backlog.append((op, start, freq, duty, ms, pitch))
+            return
+        while self._full():
+            if not st[_RUN]:
+                raise RuntimeError("command ring full and nothing draining it")
+            self.waits.inc()
+            time.sleep_us(self.period_us)  # core 1 (or the Timer) makes room
+        self._write(op, start, freq, duty, ms, pitch)
+
+    def _full(self) -> bool:
+        st = self.state
+        return ((st[_HEAD] + 1) & self.mask) == st[_TAIL]
+
+    def _write(self, op, start, freq, duty, ms, pitch):
+        st = self.state
+        h = st[_HEAD]
+        nxt = (h + 1) & self.mask
+        self.ops[h] = op
+        self.starts[h] = start
+        self.freqs[h] = round(freq)
+        self.duties[h] = round(duty * DUTY_FULL)
+        self.lengths[h] = ms
+        self.pitches[h] = pitch
+        st[_HEAD] = nxt  # publish: everything above is in place first
+
+    # ---------- Lifecycle ----------
+    def start(self):
+        """Run the scheduler on core 1, or from a Timer if core 1 can't be had."""
+        self.stop()
+        st = self.state
+        st[_RUN] = 1
+        st[_ALIVE] = 1  # set here, so a stop() straight after still waits for it
+        try:
+            import _thread
+
+            _thread.start_new_thread(self._core1, ())
+            self.on_core1 = True
+        except (ImportError, OSError):
+            st[_ALIVE] = 0
+            from machine import Timer
+
+            ms = max(1, self.period_us // 1000)
+            self._timer = Timer(mode=Timer.PERIODIC, period=ms, callback=self._tick)
+
+    def stop(self):
+        """Stop core 1 (or the Timer) and wait for it; the synth is silenced."""
+        st = self.state
+        st[_RUN] = 0
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+            self.synth.cancel()
+        while st[_ALIVE]:
+            time.sleep_ms(1)
+        self.on_core1 = False
+
+    # the names Synth uses, so main.py and DeviceService can take either
+    def start_timer(self, period_ms=None):
+        self.start()
+
+    def stop_timer(self):
+        self.stop()
+
+    async def run(self, period_ms=None):
+        """asyncio task: start core 1 unless boot already did, then feed the backlog."""
+        if not self.state[_RUN]:
+            self.start()
+        self._feeding = True
+        backlog = self._backlog
+        try:
+            while True:
+                while backlog and not self._full():
+                    self._write(*backlog.pop(0))
+                await asyncio.sleep_ms(1 if backlog else 10)
+        finally:
+            self._feeding = False
+
+    # ---------- Core 1 ----------
+    def step(self, now=None):
+        """One pass of core 1: take new commands, then service the scheduler."""
+        self._drain()
+        synth = self.synth
+        synth.service(now)
+        self.state[_BUSY] = 1 if synth.busy() else 0
+
+    def _core1(self):
+        st = self.state
+        try:
+            while st[_RUN]:
+                self.step()
+                time.sleep_us(self.period_us)
+        finally:
+            self.synth.cancel()
+            st[_BUSY] = 0
+            st[_ALIVE] = 0
+
+    def _tick(self, _timer):
+        self.step()
+
+    def _drain(self):
+        st = self.state
+        synth = self.synth
+        batch = self._batch
+        t = st[_TAIL]
+        while t != st[_HEAD]:
+            op = self.ops[t]
+            if op == NOTE:
+                p = self.pitches[t]
+                batch.append(
+                    (
+                        self.starts[t],
+                        self.freqs[t],
+                        self.duties[t] / DUTY_FULL,
+                        self.lengths[t],
+                        None if p == NO_PITCH else p,
+                    )
+                )
+            elif op == CANCEL:
+                batch.clear()
+                synth.cancel()
+            else:
+                # the queue entries play() and play_hz() build, relative to at
+                synth._load(batch, self.starts[t], op == COMMIT_APPEND)
+                batch.clear()
+                st[_BUSY] = 1  # before the tail moves, so busy() never blinks off
+            t = (t + 1) & self.mask
+            st[_TAIL] = t
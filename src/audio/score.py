@@ -0,0 +1,130 @@
+# audio/score.py
+# Packed binary scores: an 8-byte header and 6 bytes per note, so long pieces can
+# live in flash (a file, or a bytes constant in a frozen module) and be streamed
+# into the synth without building a list of tuples on the heap.
+#
+#   header: b"SCOR", version (u8), flags (u8, reserved, 0), record count (u16)
+#   record: pitch (u8), velocity (u8, 1..127; 0 = rest), duration_ms (u16),
+#           gap_ms (i16): time from this note's end to the next record's start.
+#           -duration_ms starts the next note together with this one (a chord),
+#           so a note in a chord is at most 32768 ms long.
+# All fields are little-endian.
+import struct
+
+MAGIC = b"SCOR"
+VERSION = 1
+HEADER = "<4sBBH"
+RECORD = "<BBHh"
+HEADER_SIZE = 8
+RECORD_SIZE = 6
+MAX_GAP = 32767
+
+
+def encode(notes, *, velocity=1.0, gap_ms=0) -> bytes:
+    """Pack the (pitch, duration_ms) pairs that sequence() takes."""
+    from audio.synth import sequence
+
+    return encode_events(sequence(notes, velocity=velocity, gap_ms=gap_ms))
+
+
+def encode_events(events) -> bytes:
+    """
+    Pack (pitch, velocity, start_ms, duration_ms) events, the format Synth.play()
+    takes. Silences longer than a gap field can hold are filled with rests.
+    """
+    events = sorted(events, key=lambda e: e[2])
+    out = bytearray(struct.pack(HEADER, MAGIC, VERSION, 0, 0))
+    count = 0
+
+    def rest(ms):
+        nonlocal count
+        while ms > 0:
+            d = min(ms, 65535)
+            out.extend(struct.pack(RECORD, 0, 0, d, 0))
+            count += 1
+            ms -= d
+
+    rest(events[0][2] if events else 0)
+    for i, (pitch, vel, start, dur) in enumerate(events):
+        if not 0 <= pitch <= 127:
+            raise ValueError("pitch out of range")
+        if not 0 < dur <= 65535:
+            raise ValueError("duration must be in 1..65535 ms")
+        nxt = events[i + 1][2] if i + 1 < len(events) else start + dur
+        gap = nxt - start - dur
+        if gap < -MAX_GAP - 1:
+            # a chord note (or one overlapping the next) overflows the i16 gap
+            raise ValueError("a note overlapping the next must be at most 32768 ms long")
+        v = max(0, min(127, int(vel * 127 + 0.5)))
+        out.extend(struct.pack(RECORD, pitch, v, dur, min(gap, MAX_GAP)))
+        count += 1
+        rest(gap - MAX_GAP)
+    if count > 65535:
+        raise ValueError("too many notes for one score")
+    struct.pack_into(HEADER, out, 0, MAGIC, VERSION, 0, count)
+    return bytes(out)
+
+
+class ScoreReader:
+    """
+    Iterates a packed score as (pitch, velocity, start_ms, duration_ms) events,
+    ready for Synth.play() or Synth.play_score(). src is a bytes-like object
+    (bytes, bytearray, memoryview) or a binary file; a file is read `chunk`
+    records at a time into one reusable buffer, so RAM use doesn't depend on
+    the length of the piece. Each iteration starts from the top; with a file,
+    only iterate one at a time since they share its read position.
+    """
+
+    def __init__(self, src, *, chunk=16):
+        self.src = src
+        self._file = hasattr(src, "readinto")
+        if self._file:
+            src.seek(0)
+            head = src.read(HEADER_SIZE)
+            self._buf = bytearray(RECORD_SIZE * chunk)
+        else:
+            head = src
+        if len(head) < HEADER_SIZE:
+            raise ValueError("truncated score")
+        magic, version, _flags, count = struct.unpack_from(HEADER, head)
+        if bytes(magic) != MAGIC:
+            raise ValueError("not a score")
+        if version != VERSION:
+            raise ValueError("unsupported score version")
+        if not self._file and len(src) < HEADER_SIZE + count * RECORD_SIZE:
+            raise ValueError("truncated score")
+        self.count = count  # records, including rests
+
+    def __iter__(self):
+        t = 0
+        for pitch, vel, dur, gap in self._records():
+            if vel:
+                yield (pitch, vel / 127, t, dur)
+            t += dur + gap
+
+    def duration_ms(self) -> int:
+        """Time from the start to the end of the last record."""
+        t = end = 0
+        for _pitch, _vel, dur, gap in self._records():
+            end = max(end, t + dur)
+            t += dur + gap
+        return end
+
+    def _records(self):
+        if not self._file:
+            end = HEADER_SIZE + self.count * RECORD_SIZE
+            for off in range(HEADER_SIZE, end, RECORD_SIZE):
+                yield struct.unpack_from(RECORD, self.src, off)
+            return
+
+        f = self.src
+        buf = self._buf
+        f.seek(HEADER_SIZE)
+        left = self.count
+        while left:
+            n = min(f.readinto(buf) // RECORD_SIZE, left)
+            if not n:
+                raise ValueError("truncated score")
+            for i in range(n):
+                yield struct.unpack_from(RECORD, buf, i * RECORD_SIZE)
+            left -= n
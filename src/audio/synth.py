@@ -1,36 +1,300 @@
 # audio/synth.py
 import time
 
+from audio.tables import MIDI_HZ
+from diag.metrics import timed
+
+MAX_HZ = 65535  # raw-Hz notes: the u16 every transport (and the core 1 ring) carries
+
+
+def sequence(notes, *, velocity=1.0, gap_ms=0):
+    """
+    Turn a list of (pitch, duration_ms) pairs into back-to-back scheduler events
+    (pitch, velocity, start_ms, duration_ms), with gap_ms of silence after each note.
+    pitch may also be a tuple of pitches, which start together as a chord.
+    """
+    events = []
+    t = 0
+    for pitch, dur in notes:
+        if isinstance(pitch, int):
+            events.append((pitch, velocity, t, dur))
+        else:
+            for p in pitch:
+                events.append((p, velocity, t, dur))
+        t += dur + gap_ms
+    return events
+
+
+class Voice:
+    """One PWM output and the note it is playing."""
+
+    __slots__ = ("pwm", "on", "pitch", "serial", "off_at")
+
+    def __init__(self, pwm_driver):
+        self.pwm = pwm_driver
+        self.on = False
+        self.pitch = None  # MIDI pitch, or None for raw-Hz notes
+        self.serial = 0  # start order, for stealing the oldest note
+        self.off_at = None  # tick at which a scheduled note ends
+
+
 class Synth:
+    """
+    Plays on one PWMDriver, or polyphonically on a list of them (one voice each).
+    Each note takes a free voice; when all are busy the oldest note is stolen, so
+    a single voice behaves like a monophonic synth where the last note wins.
+    """
+
     def __init__(self, pwm_driver, *, master_vol=0.6):
-        self.pwm = pwm_driver
+        drivers = pwm_driver if isinstance(pwm_driver, (list, tuple)) else (pwm_driver,)
+        slices = [d.slice for d in drivers]
+        if len(set(slices)) != len(slices):
+            # both channels of a slice share one frequency, so they can't be two voices
+            raise ValueError("voices must be on different PWM slices")
+        self.voices = tuple(Voice(d) for d in drivers)
+        self.pwm = drivers[0]
         self.master = master_vol
-        self.active = None  # track current note
+        self._serial = 0
+
+        # scheduler state: a sorted tuple of (start_tick, freq, duty, duration_ms, pitch)
+        # and a read position into it. Swapping the tuple replaces the whole melody.
+        self._queue = ()
+        self._pos = 0
+        self._stream = None  # iterator feeding play_score(), and its next event
+        self._next = None
+        self._base = 0
+        self._timer = None
+        # optional fn(start_tick, now, played) called as each event starts, or with
+        # played False when it is skipped for being over already
+        self.on_start = None
+
+    @property
+    def active(self):
+        """Pitch of the most recently started note that is still sounding."""
+        newest = None
+        for v in self.voices:
+            if v.on and (newest is None or v.serial > newest.serial):
+                newest = v
+        return None if newest is None else newest.pitch
 
     @staticmethod
-    def midi_to_hz(pitch: int) -> float:
-        return 440.0 * (2 ** ((pitch - 69) / 12))
+    def midi_to_hz(pitch: int) -> int:
+        # precomputed in audio.tables; swap tunings with build_midi_table()
+        return MIDI_HZ[pitch]
 
     def note_on(self, pitch: int, velocity=1.0, duration_ms=None):
-        if pitch < 0 or pitch > 127:
-            raise ValueError("pitch out of range")
-        if not (0.0 <= velocity <= 1.0):
-            raise ValueError("velocity out of range")
+        """
+        Start a note right away. With duration_ms this blocks for the note length;
+        use play() for melodies that must not hold up the caller.
+        """
+        self._check(pitch, velocity)
 
-        freq = self.midi_to_hz(pitch)
-        self.pwm.set_freq(freq)
-        self.pwm.set_duty(velocity * self.master)
-        self.active = pitch
+        self._start(pitch, self.midi_to_hz(pitch), velocity * self.master, None)
 
         if duration_ms:
             time.sleep_ms(duration_ms)
-            self.note_off()
+            self.note_off(pitch)
 
     def note_off(self, pitch=None):
-        if pitch is None or pitch == self.active:
-            self.pwm.stop()
-            self.active = None
+        """Release every voice playing pitch, or all of them if pitch is None."""
+        for v in self.voices:
+            if v.on and (pitch is None or v.pitch == pitch):
+                self._release(v)
 
     def all_notes_off(self):
-        self.pwm.stop()
-        self.active = None
+        for v in self.voices:
+            self._release(v)
+
+    # ---------- Scheduler ----------
+    def play(self, events, *, at=None, append=False):
+        """
+        Queue (pitch, velocity, start_ms, duration_ms) events and return immediately.
+        start_ms is relative to `at` (a ticks_ms value, default now). Anything already
+        queued or sounding is cancelled first, unless append is set, in which case
+        the events are merged into what is still pending. Returns the queue length.
+        """
+        seq = []
+        for pitch, velocity, start, dur in events:
+            self._check(pitch, velocity)
+            freq = self.midi_to_hz(pitch)
+            seq.append((start, freq, velocity * self.master, dur, pitch))
+        return self._load(seq, at, append)
+
+    def play_hz(self, events, *, at=None, append=False):
+        """
+        Same as play() but for (freq_hz, duty_0_1, start_ms, duration_ms) events, as
+        used by the /tone and /melody API. Duty is not scaled by master_vol.
+        """
+        seq = []
+        for freq, duty, start, dur in events:
+            self._check_hz(freq, duty)
+            seq.append((start, freq, duty, dur, None))
+        return self._load(seq, at, append)
+
+    def play_score(self, score, *, at=None):
+        """
+        Stream events from a ScoreReader (or any iterable of play() events in start
+        order). Only the next event is held, pulled as the previous one starts, so
+        RAM use doesn't grow with the length of the piece. Cancels what is playing.
+        """
+        self.cancel()
+        self._base = time.ticks_ms() if at is None else at
+        self._stream = iter(score)
+        self._next = self._pull()
+
+    def cancel(self):
+        """Drop the queued melody and silence the output."""
+        self._queue = ()
+        self._pos = 0
+        self._next = None
+        self._stream = None
+        self.all_notes_off()
+
+    def busy(self) -> bool:
+        """True while a scheduled note is sounding or still queued."""
+        for v in self.voices:
+            if v.off_at is not None:
+                return True
+        return self._pos < len(self._queue) or self._next is not None
+
+    @timed(b"synth_service_us")
+    def service(self, now=None):
+        """
+        Advance the scheduler: end sounding notes whose time is up and start any
+        events that are due. Cheap enough to call every loop iteration; timing error
+        is bounded by how often it is called.
+        """
+        if now is None:
+            now = time.ticks_ms()
+
+        # ends first, so a note starting as another one stops can reuse its voice
+        for v in self.voices:
+            if v.off_at is not None and time.ticks_diff(now, v.off_at) >= 0:
+                self._release(v)
+
+        q = self._queue
+        while self._pos < len(q):
+            e = q[self._pos]
+            if time.ticks_diff(now, e[0]) < 0:
+                break
+            self._pos += 1
+            self._fire(e, now)
+
+        while self._next is not None:
+            e = self._next
+            if time.ticks_diff(now, e[0]) < 0:
+                break
+            self._next = self._pull()
+            self._fire(e, now)
+
+    def _fire(self, event, now):
+        start, freq, duty, dur, pitch = event
+        end = time.ticks_add(start, dur)
+        if time.ticks_diff(now, end) >= 0:
+            # fell behind so far the whole note is already over
+            if self.on_start is not None:
+                self.on_start(start, now, False)
+            return
+        self._start(pitch, freq, duty, end)
+        if self.on_start is not None:
+            self.on_start(start, now, True)
+
+    def _pull(self):
+        """Next play_score() event as a queue entry, or None once the score ends."""
+        it = self._stream
+        e = None if it is None else next(it, None)
+        if e is None:
+            self._stream = None
+            return None
+        pitch, velocity, start, dur = e
+        self._check(pitch, velocity)
+        start = time.ticks_add(self._base, start)
+        return (start, MIDI_HZ[pitch], velocity * self.master, dur, pitch)
+
+    # ---------- Voice allocation ----------
+    def _start(self, pitch, freq, duty, off_at):
+        v = self._voice_for(pitch)
+        v.pwm.set(freq, duty)
+        self._serial += 1
+        v.on = True
+        v.pitch = pitch
+        v.serial = self._serial
+        v.off_at = off_at
+
+    def _voice_for(self, pitch):
+        """The voice already playing pitch, else a free one, else the oldest note."""
+        free = None
+        oldest = None
+        for v in self.voices:
+            if not v.on:
+                if free is None:
+                    free = v
+            elif pitch is not None and v.pitch == pitch:
+                return v
+            elif oldest is None or v.serial < oldest.serial:
+                oldest = v
+        return free if free is not None else oldest
+
+    @staticmethod
+    def _release(v):
+        v.pwm.stop()
+        v.on = False
+        v.pitch = None
+        v.off_at = None
+
+    async def run(self, period_ms=2):
+        """
+        asyncio task that services the scheduler every period_ms. Returns at once
+        if start_timer() already services it: the two must not interleave.
+        """
+        import asyncio
+
+        if self._timer is not None:
+            return
+        while True:
+            self.service()
+            await asyncio.sleep_ms(period_ms)
+
+    def start_timer(self, period_ms=2):
+        """Service the scheduler from a periodic machine.Timer instead of a task."""
+        from machine import Timer
+
+        self.stop_timer()
+        self._timer = Timer(mode=Timer.PERIODIC, period=period_ms, callback=self._tick)
+
+    def stop_timer(self):
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+
+    def _tick(self, _timer):
+        self.service()
+
+    def _load(self, seq, at, append=False):
+        base = time.ticks_ms() if at is None else at
+        seq = [(time.ticks_add(base, e[0]),) + e[1:] for e in seq]
+        if append:
+            q = self._queue
+            self._queue = ()
+            seq.extend(q[self._pos :])
+            self._pos = 0
+        else:
+            self.cancel()
+        seq.sort(key=lambda e: time.ticks_diff(e[0], base))
+        # the queue was emptied first so a timer tick between these writes sees nothing
+        self._queue = tuple(seq)
+        return len(seq)
+
+    @staticmethod
+    def _check_hz(freq, duty):
+        if not 0 < freq <= MAX_HZ:
+            raise ValueError("freq out of range")
+        if not (0.0 <= duty <= 1.0):
+            raise ValueError("duty out of range")
+
+    @staticmethod
+    def _check(pitch, velocity):
+        if pitch < 0 or pitch > 127:
+            raise ValueError("pitch out of range")
+        if not (0.0 <= velocity <= 1.0):
+            raise ValueError("velocity out of range")
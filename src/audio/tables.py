@@ -0,0 +1,65 @@
+# audio/tables.py
+# Lookup tables built once at import so hot loops never call pow():
+#   - MIDI pitch -> Hz (rounded to whole Hz, which is all PWM.freq() takes)
+#   - brightness (0..65535) -> frequency curves with linear interpolation
+from array import array
+
+MIDI_HZ = array("H", bytes(2 * 128))
+
+
+def build_midi_table(a4_hz=440.0, divisions=12, ref_pitch=69, out=MIDI_HZ):
+    """
+    (Re)fill `out` with an equal-tempered tuning: `divisions` steps per octave,
+    ref_pitch sounding at a4_hz. Changes take effect for every user of the table.
+    """
+    for p in range(128):
+        hz = a4_hz * 2 ** ((p - ref_pitch) / divisions)
+        out[p] = max(1, min(65535, int(hz + 0.5)))
+    return out
+
+
+def set_midi_table(values, out=MIDI_HZ):
+    """Install an arbitrary tuning: 128 frequencies in Hz, indexed by MIDI pitch."""
+    if len(values) != 128:
+        raise ValueError("need 128 frequencies")
+    for p in range(128):
+        out[p] = max(1, min(65535, int(values[p] + 0.5)))
+    return out
+
+
+build_midi_table()
+
+
+class Curve:
+    """
+    A function of 0..65535 sampled at 2**bits + 1 evenly spaced points and read
+    back with integer linear interpolation. Values must fit in 0..65535.
+    """
+
+    def __init__(self, fn, *, bits=6):
+        self.bits = bits
+        self.shift = 16 - bits
+        self.mask = (1 << self.shift) - 1
+        self.table = array("H", bytes(2 * ((1 << bits) + 1)))
+        self.rebuild(fn)
+
+    def rebuild(self, fn):
+        """Resample a new function (taking 0.0..1.0) into the existing table."""
+        n = 1 << self.bits
+        for i in range(n + 1):
+            self.table[i] = max(0, min(65535, int(fn(i / n) + 0.5)))
+
+    def lookup(self, x: int) -> int:
+        i = x >> self.shift
+        frac = x & self.mask
+        t = self.table
+        lo = t[i]
+        if frac == 0:
+            return lo
+        # |hi - lo| < 2**16 and frac < 2**shift, so this stays a small int
+        return lo + ((t[i + 1] - lo) * frac >> self.shift)
+
+
+def exp_curve(min_f, max_f, gamma=1.8, *, bits=6):
+    """The maintests' map_exp(): min_f + (max_f - min_f) * z ** gamma."""
+    return Curve(lambda z: min_f + (max_f - min_f) * z**gamma, bits=bits)
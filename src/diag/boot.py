@@ -0,0 +1,43 @@
+# diag/boot.py
+# Boot timeline: the ticks_ms (ms since power-up) at which each start-up
+# milestone was first reached, from the synth being ready to the first request
+# being served. Each milestone has its own preallocated slot written once, so
+# mark() is safe from core 1 and cheap enough to call on every request. The
+# times are shown by report() and as boot_*_ms gauges on GET /metrics.
+import time
+from array import array
+
+from diag import metrics
+
+SYNTH = 0  # PWM drivers and synth set up
+SENSOR = 1  # sampler running
+FIRST_SOUND = 2  # first note started
+WIFI = 3  # associated, with an IP address
+SERVICE = 4  # network modules imported and the HTTP server listening
+FIRST_REQUEST = 5  # first request answered
+NAMES = (b"synth", b"sensor", b"first_sound", b"wifi", b"service", b"first_request")
+
+_ms = array("i", [-1] * len(NAMES))
+
+
+def mark(milestone):
+    """Record now as the time of milestone, unless it was reached before."""
+    if _ms[milestone] < 0:
+        _ms[milestone] = time.ticks_ms()
+
+
+def at(milestone):
+    """ms since power-up at which milestone was reached, or None."""
+    t = _ms[milestone]
+    return None if t < 0 else t
+
+
+def report():
+    print("Boot timeline (ms since power-up):")
+    for i, name in enumerate(NAMES):
+        t = _ms[i]
+        print("  %-14s %s" % (name.decode(), "-" if t < 0 else t))
+
+
+for _i, _name in enumerate(NAMES):
+    metrics.gauge(b"boot_" + _name + b"_ms", lambda i=_i: _ms[i])
@@ -0,0 +1,63 @@
+# diag/buffer.py
+# Fixed-size output buffer shared by the HTTP server (net/http.py) and the
+# telemetry lines of diag/rt.py. It lives here rather than in net/ so the
+# maintests can format telemetry without loading the network stack.
+
+
+class Buffer:
+    """Fixed-size output buffer with allocation-free number formatting."""
+
+    def __init__(self, size):
+        self.buf = bytearray(size)
+        self.mv = memoryview(self.buf)
+        self.n = 0
+
+    def reset(self):
+        self.n = 0
+
+    def write(self, b):
+        end = self.n + len(b)
+        if end > len(self.buf):
+            raise ValueError("response too large")
+        self.mv[self.n : end] = b
+        self.n = end
+
+    def write_int(self, v):
+        if v < 0:
+            self.write(b"-")
+            v = -v
+        div = 1
+        while div * 10 <= v:
+            div *= 10
+        buf, n = self.buf, self.n
+        if n + 12 > len(buf):
+            raise ValueError("response too large")
+        while div:
+            buf[n] = 48 + (v // div) % 10
+            n += 1
+            div //= 10
+        self.n = n
+
+    def write_fixed(self, v, places):
+        """Write the integer v scaled down by 10**places, e.g. (720, 3) -> 0.720."""
+        scale = 10**places
+        if v < 0:
+            self.write(b"-")
+            v = -v
+        self.write_int(v // scale)
+        self.write(b".")
+        frac = v % scale
+        scale //= 10
+        while scale:
+            self.buf[self.n] = 48 + (frac // scale) % 10
+            self.n += 1
+            scale //= 10
+
+    def json(self, obj):
+        """Slow path for small, infrequent replies."""
+        import json
+
+        self.write(json.dumps(obj).encode())
+
+    def view(self):
+        return self.mv[: self.n]
@@ -0,0 +1,188 @@
+# diag/metrics.py
+# Always-on counters and fixed-bucket histograms. A metric's storage is allocated
+# when it is created, so recording a value is a few integer operations with no
+# allocation, cheap enough for hot loops and hard IRQs. GET /metrics renders
+# every registered metric, one line each (format in Project.md).
+import gc
+import time
+from array import array
+
+# histogram bucket upper bounds in us; larger values land in a final "inf" bucket
+US_BOUNDS = (50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000)
+WRAP = 0x3FFFFFFF  # counters and sums wrap here so they stay small ints
+
+_metrics = []
+_profiling = False
+
+
+class Counter:
+    __slots__ = ("name", "value")
+
+    def __init__(self, name):
+        self.name = name
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value = (self.value + n) & WRAP
+
+    def render(self, out):
+        out.write(self.name)
+        out.write(b" ")
+        out.write_int(self.value)
+        out.write(b"\n")
+
+
+class Gauge:
+    """A value read only when /metrics is rendered, from fn()."""
+
+    __slots__ = ("name", "fn")
+
+    def __init__(self, name, fn):
+        self.name = name
+        self.fn = fn
+
+    def render(self, out):
+        out.write(self.name)
+        out.write(b" ")
+        out.write_int(int(self.fn()))
+        out.write(b"\n")
+
+
+class Histogram:
+    """Count, wrapping sum, max and per-bucket counts of observed values."""
+
+    __slots__ = ("name", "bounds", "counts", "count", "sum", "max")
+
+    def __init__(self, name, bounds=US_BOUNDS):
+        self.name = name
+        self.bounds = array("I", bounds)
+        self.counts = array("I", bytes(4 * (len(bounds) + 1)))
+        self.reset()
+
+    def reset(self):
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def observe(self, v):
+        b = self.bounds
+        n = len(b)
+        i = 0
+        while i < n and v > b[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count = (self.count + 1) & WRAP
+        self.sum = (self.sum + v) & WRAP
+        if v > self.max:
+            self.max = v
+
+    def render(self, out):
+        out.write(self.name)
+        out.write(b" count=")
+        out.write_int(self.count)
+        out.write(b" sum=")
+        out.write_int(self.sum)
+        out.write(b" max=")
+        out.write_int(self.max)
+        n = len(self.bounds)
+        for i in range(n + 1):
+            c = self.counts[i]
+            if not c:
+                continue  # only non-empty buckets, to keep the reply short
+            if i < n:
+                out.write(b" le")
+                out.write_int(self.bounds[i])
+            else:
+                out.write(b" inf")
+            out.write(b"=")
+            out.write_int(c)
+        out.write(b"\n")
+
+
+def _register(metric):
+    for m in _metrics:
+        if m.name == metric.name:
+            return m  # modules reloaded or asking twice get the same metric
+    _metrics.append(metric)
+    return metric
+
+
+def counter(name):
+    return _register(Counter(name))
+
+
+def gauge(name, fn):
+    return _register(Gauge(name, fn))
+
+
+def histogram(name, bounds=US_BOUNDS):
+    return _register(Histogram(name, bounds))
+
+
+def render(out):
+    """Write every metric into out (anything with write() and write_int())."""
+    for m in _metrics:
+        m.render(out)
+
+
+# ---------- Heap and GC ----------
+gauge(b"heap_free", gc.mem_free)
+gc_runs = counter(b"gc_runs")
+gc_pause_us = histogram(b"gc_pause_us")
+_last_alloc = 0
+
+
+def collect():
+    """gc.collect(), timed into gc_pause_us."""
+    global _last_alloc
+    t = time.ticks_us()
+    gc.collect()
+    gc_pause_us.observe(time.ticks_diff(time.ticks_us(), t))
+    gc_runs.inc()
+    _last_alloc = gc.mem_alloc()
+
+
+def heap_check():
+    """
+    Call now and then (e.g. once per loop): counts automatic collections, which
+    show up as the allocated heap shrinking. Their pauses can't be timed.
+    """
+    global _last_alloc
+    used = gc.mem_alloc()
+    if used < _last_alloc:
+        gc_runs.inc()
+    _last_alloc = used
+
+
+# ---------- Profiling hook ----------
+def profiling(on=True):
+    """Switch @timed on or off for functions defined after this call."""
+    global _profiling
+    _profiling = on
+
+
+def timed(name):
+    """
+    Decorator recording each call's duration (us) in histogram `name`. Decided
+    when the function is defined: with profiling off it returns the function
+    unchanged, so it costs nothing. To profile, call profiling(True) before
+    importing the modules of interest (e.g. first thing in main.py).
+    """
+
+    def wrap(fn):
+        if not _profiling:
+            return fn
+        h = histogram(name)
+
+        def timed_fn(*args, **kwargs):
+            t = time.ticks_us()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                h.observe(time.ticks_diff(time.ticks_us(), t))
+
+        return timed_fn
+
+    return wrap
@@ -0,0 +1,130 @@
+# diag/rt.py
+# Real-time mode for fixed-period sensor loops. The automatic GC is switched off
+# while the loop runs and the heap is only collected in windows the loop knows
+# are quiet (the slack before its next tick, the gap after a note), so a
+# collection never lands in the middle of a note. Each iteration's allocation is
+# measured, so a loop meant to allocate nothing can be checked for it.
+import gc
+import sys
+import time
+
+from diag import metrics
+from diag.buffer import Buffer
+
+ALLOC_BOUNDS = (0, 16, 64, 256, 1024, 4096)  # bytes allocated per iteration
+COLLECT_AFTER = 16384  # collect in the next idle window once this much is allocated
+HEAP_FLOOR = 8192  # below this much free heap, collect in any window however short
+PAUSE_GUESS_US = 3000  # expected collection time until one has been measured
+
+try:
+    _write = sys.stdout.buffer.write
+except AttributeError:
+    _write = sys.stdout.write
+_flush = getattr(sys.stdout, "flush", None)
+
+
+class RealTime:
+    """
+    Call begin() at the top of each iteration, end() after its work and wait()
+    instead of the loop's sleep. With enabled=False the GC is left alone, but
+    timing and allocation are still measured.
+    """
+
+    def __init__(self, period_ms, *, enabled=True, collect_after=COLLECT_AFTER):
+        self.period = period_ms
+        self.enabled = enabled
+        self.collect_after = collect_after
+        self.deadline = time.ticks_ms()
+        self.allocated = 0  # bytes allocated by the last iteration
+        self._t0 = 0
+        self._a0 = 0
+        self._after_gc = 0
+        self.alloc = metrics.histogram(b"rt_alloc_bytes", ALLOC_BOUNDS)
+        self.work = metrics.histogram(b"rt_work_us")
+        self.overruns = metrics.counter(b"rt_overruns")
+
+    def start(self):
+        """Collect once, then take over from the automatic GC."""
+        metrics.collect()
+        self._after_gc = gc.mem_alloc()
+        if self.enabled:
+            gc.disable()  # MicroPython still collects if an allocation would fail
+        self.resync()
+
+    def stop(self):
+        gc.enable()
+
+    def resync(self):
+        """Restart the schedule from now, e.g. after blocking for a jingle."""
+        self.deadline = time.ticks_add(time.ticks_ms(), self.period)
+
+    def begin(self):
+        self._t0 = time.ticks_us()
+        self._a0 = gc.mem_alloc()
+
+    def end(self):
+        used = gc.mem_alloc() - self._a0
+        if used < 0:
+            used = 0  # the heap ran out and was collected; the count is lost
+            metrics.gc_runs.inc()
+        self.allocated = used
+        self.alloc.observe(used)
+        self.work.observe(time.ticks_diff(time.ticks_us(), self._t0))
+
+    def wait(self):
+        """Sleep until the next tick, collecting first if the slack allows."""
+        slack = time.ticks_diff(self.deadline, time.ticks_ms())
+        if slack < 0:
+            self.overruns.inc()
+            self.deadline = time.ticks_ms()
+        else:
+            self.pause(slack)
+        self.deadline = time.ticks_add(self.deadline, self.period)
+
+    def pause(self, ms):
+        """Sleep ms that are known to be quiet (such as a gap between notes)."""
+        end = time.ticks_add(time.ticks_ms(), ms)
+        self.idle(ms)
+        left = time.ticks_diff(end, time.ticks_ms())
+        if left > 0:
+            time.sleep_ms(left)
+
+    def idle(self, window_ms) -> bool:
+        """
+        Collect if the heap needs it and the expected pause fits in window_ms.
+        Returns True if it collected.
+        """
+        if not self.enabled:
+            return False
+        low = gc.mem_free() < HEAP_FLOOR
+        if not low and gc.mem_alloc() - self._after_gc < self.collect_after:
+            return False
+        h = metrics.gc_pause_us
+        if not low and window_ms * 1000 < (h.max if h.count else PAUSE_GUESS_US):
+            return False
+        metrics.collect()
+        self._after_gc = gc.mem_alloc()
+        return True
+
+
+class Line(Buffer):
+    """A telemetry line formatted into a reused buffer, with no str or float objects."""
+
+    def field(self, name, value, places=0):
+        """Append name=value; value is an int scaled down by 10**places."""
+        if self.n:
+            self.write(b" ")
+        self.write(name)
+        self.write(b"=")
+        if places:
+            self.write_fixed(value, places)
+        else:
+            self.write_int(value)
+
+    def emit(self):
+        """Write the line to stdout and clear it for the next one."""
+        self.write(b"\n")
+        if _flush is not None:
+            _flush()  # keep it in order with print() output
+        _write(self.view())
+        self.reset()
@@ -0,0 +1,151 @@
+# dsp/filters.py
+# Integer fixed-point filters for 16-bit light samples (0..65535). Every update is
+# O(1) and stays within MicroPython small ints, so nothing is allocated per sample.
+# Each filter has update(x) for one sample and process(buf, n) for a whole buffer,
+# e.g. the array filled by Sampler.read_into().
+from array import array
+
+ALPHA_BITS = 10  # smoothing factors are stored as alpha * 1024
+FRAC_BITS = 4  # EMA state keeps 4 fractional bits so slow filters don't stall
+FULL = 65535
+
+
+def to_u16(x01: float) -> int:
+    """0.0..1.0 -> 0..65535, for converting float thresholds once at startup."""
+    return int(x01 * FULL)
+
+
+def alpha_q(alpha: float) -> int:
+    q = int(alpha * (1 << ALPHA_BITS) + 0.5)
+    return max(1, min(1 << ALPHA_BITS, q))
+
+
+class EMA:
+    """Exponential moving average: y += alpha * (x - y)."""
+
+    def __init__(self, alpha):
+        self.a = alpha_q(alpha)
+        self.y = -1  # scaled by 2**FRAC_BITS; -1 until the first sample
+
+    def reset(self):
+        self.y = -1
+
+    @property
+    def value(self) -> int:
+        return self.y >> FRAC_BITS if self.y >= 0 else 0
+
+    def update(self, x) -> int:
+        y = self.y
+        if y < 0:
+            y = x << FRAC_BITS
+        else:
+            # |diff| < 2**20 and a <= 2**10, so the product stays a small int
+            y += ((x << FRAC_BITS) - y) * self.a >> ALPHA_BITS
+        self.y = y
+        return y >> FRAC_BITS
+
+    def process(self, buf, n=None, out=None) -> int:
+        """Run n samples of buf through the filter; optionally store each output."""
+        if n is None:
+            n = len(buf)
+        a = self.a
+        y = self.y
+        i = 0
+        if n and y < 0:
+            y = buf[0] << FRAC_BITS
+        while i < n:
+            y += ((buf[i] << FRAC_BITS) - y) * a >> ALPHA_BITS
+            if out is not None:
+                out[i] = y >> FRAC_BITS
+            i += 1
+        self.y = y
+        return self.value
+
+
+class FastSlow:
+    """Fast EMA minus slow EMA: a quick change relative to the ambient baseline."""
+
+    def __init__(self, fast_alpha, slow_alpha):
+        self.fast = EMA(fast_alpha)
+        self.slow = EMA(slow_alpha)
+
+    def update(self, x) -> int:
+        return self.fast.update(x) - self.slow.update(x)
+
+    def process(self, buf, n=None) -> int:
+        return self.fast.process(buf, n) - self.slow.process(buf, n)
+
+
+class MotionWindow:
+    """Running mean of |x[i] - x[i-1]| over the last `size` samples."""
+
+    def __init__(self, size):
+        self.size = size
+        self.ring = array("H", bytes(2 * size))
+        self.i = 0
+        self.sum = 0
+        self.last = -1
+
+    @property
+    def mean(self) -> int:
+        return self.sum // self.size
+
+    def moving(self, threshold) -> bool:
+        """True if the mean |delta| is above threshold (compared without dividing)."""
+        return self.sum > threshold * self.size
+
+    def update(self, x) -> int:
+        d = 0 if self.last < 0 else x - self.last
+        if d < 0:
+            d = -d
+        self.last = x
+        i = self.i
+        self.sum += d - self.ring[i]
+        self.ring[i] = d
+        i += 1
+        self.i = 0 if i == self.size else i
+        return self.sum // self.size
+
+    def process(self, buf, n=None) -> int:
+        if n is None:
+            n = len(buf)
+        for k in range(n):
+            self.update(buf[k])
+        return self.sum // self.size
+
+
+class Hysteresis:
+    """
+    Bin classifier over 0..65535 with a sticky current bin: the current bin is
+    widened by `hyst` on both sides so values near an edge don't flutter.
+    edges are the bin boundaries, e.g. (0, 16384, 36045, 55705, 65536) for 4 bins.
+    """
+
+    def __init__(self, edges, hyst):
+        self.n = len(edges) - 1
+        self.lo = array("l", edges[:-1])
+        self.hi = array("l", edges[1:])
+        self.lo_h = array("l", (max(0, e - hyst) for e in edges[:-1]))
+        self.hi_h = array("l", (min(FULL + 1, e + hyst) for e in edges[1:]))
+        self.current = -1
+
+    def classify(self, x, cur=None) -> int:
+        """Bin index for x (or -1) given the current bin, by default the last result."""
+        if cur is None:
+            cur = self.current
+        if 0 <= cur < self.n and self.lo_h[cur] <= x < self.hi_h[cur]:
+            self.current = cur
+            return cur
+        for i in range(self.n):
+            if self.lo[i] <= x < self.hi[i]:
+                self.current = i
+                return i
+        self.current = -1
+        return -1
+
+    def process(self, buf, n=None) -> int:
+        if n is None:
+            n = len(buf)
+        for k in range(n):
+            self.classify(buf[k])
+        return self.current
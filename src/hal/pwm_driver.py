@@ -0,0 +1,73 @@
+# hal/pwm_driver.py
+from machine import Pin, PWM, disable_irq, enable_irq
+
+class PWMDriver:
+    """
+    Remembers the frequency and level last written to the PWM slice and skips
+    writes that would not change anything, so hot loops can call set_freq()/
+    set_duty() every iteration and only pay for real changes.
+    """
+
+    def __init__(self, pin_num=16):
+        self.pin = Pin(pin_num)
+        self.slice = (pin_num >> 1) & 7  # GP0..29 drive slices (n/2) % 8
+        self.pwm = PWM(self.pin)
+        self.pwm.deinit()  # idle
+        self.freq = None   # last applied frequency (Hz), None = unknown
+        self.level = None  # last applied duty_u16, None = unknown
+        # counters: register writes done, and calls skipped as no-ops
+        self.writes = 0
+        self.skipped = 0
+
+    def set_freq(self, hz: float):
+        hz = max(20, min(10000, int(hz)))  # clamp
+        if hz == self.freq:
+            self.skipped += 1
+            return
+        self.pwm.freq(hz)
+        self.freq = hz
+        self.writes += 1
+
+    def set_duty(self, duty_0_1: float):
+        self.set_level(int(duty_0_1 * 65535))
+
+    def set_level(self, duty_u16: int):
+        duty_u16 = max(0, min(65535, duty_u16))
+        if duty_u16 == self.level:
+            self.skipped += 1
+            return
+        self.pwm.duty_u16(duty_u16)
+        self.level = duty_u16
+        self.writes += 1
+
+    def set(self, hz: float, duty_0_1: float):
+        """Change pitch and volume together, see set_u16()."""
+        self.set_u16(hz, int(duty_0_1 * 65535))
+
+    def set_u16(self, hz: float, duty_u16: int):
+        """
+        Change frequency and level as one update. TOP and the compare level are
+        double-buffered and latch at the end of a period; writing both with IRQs
+        off keeps them in the same period, so no cycle runs with a new period and
+        an old level.
+        """
+        hz = max(20, min(10000, int(hz)))
+        duty_u16 = max(0, min(65535, duty_u16))
+        if hz == self.freq:
+            self.set_level(duty_u16)
+            return
+        state = disable_irq()
+        self.pwm.freq(hz)
+        self.pwm.duty_u16(duty_u16)
+        enable_irq(state)
+        self.freq = hz
+        self.level = duty_u16
+        self.writes += 2
+
+    def stop(self):
+        self.set_level(0)
+
+    def invalidate(self):
+        """Forget the cached state, e.g. after something else touched the PWM."""
+        self.freq = None
+        self.level = None
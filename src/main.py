@@ -1,69 +1,68 @@
 # main.py
 from hal.pwm_driver import PWMDriver
-from audio.synth import Synth
+from audio.synth import Synth, sequence
+from audio.core1 import SynthCore
+from sensing.sampler import Sampler
+from sensing.gestures import Gestures, DOUBLE_TAP, NONE, NAMES
+from sensing.calibrate import Calibrator
+from diag import boot, metrics
 import time
 import machine
 
 PHOTO_PIN = 28
-DEBOUNCE_DELAY_MS = 250 # debouncer for "taps" for mode switching
-THRESHOLD = 30000 # should be sufficiently dark that it simulates putting your finger over the sensor to totally black out.
+THRESHOLD = 30000 # starting "covered" level until the calibrator has seen a second of samples
 NUM_MODES = 3 
+SAMPLE_HZ = 100 # photoresistor sample rate, fixed by a timer regardless of the loop below
+VOICE_PINS = (16,) # one buzzer per pin; add e.g. 18 and 20 for chords (each on its own PWM slice)
+LOOP_MS = 20 # how often demo() handles gesture events; detection itself doesn't depend on it
+DUAL_CORE = True # play notes from the second core, so sensing/network work can't delay them
+BOOT_CHIRP = ((84, 60),) # played by fast_boot() to show the buzzer works; () for a silent boot
 
-# global debouncer vars
-debounce_timer = 0
-tap_count = 0
 current_mode = 0
 
 # init hw
 photoresistor = machine.ADC(PHOTO_PIN)
-pwm_driver = PWMDriver(pin_num=16)
-synth = Synth(pwm_driver)
+sampler = Sampler(photoresistor, rate_hz=SAMPLE_HZ)
+calibration = Calibrator(dark=THRESHOLD) # follows the room light, see sensing/calibrate.py
+gestures = Gestures(calibration=calibration) # taps, double-taps, holds and wiggles on the sensor
+synth = Synth([PWMDriver(pin_num=p) for p in VOICE_PINS])
+audio = SynthCore(synth) if DUAL_CORE else synth # what the loops below send notes to
+boot.mark(boot.SYNTH)
 
+loop_us = metrics.histogram(b"loop_us") # work done per demo() loop pass, sleeps excluded
+
+@metrics.timed(b"double_tap_us")
 def double_tap_debounce():
     """
-    A "double-tap" is defined as two quick moments of darkness DEBOUNCE_DELAY_MS apart.
-    Return true if a double-tap is detected
+    A "double-tap" is two quick moments of darkness (see sensing/gestures.py).
+    Return true if one was recognised since the last call.
+    Every sample taken since the last call goes through the recognizer, using the
+    time it was taken, so a late call doesn't change what is detected.
     """
-    # ref the globals
-    global tap_count, debounce_timer
-    
-    light_value = photoresistor.read_u16()
-    current_time_ms = time.ticks_ms()
-    
-    if light_value < THRESHOLD:
-        if time.ticks_diff(current_time_ms, debounce_timer) > DEBOUNCE_DELAY_MS:
-            if tap_count == 0:
-                print("First tap detected!")
-                tap_count = 1
-                debounce_timer = current_time_ms
-            elif tap_count == 1:
-                print("Second tap detected!")
-                tap_count = 0
-                return True
-                
-    if tap_count == 1 and time.ticks_diff(current_time_ms, debounce_timer) > DEBOUNCE_DELAY_MS:
-        print("Tap window expired, resetting.")
-        tap_count = 0
-        
-    return False
+    gestures.feed(sampler)
+    found = False
+    while True:
+        ev = gestures.pop()
+        if ev == NONE:
+            return found
+        print("Gesture:", NAMES[ev])
+        if ev == DOUBLE_TAP:
+            found = True
 
 def play_melody_1():
     print("Mode 1: Playing Melody 1...")
     melody = [(60, 300), (62, 300), (64, 300), (65, 600)]  # C D E F
-    for pitch, dur in melody:
-        synth.note_on(pitch, velocity=0.7, duration_ms=dur)
-        time.sleep_ms(50)  # gap
+    # queued on the synth scheduler, so tap sampling keeps running while it plays
+    audio.play(sequence(melody, velocity=0.7, gap_ms=50))
 
 def play_melody_2():
     print("Mode 2: Playing Melody 2...")
     melody = [(76, 300), (74, 300), (72, 300), (71, 600)]  # F E D C (up an octave)
-    for pitch, dur in melody:
-        synth.note_on(pitch, velocity=0.7, duration_ms=dur)
-        time.sleep_ms(50)
+    audio.play(sequence(melody, velocity=0.7, gap_ms=50))
 
 def silent_mode():
     print("Mode 0: Silence.")
-    synth.all_notes_off()
+    audio.cancel()
 
 
 def switch_mode():
@@ -73,24 +72,108 @@ def switch_mode():
     return current_mode
 
 
+def handle_taps():
+    """One pass of the demo loop: switch mode on a double-tap."""
+    t = time.ticks_us()
+    tapped = double_tap_debounce()
+    if tapped:
+        mode = switch_mode()
+        
+        if mode == 0:
+            silent_mode()
+        elif mode == 1:
+            play_melody_1()
+        elif mode == 2:
+            play_melody_2()
+    loop_us.observe(time.ticks_diff(time.ticks_us(), t))
+    metrics.heap_check()
+
+
 def demo():
     print("Modes are: 0=Silent, 1=Melody_1, 2=Melody_2.")
     print("Waiting for a double-tap on the photo sensor...")
+    audio.start_timer()  # notes are started/stopped on core 1 (or a timer), not this loop
+    sampler.start()
 
     while True:
-        if double_tap_debounce():
-            mode = switch_mode()
-            
-            if mode == 0:
-                silent_mode()
-            elif mode == 1:
-                play_melody_1()
-            elif mode == 2:
-                play_melody_2()
-            
-            time.sleep_ms(500) # some delay to avoid immediate rebounce
-        
-        # more sleeps for fun and safety
-        time.sleep_ms(100)
+        handle_taps()
+        # no need to wait out the tap: the recognizer only rearms once uncovered
+        time.sleep_ms(LOOP_MS)
+
+def serve(port=80, udp_part=False):
+    """
+    Run the networked Device Service (needs Wi-Fi to be connected already;
+    fast_boot() connects it in the background instead).
+    udp_part=N also plays part N of notes sent over UDP (None: every part).
+    """
+    import asyncio
+    from net.service import DeviceService
+
+    sampler.start()
+    service = DeviceService(audio, photoresistor, sampler=sampler, udp_part=udp_part)
+    asyncio.run(service.run(port=port))
+
+
+def fast_boot(port=80, udp_part=False):
+    """
+    Boot straight into the demo and join Wi-Fi in the background (credentials in
+    wifi_config.json, see net/wifi.py). Sound and taps work within milliseconds;
+    the network modules are only imported once Wi-Fi is up, then the Device
+    Service starts as in serve(). The boot timeline is printed after the first
+    request and is on GET /metrics as boot_*_ms.
+    """
+    import asyncio
+
+    asyncio.run(_fast_boot(port, udp_part))
+
+
+async def _fast_boot(port, udp_part):
+    import asyncio
+
+    audio.start_timer()
+    sampler.start()
+    boot.mark(boot.SENSOR)
+    if BOOT_CHIRP:
+        audio.on_start = _first_sound
+        audio.play(sequence(BOOT_CHIRP, velocity=0.5))
+    taps = asyncio.create_task(_tap_loop())
+
+    from net.wifi import CONFIG, WiFi
+
+    try:
+        wifi = WiFi.from_config()
+    except OSError:
+        print("No", CONFIG, "so staying offline")
+        wifi = None
+    if wifi is not None:
+        asyncio.create_task(wifi.run())
+        await wifi.wait()
+        print("Wi-Fi up:", wifi.ip())
+
+        from net.service import DeviceService  # the bulk of the network code
+
+        service = DeviceService(audio, photoresistor, sampler=sampler, udp_part=udp_part)
+        asyncio.create_task(service.run(port=port))
+        while boot.at(boot.FIRST_REQUEST) is None:
+            await asyncio.sleep_ms(100)
+        boot.report()
+    await taps
+
+
+def _first_sound(due, now, played):
+    if played:
+        boot.mark(boot.FIRST_SOUND)
+
+
+async def _tap_loop():
+    import asyncio
+
+    print("Modes are: 0=Silent, 1=Melody_1, 2=Melody_2.")
+    print("Waiting for a double-tap on the photo sensor...")
+    while True:
+        handle_taps()
+        await asyncio.sleep_ms(LOOP_MS)
+
+
 if __name__ == "__main__":
-    demo()
+    fast_boot()
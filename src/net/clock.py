@@ -0,0 +1,58 @@
+# net/clock.py
+# Offset between the conductor's millisecond clock and this device's ticks_ms(),
+# estimated NTP-style from /sync ping exchanges.
+import time
+
+TICKS_MASK = time.ticks_add(0, -1)  # ticks_ms() period - 1, whatever the port uses
+FILTER = 8  # keep the best of the last FILTER exchanges
+
+
+class Clock:
+    def __init__(self):
+        # ring of recent (delay, offset) samples; the lowest-delay one is trusted
+        self._delay = [0] * FILTER
+        self._offset = [0] * FILTER
+        self._n = 0
+        self.offset_ms = None  # device ticks minus conductor ms, None until synced
+        self.delay_ms = None
+
+    @property
+    def synced(self) -> bool:
+        return self.offset_ms is not None
+
+    def add_sample(self, t0, t1, t2, t3):
+        """
+        One completed exchange: conductor sent at t0, device received at t1 and
+        replied at t2, conductor got the reply at t3. t0/t3 are conductor ms,
+        t1/t2 are ticks_ms().
+        """
+        t0 &= TICKS_MASK
+        t3 &= TICKS_MASK
+        delay = time.ticks_diff(t3, t0) - time.ticks_diff(t2, t1)
+        if delay < 0:
+            return  # garbage sample
+        # ((t1 - t0) + (t2 - t3)) / 2, arranged so a wrapped difference can't skew it
+        offset = time.ticks_diff(t1, t0) - delay // 2
+
+        i = self._n % FILTER
+        self._delay[i] = delay
+        self._offset[i] = offset
+        self._n += 1
+
+        best = 0
+        for j in range(1, min(self._n, FILTER)):
+            if self._delay[j] < self._delay[best]:
+                best = j
+        self.delay_ms = self._delay[best]
+        self.offset_ms = self._offset[best]
+
+    def to_local(self, conductor_ms):
+        """Convert a conductor timestamp into a ticks_ms() value on this device."""
+        if self.offset_ms is None:
+            raise ValueError("clock not synced")
+        return time.ticks_add(conductor_ms & TICKS_MASK, self.offset_ms)
+
+    def reset(self):
+        self._n = 0
+        self.offset_ms = None
+        self.delay_ms = None
@@ -0,0 +1,238 @@
+# net/http.py
+# Minimal HTTP/1.1 server for asyncio. Each connection borrows a preallocated
+# request/response buffer pair from a fixed pool, so serving a request does not
+# grow the heap.
+import asyncio
+import json
+import time
+
+from diag import boot
+from diag.buffer import Buffer
+from diag.metrics import counter, histogram
+
+REASONS = {
+    200: b"OK",
+    202: b"Accepted",
+    400: b"Bad Request",
+    404: b"Not Found",
+    405: b"Method Not Allowed",
+    413: b"Payload Too Large",
+    503: b"Service Unavailable",
+}
+
+JSON = b"application/json"
+TEXT = b"text/plain"
+KEEP_ALIVE = b"\r\nConnection: keep-alive\r\n\r\n"
+CLOSE = b"\r\nConnection: close\r\n\r\n"
+BUSY = b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0" + CLOSE
+
+_requests = counter(b"http_requests")
+_errors = counter(b"http_errors")  # 4xx/5xx replies
+_handler_us = histogram(b"http_handler_us")
+
+
+class Request:
+    """Per-connection request state, reused for every request on a keep-alive link."""
+
+    def __init__(self, size):
+        self.buf = bytearray(size)
+        self.mv = memoryview(self.buf)
+        self.method = b""
+        self.path = b""
+        self.query = b""
+        self.ctype = b""
+        self.length = 0
+        self.keep_alive = True
+        self.rx_ms = 0  # ticks_ms() when the request line arrived
+
+    @property
+    def body(self):
+        return self.mv[: self.length]
+
+    def json(self):
+        return json.loads(bytes(self.body))
+
+    def arg(self, name, default=None):
+        """Look up a query-string parameter (no percent-decoding)."""
+        for part in self.query.split(b"&"):
+            k, _, v = part.partition(b"=")
+            if k == name:
+                return v
+        return default
+
+
+class _Conn:
+    def __init__(self, req_size, resp_size):
+        self.req = Request(req_size)
+        self.head = Buffer(128)
+        self.resp = Buffer(resp_size)
+
+
+class Server:
+    """
+    Routes map a path (bytes) to (method, handler). A handler gets (req, resp),
+    writes its body into resp and returns (status, content_type).
+
+    Streams are long-lived responses such as SSE. Their handler gets the parsed
+    request and returns an object with an async run(writer); the connection's
+    buffers go back to the pool before run() starts, so open streams don't
+    count against max_conns.
+    """
+
+    def __init__(
+        self,
+        routes,
+        *,
+        streams=None,
+        max_conns=4,
+        req_size=1024,
+        resp_size=1024,
+        idle_s=10,
+    ):
+        self.routes = routes
+        self.streams = streams or {}
+        self.idle_s = idle_s
+        self._pool = [_Conn(req_size, resp_size) for _ in range(max_conns)]
+
+    async def start(self, host="0.0.0.0", port=80):
+        return await asyncio.start_server(self._client, host, port)
+
+    async def _client(self, reader, writer):
+        if not self._pool:
+            writer.write(BUSY)
+            await writer.drain()
+            writer.close()
+            return
+        conn = self._pool.pop()
+        stream = None
+        try:
+            while True:
+                more = await self._serve_one(conn, reader, writer)
+                if more is not True:
+                    stream = more or None
+                    break
+        except (OSError, ValueError, EOFError, asyncio.TimeoutError):
+            pass  # EOFError: IncompleteReadError, a body shorter than its Content-Length
+        finally:
+            self._pool.append(conn)
+        try:
+            if stream is not None:
+                await stream.run(writer)
+        except OSError:
+            pass
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    async def _serve_one(self, conn, reader, writer):
+        req, resp = conn.req, conn.resp
+        line = await asyncio.wait_for(reader.readline(), self.idle_s)
+        if not line:
+            return False
+        req.rx_ms = time.ticks_ms()
+        parts = line.split()
+        if len(parts) != 3:
+            return False
+        req.method = parts[0]
+        req.path, _, req.query = parts[1].partition(b"?")
+        req.keep_alive = parts[2] == b"HTTP/1.1"
+        req.length = 0
+        req.ctype = b""
+
+        while True:
+            h = await reader.readline()
+            if h in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = h.partition(b":")
+            name = name.lower()
+            if name == b"content-length":
+                req.length = int(value)
+            elif name == b"content-type":
+                req.ctype = value.strip()
+            elif name == b"connection":
+                value = value.strip().lower()
+                if value == b"close":
+                    req.keep_alive = False
+                elif value == b"keep-alive":
+                    req.keep_alive = True
+
+        stream = self.streams.get(req.path)
+        if stream is not None and stream[0] == req.method and req.length == 0:
+            return stream[1](req)
+
+        resp.reset()
+        if req.length < 0:
+            # the body can't be framed, so answer and close rather than guess
+            req.length = 0
+            req.keep_alive = False
+            status, ctype = 400, JSON
+            resp.write(b'{"error":"bad content-length"}')
+        elif req.length > len(req.buf):
+            await _discard(reader, req.length)
+            req.length = 0
+            status, ctype = 413, JSON
+            resp.write(b'{"error":"body too large"}')
+        else:
+            await _read_into(reader, req.mv, req.length)
+            t = time.ticks_us()
+            status, ctype = self._dispatch(req, resp)
+            _handler_us.observe(time.ticks_diff(time.ticks_us(), t))
+        _requests.inc()
+        if status >= 400:
+            _errors.inc()
+
+        head = conn.head
+        head.reset()
+        head.write(b"HTTP/1.1 ")
+        head.write_int(status)
+        head.write(b" ")
+        head.write(REASONS.get(status, b""))
+        head.write(b"\r\nContent-Type: ")
+        head.write(ctype)
+        head.write(b"\r\nContent-Length: ")
+        head.write_int(resp.n)
+        head.write(KEEP_ALIVE if req.keep_alive else CLOSE)
+        writer.write(head.view())
+        writer.write(resp.view())
+        await writer.drain()
+        boot.mark(boot.FIRST_REQUEST)
+        return True if req.keep_alive else None
+
+    def _dispatch(self, req, resp):
+        route = self.routes.get(req.path)
+        if route is None:
+            resp.write(b'{"error":"not found"}')
+            return 404, JSON
+        method, handler = route
+        if req.method != method:
+            resp.write(b'{"error":"method not allowed"}')
+            return 405, JSON
+        try:
+            return handler(req, resp)
+        except KeyError as e:
+            error = "missing field %s" % e.args[0]
+        except (ValueError, TypeError) as e:
+            error = str(e)
+        resp.reset()
+        resp.json({"error": error})
+        return 400, JSON
+
+
+async def _read_into(reader, mv, length):
+    got = 0
+    if hasattr(reader, "readinto"):
+        while got < length:
+            n = await reader.readinto(mv[got:length])
+            if not n:
+                raise OSError("connection closed mid-body")
+            got += n
+    elif length:
+        mv[:length] = await reader.readexactly(length)
+
+
+async def _discard(reader, length):
+    while length > 0:
+        chunk = await reader.read(min(length, 256))
+        if not chunk:
+            return
+        length -= len(chunk)
@@ -0,0 +1,54 @@
+# net/packet.py
+# Note datagrams for the UDP transport (net/udp.py). The conductor sends one per
+# note to every device at once, so this format is shared with archive/udpcast.py.
+#
+#   magic b"PN", version (u8), session (u8), flags (u8), seq (u16),
+#   parts (u16 bitmask of the parts that play it), at (u32, conductor ms, masked
+#   to 30 bits), freq_hz (u16), ms (u16), duty (u8, 0..255 for 0.0..1.0)
+#
+# seq counts datagrams within a session and wraps at 2^16. A conductor picks a new
+# session number when it starts, so devices know to forget the old sequence.
+# All fields are little-endian.
+import struct
+
+MAGIC = b"PN"
+VERSION = 1
+FORMAT = "<2sBBBHHIHHB"
+SIZE = 18
+AT = 1  # flag: play at the conductor time in "at" (needs /sync), else on arrival
+ALL_PARTS = 0xFFFF
+MAX_PARTS = 16
+SEQ_MASK = 0xFFFF
+AT_MASK = 0x3FFFFFFF  # keeps "at" a small int on the device
+
+
+def pack(session, seq, freq, ms, *, duty=0.5, at=None, parts=ALL_PARTS) -> bytes:
+    if not 0 < freq <= 65535:
+        raise ValueError("freq out of range")
+    if not 0 < ms <= 65535:
+        raise ValueError("ms out of range")
+    if not 0.0 <= duty <= 1.0:
+        raise ValueError("duty out of range")
+    return struct.pack(
+        FORMAT,
+        MAGIC,
+        VERSION,
+        session & 0xFF,
+        0 if at is None else AT,
+        seq & SEQ_MASK,
+        parts & ALL_PARTS,
+        0 if at is None else at & AT_MASK,
+        int(freq),
+        ms,
+        int(duty * 255 + 0.5),
+    )
+
+
+def unpack(data):
+    """(session, flags, seq, parts, at, freq, ms, duty_0_255), or None if not ours."""
+    if len(data) < SIZE:
+        return None
+    magic, version, *fields = struct.unpack_from(FORMAT, data)
+    if magic != MAGIC or version != VERSION:
+        return None
+    return fields
@@ -0,0 +1,338 @@
+# net/service.py
+# Device Service: the v1.0 API contract from Project.md on top of net.http.
+import asyncio
+import binascii
+import machine
+import time
+
+from diag import boot, metrics
+from net.clock import Clock
+from net.http import Server, JSON, TEXT
+from net.sse import EventHub
+from net.trace import TraceLog
+from net import wire
+from sensing.history import History, MAX_BUCKETS
+
+API_VERSION = b"1.0.0"
+SAMPLE_MS = 50  # how often the cached /sensor value is refreshed
+LUX_FULL_SCALE = 1000  # rough lux at norm == 1.0; only a ballpark figure
+MAX_TONE_MS = 10000
+MAX_NOTES = 64
+MAX_CHORD = 8  # one voice per PWM slice at most
+HISTORY_SLOTS = 8640  # a day at one slot per 10 s (~26 KB)
+HISTORY_DECIMATE = 200  # SAMPLE_MS samples averaged per slot
+HISTORY_UNIT_MS = 100  # timestamp resolution; a one-byte delta spans 25.5 s
+BUCKET_BYTES = 40  # worst-case size of one [t,min,max,mean] entry in a reply
+
+
+def device_id() -> str:
+    return "pico-w-" + binascii.hexlify(machine.unique_id()).decode().upper()
+
+
+class DeviceService:
+    def __init__(
+        self,
+        synth,
+        adc,
+        *,
+        sampler=None,
+        sample_ms=SAMPLE_MS,
+        history=None,
+        udp_part=False,
+        **server_opts
+    ):
+        self.synth = synth
+        self.adc = adc
+        self.sampler = sampler  # if given, read its latest value instead of the ADC
+        self.sample_ms = sample_ms
+        self.device_id = device_id().encode()
+
+        # latest sample, refreshed in the background so /sensor never waits on the ADC
+        self.raw = adc.read_u16()
+        self.sample_ts = 0
+        self.history = history or History(
+            HISTORY_SLOTS, decimate=HISTORY_DECIMATE, ts_unit_ms=HISTORY_UNIT_MS
+        )
+        self.clock = Clock()
+        self.events = EventHub()
+        self.traces = TraceLog()
+        prev = synth.on_start  # e.g. the boot timeline's first-sound mark: keep it
+        note = self.traces.note_started
+        if prev is None:
+            synth.on_start = note
+        else:
+
+            def both(start, now, played):
+                prev(start, now, played)
+                note(start, now, played)
+
+            synth.on_start = both
+        # udp_part: False for HTTP only, else this device's part (None for all) in
+        # notes multicast by the conductor over UDP (net/udp.py)
+        self.notes = None
+        if udp_part is not False:
+            from net.udp import NoteListener
+
+            self.notes = NoteListener(synth, self.clock, part=udp_part)
+
+        self.routes = {
+            b"/health": (b"GET", self.health),
+            b"/sensor": (b"GET", self.sensor),
+            b"/sensor/history": (b"GET", self.sensor_history),
+            b"/status": (b"GET", self.status),
+            b"/tone": (b"POST", self.tone),
+            b"/melody": (b"POST", self.melody),
+            b"/sync": (b"POST", self.sync),
+            b"/metrics": (b"GET", self.metrics),
+            b"/trace": (b"GET", self.trace),
+        }
+        self.streams = {b"/events": (b"GET", self.events.open)}
+        metrics.gauge(b"pwm_writes", self._pwm_writes)
+        metrics.gauge(b"pwm_skipped", self._pwm_skipped)
+        metrics.gauge(b"sse_clients", lambda: len(self.events.clients))
+        server_opts.setdefault("resp_size", 2048)
+        self.server = Server(self.routes, streams=self.streams, **server_opts)
+
+    async def sample(self):
+        while True:
+            self.raw = self.sampler.last if self.sampler else self.adc.read_u16()
+            self.sample_ts = time.ticks_ms()
+            self.history.append(self.raw, self.sample_ts)
+            self.events.publish(self.raw, self.sample_ts)
+            metrics.heap_check()
+            await asyncio.sleep_ms(self.sample_ms)
+
+    async def run(self, host="0.0.0.0", port=80):
+        asyncio.create_task(self.sample())
+        asyncio.create_task(self.synth.run())
+        if self.notes is not None:
+            asyncio.create_task(self.notes.run())
+        await self.server.start(host, port)
+        boot.mark(boot.SERVICE)
+        print("Device service listening on port", port)
+        while True:
+            await asyncio.sleep_ms(60000)
+
+    # ---------- Handlers ----------
+    def health(self, req, resp):
+        resp.write(b"{")
+        self._write_health(resp)
+        resp.write(b"}")
+        return 200, JSON
+
+    def sensor(self, req, resp):
+        resp.write(b"{")
+        self._write_sensor(resp)
+        resp.write(b"}")
+        return 200, JSON
+
+    def sensor_history(self, req, resp):
+        """
+        GET /sensor/history?since=&step= -> min/max/mean of the raw value per step ms.
+        since is a device ticks_ms value (as in "now"), or negative for "ms ago".
+        The step is widened if the range would not fit in one reply.
+        """
+        now = time.ticks_ms()
+        since = int(req.arg(b"since", b"-60000"))
+        step = max(1, int(req.arg(b"step", b"1000")))
+        if since < 0:
+            since = time.ticks_add(now, since)
+        span = time.ticks_diff(now, since)
+        if span < 0:
+            raise ValueError("since is in the future")
+        fit = min(MAX_BUCKETS, (len(resp.buf) - 96) // BUCKET_BYTES)
+        if span // step >= fit:
+            step = span // fit + 1
+
+        resp.write(b'{"now":')
+        resp.write_int(now)
+        resp.write(b',"step":')
+        resp.write_int(step)
+        resp.write(b',"buckets":[')
+        first = True
+
+        def emit(ts, lo, hi, mean):
+            nonlocal first
+            resp.write(b"[" if first else b",[")
+            first = False
+            resp.write_int(ts)
+            resp.write(b",")
+            resp.write_int(lo)
+            resp.write(b",")
+            resp.write_int(hi)
+            resp.write(b",")
+            resp.write_int(mean)
+            resp.write(b"]")
+
+        self.history.query(since, step, emit)
+        resp.write(b"]}")
+        return 200, JSON
+
+    def status(self, req, resp):
+        """/health and /sensor in one reply, so a dashboard polls with one request."""
+        resp.write(b"{")
+        self._write_health(resp)
+        resp.write(b",")
+        self._write_sensor(resp)
+        resp.write(b"}")
+        return 200, JSON
+
+    def _write_health(self, resp):
+        resp.write(b'"status":"ok","device_id":"')
+        resp.write(self.device_id)
+        resp.write(b'","api":"')
+        resp.write(API_VERSION)
+        resp.write(b'"')
+
+    def _write_sensor(self, resp):
+        raw = self.raw
+        bright = 65535 - raw  # higher raw = darker with this wiring
+        resp.write(b'"raw":')
+        resp.write_int(raw)
+        resp.write(b',"norm":')
+        resp.write_fixed(bright * 1000 // 65535, 3)
+        resp.write(b',"lux_est":')
+        resp.write_fixed(bright * LUX_FULL_SCALE * 10 // 65535, 1)
+
+    def tone(self, req, resp):
+        # JSON by default, or the binary layout of net/wire.py by Content-Type
+        if req.ctype == wire.CTYPE:
+            freq, ms, duty, at, trace_id, sent = wire.decode_tone(req.body)
+            freqs = (freq,)
+        else:
+            body = req.json()
+            ms = int(body["ms"])
+            duty = float(body.get("duty", 0.5))
+            freqs = _chord(body["freq"])
+            at, trace_id, sent = body.get("at"), body.get("trace"), body.get("sent")
+        parsed = time.ticks_ms()
+        events = []
+        for freq in freqs:
+            _check_note(freq, ms, duty)
+            events.append((freq, duty, 0, ms))
+        at = self._start_at(at, parsed)
+        self.synth.play_hz(events, at=at)
+        self._trace(req, trace_id, sent, parsed, at)
+        resp.write(b'{"playing":true,"until_ms_from_now":')
+        resp.write_int(ms)
+        resp.write(b"}")
+        return 202, JSON
+
+    def melody(self, req, resp):
+        if req.ctype == wire.CTYPE:
+            events, at, trace_id, sent, append = wire.decode_melody(req.body)
+            if not 0 < len(events) <= MAX_NOTES * MAX_CHORD:
+                raise ValueError("need 1..%d notes" % (MAX_NOTES * MAX_CHORD))
+        else:
+            events, at, trace_id, sent, append = _melody_json(req.json())
+        parsed = time.ticks_ms()
+        for freq, duty, _start, ms in events:
+            _check_note(freq, ms, duty)
+        at = self._start_at(at, parsed)
+        queued = self.synth.play_hz(events, at=at, append=append)
+        self._trace(req, trace_id, sent, parsed, at)
+        resp.write(b'{"queued":')
+        resp.write_int(queued)
+        resp.write(b"}")
+        return 202, JSON
+
+    def metrics(self, req, resp):
+        metrics.render(resp)
+        return 200, TEXT
+
+    def trace(self, req, resp):
+        """GET /trace?since=<id> -> stage latencies of traced /tone and /melody calls."""
+        self.traces.write_json(resp, int(req.arg(b"since", b"-1")))
+        return 200, JSON
+
+    def _trace(self, req, trace_id, sent, parsed, due):
+        """Log a request that carries a "trace" id; its first note is due at due."""
+        if trace_id is None:
+            return
+        net_ms = None
+        if sent is not None and self.clock.synced:
+            net_ms = time.ticks_diff(req.rx_ms, self.clock.to_local(int(sent)))
+        self.traces.add(int(trace_id), net_ms, req.rx_ms, parsed, due)
+
+    def _pwm_writes(self):
+        return sum(v.pwm.writes for v in self.synth.voices)
+
+    def _pwm_skipped(self):
+        return sum(v.pwm.skipped for v in self.synth.voices)
+
+    def sync(self, req, resp):
+        """
+        NTP-style ping. The conductor sends its clock as t0 and, from the second
+        round on, the four timestamps of the previous round as "prev".
+        """
+        body = req.json()
+        prev = body.get("prev")
+        if prev:
+            self.clock.add_sample(*prev)
+        resp.write(b'{"t0":')
+        resp.write_int(int(body["t0"]))
+        resp.write(b',"t1":')
+        resp.write_int(req.rx_ms)
+        resp.write(b',"offset_ms":')
+        if self.clock.synced:
+            resp.write_int(self.clock.offset_ms)
+            resp.write(b',"delay_ms":')
+            resp.write_int(self.clock.delay_ms)
+        else:
+            resp.write(b"null")
+        resp.write(b',"t2":')
+        resp.write_int(time.ticks_ms())
+        resp.write(b"}")
+        return 200, JSON
+
+    def _start_at(self, conductor_ms, now):
+        """Local start tick for an optional absolute conductor timestamp, else now."""
+        if conductor_ms is None:
+            return now
+        return self.clock.to_local(int(conductor_ms))
+
+
+def _melody_json(body):
+    """A JSON /melody body as (events, at, trace, sent, append), like decode_melody()."""
+    notes = body["notes"]
+    gap = int(body.get("gap_ms", 0))
+    if not 0 < len(notes) <= MAX_NOTES:
+        raise ValueError("need 1..%d notes" % MAX_NOTES)
+    if gap < 0:
+        raise ValueError("gap_ms must be >= 0")
+    # notes either follow each other with gap_ms, or carry absolute conductor
+    # timestamps ("at") that are converted to this device's clock
+    first_at = notes[0].get("at")
+    events = []
+    t = 0
+    for note in notes:
+        ms = int(note["ms"])
+        duty = float(note.get("duty", 0.5))
+        if first_at is not None:
+            # the same rule as wire.encode_melody(), so both encodings agree
+            t = int(note["at"]) - first_at
+            if t < 0:
+                raise ValueError("melody notes must be in order of their at times")
+        for freq in _chord(note["freq"]):
+            events.append((freq, duty, t, ms))
+        t += ms + gap
+    append = bool(body.get("append"))
+    return events, first_at, body.get("trace"), body.get("sent"), append
+
+
+def _chord(freq):
+    """A "freq" field is one frequency or a list of them sounding together."""
+    if not isinstance(freq, list):
+        return (float(freq),)
+    if not 0 < len(freq) <= MAX_CHORD:
+        raise ValueError("need 1..%d freqs per chord" % MAX_CHORD)
+    return [float(f) for f in freq]
+
+
+def _check_note(freq, ms, duty):
+    if freq <= 0:
+        raise ValueError("freq must be > 0")
+    if not 0 < ms <= MAX_TONE_MS:
+        raise ValueError("ms must be in 1..%d" % MAX_TONE_MS)
+    if not 0.0 <= duty <= 1.0:
+        raise ValueError("duty must be in 0.0..1.0")
@@ -0,0 +1,132 @@
+# net/sse.py
+# Server-Sent Events for GET /events. The service's sampling task publishes each
+# sample once; every connected client is just woken up and sends the latest value
+# if it is due, so viewers never cost extra ADC reads or queue up old samples.
+import asyncio
+import time
+
+from diag.buffer import Buffer
+from net.http import BUSY, CLOSE
+
+MAX_CLIENTS = 8
+RATE_MS = 200  # default minimum time between events to one client
+EPS = 0.01  # default: skip an event unless norm moved by more than this
+HEARTBEAT_MS = 15000  # write at least this often, so a closed link is noticed
+BAD_ARG = (
+    b"HTTP/1.1 400 Bad Request\r\nContent-Type: application/json\r\n"
+    b"Content-Length: 30" + CLOSE + b'{"error":"bad rate_ms or eps"}'
+)
+
+HEADERS = (
+    b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+    b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n"
+)
+
+
+class EventHub:
+    def __init__(self, *, max_clients=MAX_CLIENTS, heartbeat_ms=HEARTBEAT_MS):
+        self.max_clients = max_clients
+        self.heartbeat_ms = heartbeat_ms
+        self.clients = []
+        # latest sample as integers: norm in thousandths, raw ADC value, ticks_ms
+        self.norm = 0
+        self.raw = 0
+        self.ts = 0
+        self.seq = 0  # bumps on every publish, so clients can tell a new sample arrived
+
+    def publish(self, raw, ts):
+        """Called by the sampler for every sample. O(clients), no allocation."""
+        self.raw = raw
+        self.norm = (65535 - raw) * 1000 // 65535  # brighter -> higher, like /sensor
+        self.ts = ts
+        self.seq += 1
+        for c in self.clients:
+            c.wake.set()
+
+    def open(self, req):
+        """Stream handler for the HTTP server: one _Client per viewer."""
+        if len(self.clients) >= self.max_clients:
+            return _Refuse(BUSY)
+        try:
+            rate_ms = req.arg(b"rate_ms")
+            rate_ms = RATE_MS if rate_ms is None else max(0, int(rate_ms))
+            eps = req.arg(b"eps")
+            eps = EPS if eps is None else float(eps)
+        except ValueError:
+            return _Refuse(BAD_ARG)
+        return _Client(self, rate_ms, int(eps * 1000))
+
+
+class _Refuse:
+    def __init__(self, reply):
+        self.reply = reply
+
+    async def run(self, writer):
+        writer.write(self.reply)
+        await writer.drain()
+
+
+class _Client:
+    def __init__(self, hub, rate_ms, eps_milli):
+        self.hub = hub
+        self.rate_ms = rate_ms
+        self.eps = eps_milli
+        self.wake = asyncio.Event()
+        self.out = Buffer(80)
+        self.sent_norm = None
+        self.sent_ms = 0
+        self.sent_seq = 0
+        self.written_ms = 0  # last write of any kind, data or ping
+
+    async def run(self, writer):
+        hub = self.hub
+        hub.clients.append(self)
+        try:
+            writer.write(HEADERS)
+            await writer.drain()
+            self.sent_ms = self.written_ms = time.ticks_ms()
+            beat = hub.heartbeat_ms
+            while True:
+                try:
+                    await asyncio.wait_for(self.wake.wait(), beat / 1000)
+                    self.wake.clear()
+                except asyncio.TimeoutError:
+                    pass
+                # samples wake us constantly, but the eps filter may hold every one
+                # back: ping by the time since the last write, not on a timeout
+                if time.ticks_diff(time.ticks_ms(), self.written_ms) >= beat:
+                    writer.write(b": ping\n\n")
+                    await writer.drain()
+                    self.written_ms = time.ticks_ms()
+
+                # rate limit: sleep out the rest of the interval, then send whatever
+                # is newest by then. Samples published meanwhile are coalesced.
+                wait = self.rate_ms - time.ticks_diff(time.ticks_ms(), self.sent_ms)
+                if wait > 0:
+                    await asyncio.sleep_ms(wait)
+
+                norm = hub.norm
+                if hub.seq == self.sent_seq:
+                    continue
+                if self.sent_norm is not None and abs(norm - self.sent_norm) <= self.eps:
+                    continue
+                self._format(norm, hub.raw, hub.ts)
+                writer.write(self.out.view())
+                # a slow client blocks here alone; the hub keeps publishing
+                await writer.drain()
+                self.sent_norm = norm
+                self.sent_seq = hub.seq
+                self.sent_ms = self.written_ms = time.ticks_ms()
+        finally:
+            hub.clients.remove(self)
+
+    def _format(self, norm, raw, ts):
+        out = self.out
+        out.reset()
+        out.write(b'data: {"norm": ')
+        out.write_fixed(norm, 3)
+        out.write(b', "raw": ')
+        out.write_int(raw)
+        out.write(b', "ts": ')
+        out.write_int(ts)
+        out.write(b"}\n\n")
@@ -0,0 +1,89 @@
+# net/trace.py
+# Per-request latency tracing for /tone and /melody. A request that carries a
+# "trace" id (and, once /sync has run, the conductor's "sent" time) gets a slot
+# in a fixed ring recording when it arrived, when its JSON was parsed, when its
+# first note was due and when that note actually started. GET /trace hands the
+# stage durations back to the conductor.
+import time
+from array import array
+
+CAPACITY = 32
+PAGE = 16  # records per /trace reply, ~70 bytes each
+NONE = -(1 << 29)  # "not known (yet)" in the stage arrays
+
+
+class TraceLog:
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.ids = array("i", bytes(4 * capacity))
+        self.net = array("i", bytes(4 * capacity))  # conductor send -> request line
+        self.rx = array("i", bytes(4 * capacity))  # ticks_ms of each stage
+        self.parsed = array("i", bytes(4 * capacity))
+        self.due = array("i", bytes(4 * capacity))
+        self.onset = array("i", bytes(4 * capacity))
+        self.dropped = bytearray(capacity)  # 1: the note was over before it could start
+        self.head = 0
+        self.count = 0
+
+    def add(self, trace_id, net_ms, rx, parsed, due):
+        i = self.head
+        self.ids[i] = trace_id & 0x3FFFFFFF
+        self.net[i] = NONE if net_ms is None else net_ms
+        self.rx[i] = rx
+        self.parsed[i] = parsed
+        self.due[i] = due
+        self.onset[i] = NONE
+        self.dropped[i] = 0
+        self.head = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def note_started(self, due, now, played=True):
+        """
+        Synth.on_start hook: the note scheduled for `due` started at `now`, or was
+        skipped then (played False) because it would already have ended.
+        """
+        for i in range(self.count):
+            if self.onset[i] == NONE and self.due[i] == due:
+                self.onset[i] = now
+                self.dropped[i] = 0 if played else 1
+                return
+
+    def write_json(self, out, since=-1, limit=PAGE):
+        """
+        {"traces":[...]} for up to limit records with an id above since, oldest
+        first. Ask again with the last id returned to page through the rest.
+        """
+        out.write(b'{"traces":[')
+        first = True
+        i = (self.head - self.count) % self.capacity
+        for _ in range(self.count):
+            if self.ids[i] > since and limit > 0:
+                limit -= 1
+                out.write(b"{" if first else b",{")
+                first = False
+                self._write_one(out, i)
+                out.write(b"}")
+            i = (i + 1) % self.capacity
+        out.write(b"]}")
+
+    def _write_one(self, out, i):
+        out.write(b'"id":')
+        out.write_int(self.ids[i])
+        out.write(b',"net_ms":')
+        _write_opt(out, self.net[i])
+        out.write(b',"parse_ms":')
+        out.write_int(time.ticks_diff(self.parsed[i], self.rx[i]))
+        out.write(b',"wait_ms":')
+        out.write_int(time.ticks_diff(self.due[i], self.parsed[i]))
+        out.write(b',"late_ms":')
+        onset = self.onset[i]
+        _write_opt(out, NONE if onset == NONE else time.ticks_diff(onset, self.due[i]))
+        out.write(b',"dropped":true' if self.dropped[i] else b',"dropped":false')
+
+
+def _write_opt(out, v):
+    if v == NONE:
+        out.write(b"null")
+    else:
+        out.write_int(v)
@@ -0,0 +1,105 @@
+# net/udp.py
+# Optional UDP transport next to the HTTP API: the conductor multicasts (or
+# broadcasts) one datagram per note (format in net/packet.py) and every device
+# hears it at once. Each device plays only the notes of its own part, and drops
+# datagrams that are duplicates, older than the last one it accepted, or too
+# late to sound.
+import asyncio
+import socket
+import time
+
+from diag import metrics
+from net.packet import AT, SEQ_MASK, SIZE, unpack
+from net.service import MAX_TONE_MS
+
+PORT = 5005
+GROUP = "239.5.5.5"  # administratively scoped multicast; broadcasts work too
+POLL_MS = 2  # how often the socket is polled when idle
+
+
+class NoteListener:
+    """
+    Feeds note datagrams into a Synth. part is this device's part number (0..15)
+    or None to play every part. Scheduled notes need the clock synced via /sync.
+    """
+
+    def __init__(self, synth, clock, *, part=None, port=PORT, group=GROUP):
+        self.synth = synth
+        self.clock = clock
+        self.mask = 0xFFFF if part is None else 1 << part
+        self.port = port
+        self.group = group
+        self.session = None
+        self.last = 0
+        self.received = metrics.counter(b"udp_packets")
+        # bad, out of range, duplicate or out of order
+        self.dropped = metrics.counter(b"udp_dropped")
+        self.late = metrics.counter(b"udp_late")  # arrived after the note should end
+
+    async def run(self):
+        sock = open_socket(self.port, self.group)
+        while True:
+            try:
+                # recv() allocates a small bytes object per datagram, but works the
+                # same on MicroPython and CPython (which has no readinto for sockets)
+                data = sock.recv(SIZE + 14)
+            except OSError:
+                await asyncio.sleep_ms(POLL_MS)
+                continue
+            self.handle(data, time.ticks_ms())
+            await asyncio.sleep_ms(0)  # a steady stream mustn't starve the other tasks
+
+    def handle(self, data, now):
+        """Act on one datagram that arrived at ticks_ms() now. True if it was played."""
+        fields = unpack(data)
+        self.received.inc()
+        if fields is None:
+            self.dropped.inc()
+            return False
+        session, flags, seq, parts, at, freq, ms, duty = fields
+        if freq == 0 or not 0 < ms <= MAX_TONE_MS:
+            # the limits POST /tone has; duty (0..255) is always in range
+            self.dropped.inc()
+            return False
+        if session != self.session:
+            # a (re)started conductor: take its sequence from here
+            self.session = session
+            self.last = (seq - 1) & SEQ_MASK
+        d = (seq - self.last) & SEQ_MASK
+        if d == 0 or d > SEQ_MASK >> 1:
+            self.dropped.inc()
+            return False
+        self.last = seq
+        if not parts & self.mask:
+            return False  # another device's part
+        if flags & AT:
+            if not self.clock.synced:
+                self.dropped.inc()
+                return False
+            start = self.clock.to_local(at)
+            if time.ticks_diff(now, time.ticks_add(start, ms)) >= 0:
+                self.late.inc()
+                return False
+        else:
+            start = now
+        # appended, so the notes of a chord, or notes sent ahead, don't cancel each other
+        self.synth.play_hz([(freq, duty / 255, 0, ms)], at=start, append=True)
+        return True
+
+
+def open_socket(port=PORT, group=GROUP):
+    """Non-blocking UDP socket on port, joined to the multicast group if supported."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(socket.getaddrinfo("0.0.0.0", port)[0][-1])
+    join = getattr(socket, "IP_ADD_MEMBERSHIP", None)
+    if group and join is not None:
+        # not every port has IGMP; without it the device still gets broadcasts
+        mreq = _ip(group) + _ip("0.0.0.0")
+        sock.setsockopt(getattr(socket, "IPPROTO_IP", 0), join, mreq)
+    sock.setblocking(False)
+    return sock
+
+
+def _ip(addr):
+    return bytes(int(x) for x in addr.split("."))
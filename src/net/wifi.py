@@ -0,0 +1,131 @@
+# net/wifi.py
+# Background Wi-Fi for the fast boot path. connect() is started and then polled
+# from an asyncio task, never waited on, so the synth and sensor are running
+# while the radio associates. Failed attempts back off exponentially and a
+# dropped link is reconnected the same way. The BSSID and channel of the access
+# point are cached in flash after the first connection, so later boots join
+# that AP directly instead of leaving the driver to find it.
+import asyncio
+import binascii
+import json
+import time
+
+from diag import boot, metrics
+
+CONFIG = "wifi_config.json"  # {"ssid", "passw"}, as in examples/internet_connect.py
+CACHE = "wifi_cache.json"  # {"ssid", "bssid" (hex), "channel"} of the last good AP
+CONNECT_MS = 10000  # give up on an attempt after this long
+POLL_MS = 100  # status poll while connecting
+CHECK_MS = 1000  # link check once connected
+BACKOFF_MS = 1000  # wait after the first failed attempt, doubling...
+BACKOFF_MAX_MS = 30000  # ...up to this
+
+
+class WiFi:
+    """
+    create_task(wifi.run()) and carry on; await wait() where the network is
+    needed. wlan defaults to network.WLAN(STA_IF), imported on first run().
+    """
+
+    def __init__(self, ssid, password, *, wlan=None, cache=CACHE):
+        self.ssid = ssid
+        self.password = password
+        self.wlan = wlan
+        self.cache = cache
+        self.bssid = None  # bytes, once known
+        self.channel = None
+        self.connected = False
+        self.attempts = metrics.counter(b"wifi_attempts")
+        self.reconnects = metrics.counter(b"wifi_reconnects")
+        self._load()
+
+    @classmethod
+    def from_config(cls, path=CONFIG, **kwargs):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["ssid"], data["passw"], **kwargs)
+
+    def ip(self):
+        return self.wlan.ifconfig()[0] if self.connected else None
+
+    async def wait(self):
+        """Return once connected."""
+        while not self.connected:
+            await asyncio.sleep_ms(POLL_MS)
+
+    async def run(self):
+        """asyncio task: connect, with backoff, and stay connected."""
+        if self.wlan is None:
+            import network
+
+            self.wlan = network.WLAN(network.STA_IF)
+        wlan = self.wlan
+        wlan.active(True)
+        delay = BACKOFF_MS
+        while True:
+            if not await self._attempt():
+                await asyncio.sleep_ms(delay)
+                delay = min(delay * 2, BACKOFF_MAX_MS)
+                continue
+            delay = BACKOFF_MS
+            self.connected = True
+            boot.mark(boot.WIFI)
+            if self.bssid is None:
+                self._learn()
+            while wlan.isconnected():
+                await asyncio.sleep_ms(CHECK_MS)
+            self.connected = False
+            self.reconnects.inc()
+
+    async def _attempt(self) -> bool:
+        wlan = self.wlan
+        self.attempts.inc()
+        if self.bssid is not None:
+            wlan.connect(self.ssid, self.password, bssid=self.bssid)
+        else:
+            wlan.connect(self.ssid, self.password)
+        t0 = time.ticks_ms()
+        while time.ticks_diff(time.ticks_ms(), t0) < CONNECT_MS:
+            if wlan.isconnected():
+                return True
+            if wlan.status() < 0:
+                break  # wrong password, no such network, ...: no point waiting
+            await asyncio.sleep_ms(POLL_MS)
+        wlan.disconnect()
+        if self.bssid is not None:
+            # the AP may have been replaced or moved: let the driver choose again
+            self.bssid = self.channel = None
+        return False
+
+    def _learn(self):
+        """Remember the strongest AP with our SSID (one scan, on the first boot only)."""
+        best = None
+        ssid = self.ssid.encode()
+        for ap in self.wlan.scan():  # (ssid, bssid, channel, rssi, security, hidden)
+            if ap[0] == ssid and (best is None or ap[3] > best[3]):
+                best = ap
+        if best is None:
+            return
+        self.bssid, self.channel = bytes(best[1]), best[2]
+        try:
+            with open(self.cache, "w") as f:
+                json.dump(
+                    {
+                        "ssid": self.ssid,
+                        "bssid": binascii.hexlify(self.bssid).decode(),
+                        "channel": self.channel,
+                    },
+                    f,
+                )
+        except OSError:
+            pass  # read-only filesystem: it just isn't cached
+
+    def _load(self):
+        try:
+            with open(self.cache) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("ssid") == self.ssid:
+            self.bssid = binascii.unhexlify(data["bssid"])
+            self.channel = data.get("channel")
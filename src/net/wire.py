@@ -0,0 +1,145 @@
+# net/wire.py
+# Binary bodies for POST /tone and /melody, sent with Content-Type CTYPE instead
+# of JSON. The device decodes them straight out of the request buffer with
+# struct.unpack_from(), with no JSON parser, dicts or strings involved. The
+# encoders run on the conductor, which imports this module too.
+#
+#   /tone:   version (u8), flags (u8), freq_hz (u16), ms (u16), duty (u16,
+#            65535 = 1.0), at (u32), trace (u32), sent (u32)          20 bytes
+#   /melody: version (u8), flags (u8), count (u16), at (u32), trace (u32),
+#            sent (u32)                                               16 bytes
+#            then count notes: start_ms (u32, from the first note), freq_hz
+#            (u16), ms (u16), duty (u16)                        10 bytes each
+#
+# at, trace and sent mean the same as the JSON fields and are only valid with
+# their flag set; notes of a chord share a start_ms. All fields little-endian.
+# Notes are sent in time order, so start_ms is never negative.
+import struct
+
+CTYPE = b"application/x-pico-notes"
+VERSION = 1
+TONE = "<BBHHHIII"
+TONE_SIZE = 20
+MELODY = "<BBHIII"
+MELODY_SIZE = 16
+NOTE = "<IHHH"
+NOTE_SIZE = 10
+
+AT = 1  # flags
+TRACE = 2
+APPEND = 4
+SENT = 8  # sent is only meaningful with TRACE as well
+DUTY_FULL = 65535
+MASK = 0x3FFFFFFF  # times and ids are sent as 30-bit values, small ints on the device
+
+
+def decode_tone(buf):
+    """(freq, ms, duty, at, trace, sent) from a /tone body; absent fields are None."""
+    if len(buf) != TONE_SIZE:
+        raise ValueError("tone body must be %d bytes" % TONE_SIZE)
+    version, flags, freq, ms, duty, at, trace, sent = struct.unpack_from(TONE, buf)
+    _check_version(version)
+    at, trace, sent = _optional(flags, at, trace, sent)
+    return freq, ms, duty / DUTY_FULL, at, trace, sent
+
+
+def decode_melody(buf):
+    """
+    (events, at, trace, sent, append) from a /melody body, events being the
+    (freq, duty, start_ms, ms) tuples that Synth.play_hz() takes.
+    """
+    if len(buf) < MELODY_SIZE:
+        raise ValueError("melody body too short")
+    version, flags, count, at, trace, sent = struct.unpack_from(MELODY, buf)
+    _check_version(version)
+    if len(buf) != MELODY_SIZE + count * NOTE_SIZE:
+        raise ValueError("melody body does not match its note count")
+    events = []
+    off = MELODY_SIZE
+    for _ in range(count):
+        start, freq, ms, duty = struct.unpack_from(NOTE, buf, off)
+        events.append((freq, duty / DUTY_FULL, start, ms))
+        off += NOTE_SIZE
+    at, trace, sent = _optional(flags, at, trace, sent)
+    return events, at, trace, sent, bool(flags & APPEND)
+
+
+def _check_version(version):
+    if version != VERSION:
+        raise ValueError("unsupported body version %d" % version)
+
+
+def _optional(flags, at, trace, sent):
+    if not flags & AT:
+        at = None
+    if not flags & TRACE:
+        trace = None
+    if not flags & TRACE or not flags & SENT:
+        sent = None
+    return at, trace, sent
+
+
+# ---------- Encoders (conductor side) ----------
+def encode_tone(payload) -> bytes:
+    """A /tone JSON payload ({"freq", "ms", "duty", "at", "trace", "sent"}) as binary."""
+    if isinstance(payload["freq"], (list, tuple)):
+        raise ValueError("binary /tone takes one freq; send chords to /melody")
+    flags, at, trace, sent = _header_fields(payload, payload.get("at"))
+    return struct.pack(
+        TONE,
+        VERSION,
+        flags,
+        round(payload["freq"]),
+        payload["ms"],
+        _duty(payload.get("duty", 0.5)),
+        at,
+        trace,
+        sent,
+    )
+
+
+def encode_melody(payload) -> bytes:
+    """A /melody JSON payload (notes with gap_ms or with "at" times) as binary."""
+    notes = payload["notes"]
+    first_at = notes[0].get("at") if notes else None
+    gap = payload.get("gap_ms", 0)
+    body = bytearray()
+    t = 0
+    count = 0
+    for note in notes:
+        if first_at is not None:
+            t = note["at"] - first_at
+            if t < 0:
+                raise ValueError("melody notes must be in order of their at times")
+        freqs = note["freq"]
+        duty = _duty(note.get("duty", 0.5))
+        for f in freqs if isinstance(freqs, (list, tuple)) else (freqs,):
+            body += struct.pack(NOTE, t, round(f), note["ms"], duty)
+            count += 1
+        t += note["ms"] + gap
+    flags, at, trace, sent = _header_fields(payload, first_at)
+    if payload.get("append"):
+        flags |= APPEND
+    return struct.pack(MELODY, VERSION, flags, count, at, trace, sent) + body
+
+
+def _header_fields(payload, at):
+    flags = 0
+    if at is not None:
+        flags |= AT
+    if "trace" in payload:
+        flags |= TRACE
+    if "sent" in payload:
+        flags |= SENT
+    return (
+        flags,
+        (at or 0) & MASK,
+        payload.get("trace", 0) & MASK,
+        payload.get("sent", 0) & MASK,
+    )
+
+
+def _duty(duty):
+    if not 0.0 <= duty <= 1.0:
+        raise ValueError("duty must be in 0.0..1.0")
+    return round(duty * DUTY_FULL)
@@ -0,0 +1,133 @@
+# sensing/calibrate.py
+# Streaming auto-calibration of the light sensor. A 64-bin histogram of recent
+# brightness, with old samples fading out, gives the ambient level and the
+# darkest/brightest recent readings. Dark/bright thresholds and hysteresis are
+# derived from those instead of being hand-tuned, so they follow the room
+# lighting. Memory is fixed and the work per sample is bounded.
+from array import array
+
+from dsp.filters import FULL, to_u16
+
+BINS = 64
+SHIFT = 10  # 65536 >> 10 = 64 bins of 1024 counts
+HALF_LIFE = 3000  # samples (30 s at 100 Hz) for a reading's weight to halve
+MIN_SAMPLES = 100  # until then the thresholds stay at their defaults
+REFRESH = 50  # samples between threshold updates
+DARK_PCT = 50  # "covered" means at most this % of ambient brightness...
+MIN_HYST = to_u16(0.02)  # ...and uncovered again this much above the threshold
+MIN_SPAN = to_u16(0.25)  # normalize() never stretches a narrower range than this
+
+
+class Calibrator:
+    """
+    Feed every raw sample to update() (or a buffer to process()); it returns the
+    sample as brightness, 0..FULL with higher = brighter. invert=True is for
+    wiring where a higher raw value is darker.
+
+    After warm-up, and then every REFRESH samples:
+      ambient  median brightness (the sensor is uncovered most of the time)
+      floor    2nd percentile: the covered level once taps have been seen
+      top      98th percentile; floor..top is widened to at least MIN_SPAN
+      dark     below this is covered: halfway from ambient to floor if the floor
+               is clearly dark, else DARK_PCT % of ambient
+      light    dark plus a hysteresis sized from the ambient noise (the
+               interquartile range), so a covered reading must clear it
+    """
+
+    def __init__(self, *, invert=False, dark=FULL // 2, half_life=HALF_LIFE):
+        self.invert = invert
+        self.counts = array("I", bytes(4 * BINS))
+        self.total = 0
+        self.seen = 0  # samples so far, up to MIN_SAMPLES
+        self.decay_every = max(1, half_life // BINS)
+        self._tick = 0
+        self._bin = 0  # next bin to halve
+        self._refresh = 0
+
+        self.ambient = FULL
+        self.floor = 0
+        self.top = FULL
+        self.dark = dark
+        self.hyst = MIN_HYST
+        self.light = dark + MIN_HYST
+
+    @property
+    def ready(self) -> bool:
+        return self.seen >= MIN_SAMPLES
+
+    def update(self, raw) -> int:
+        x = FULL - raw if self.invert else raw
+        self.counts[x >> SHIFT] += 1
+        self.total += 1
+
+        # fade old samples: one bin is halved every decay_every samples, so each
+        # bin is halved once per half_life samples at a fixed cost per sample
+        self._tick += 1
+        if self._tick >= self.decay_every:
+            self._tick = 0
+            i = self._bin
+            c = self.counts[i]
+            self.counts[i] = c >> 1
+            self.total -= c - (c >> 1)
+            self._bin = (i + 1) & (BINS - 1)
+
+        if self.seen < MIN_SAMPLES:
+            self.seen += 1
+        self._refresh += 1
+        if self._refresh >= REFRESH:
+            self._refresh = 0
+            if self.seen >= MIN_SAMPLES:
+                self._derive()
+        return x
+
+    def process(self, buf, n=None) -> int:
+        """update() every sample of buf; returns the last brightness."""
+        if n is None:
+            n = len(buf)
+        x = 0
+        for k in range(n):
+            x = self.update(buf[k])
+        return x
+
+    def quantile(self, pct) -> int:
+        """Brightness below which pct % of recent samples fall, interpolated in-bin."""
+        target = self.total * pct // 100
+        acc = 0
+        for i in range(BINS):
+            c = self.counts[i]
+            if acc + c > target:
+                return (i << SHIFT) + ((target - acc) << SHIFT) // c
+            acc += c
+        return FULL
+
+    def normalize(self, x) -> int:
+        """Brightness x rescaled so floor..top covers 0..FULL (clamped)."""
+        if x <= self.floor:
+            return 0
+        if x >= self.top:
+            return FULL
+        # both factors stay below 2**16 and 2**11, so this is small-int arithmetic
+        return (x - self.floor) * 1024 // (self.top - self.floor) * FULL >> 10
+
+    def _derive(self):
+        amb = self.quantile(50)
+        floor = self.quantile(2)
+        half = amb * DARK_PCT // 100
+        dark = (amb + floor) >> 1 if floor < half else half
+        hyst = self.quantile(75) - self.quantile(25)
+        if hyst < MIN_HYST:
+            hyst = MIN_HYST
+        if hyst > (amb - dark) >> 1:
+            hyst = max(1, (amb - dark) >> 1)
+        top = self.quantile(98)
+        if top - floor < MIN_SPAN:
+            # steady light: don't blow sensor noise up to the full range
+            mid = (top + floor) >> 1
+            floor = max(0, mid - (MIN_SPAN >> 1))
+            top = min(FULL, floor + MIN_SPAN)
+        self.ambient = amb
+        self.floor = floor
+        self.top = top
+        self.dark = dark
+        self.hyst = hyst
+        self.light = dark + hyst
@@ -0,0 +1,167 @@
+# sensing/gestures.py
+# Gesture recognizer over the timestamped sample stream: covering the sensor
+# with a finger gives taps, double-taps and long holds, waving a hand over it
+# without covering it gives wiggles. It is a state machine stepped once per
+# sample, a fixed amount of integer work with no allocation. Every decision
+# uses the samples' own timestamps, so events come out at the right time
+# however late the loop reads them.
+import time
+from array import array
+
+from dsp.filters import MotionWindow, to_u16
+
+NONE = 0
+TAP = 1
+DOUBLE_TAP = 2
+HOLD = 3
+WIGGLE = 4
+NAMES = ("none", "tap", "double-tap", "hold", "wiggle")
+
+TAP_MAX_MS = 250  # covered for at most this long counts as a tap
+DOUBLE_GAP_MS = 300  # the second tap must start this soon after the first ends
+HOLD_MS = 800  # covered this long is a hold, reported while still covered
+HYST = to_u16(0.04)  # uncovering needs raw this far above the dark threshold
+MOTION_WINDOW = 20  # samples, as in maintestfinal.py (200 ms at 100 Hz)
+WIGGLE_THRESH = to_u16(0.06)  # mean |delta| over the window above this => wiggle
+QUEUE = 8  # events held until pop()ped; older ones are dropped when full
+
+# states
+_IDLE = 0  # uncovered
+_DOWN = 1  # covered, maybe a tap or the start of a hold
+_GAP = 2  # one tap ended, waiting to see if a second one starts
+_RELEASE = 3  # reported a hold or double-tap, waiting to be uncovered
+
+
+class Gestures:
+    """
+    Feed every sample with update(raw, t_us) (or a whole Sampler with feed()),
+    then pop() the recognised events. raw below dark means covered. Given a
+    sensing.calibrate.Calibrator instead, every sample also goes through it and
+    its current dark/light thresholds are used.
+
+    Detection latency is bounded: a double-tap is reported on the first covered
+    sample of the second tap, a hold after hold_ms, a single tap double_gap_ms
+    after it ends (once it can't become a double-tap), each within a sample.
+    """
+
+    def __init__(
+        self,
+        *,
+        dark=None,
+        calibration=None,
+        tap_max_ms=TAP_MAX_MS,
+        double_gap_ms=DOUBLE_GAP_MS,
+        hold_ms=HOLD_MS,
+        window=MOTION_WINDOW,
+        wiggle_thresh=WIGGLE_THRESH,
+    ):
+        if (dark is None) == (calibration is None):
+            raise ValueError("need one of dark or calibration")
+        self.cal = calibration
+        self.dark = dark
+        self.light = None if dark is None else dark + HYST
+        self.tap_max_us = tap_max_ms * 1000
+        self.gap_us = double_gap_ms * 1000
+        self.hold_us = hold_ms * 1000
+        self.window = window
+        self.wiggle_thresh = wiggle_thresh
+        self.motion = MotionWindow(window)
+
+        self.kinds = bytearray(QUEUE)
+        self.stamps = array("I", bytes(4 * QUEUE))
+        self.head = 0
+        self.tail = 0
+        self.event_us = 0  # timestamp of the event pop() last returned
+        self._vals = array("H", bytes(2 * 32))  # feed() batch buffers
+        self._ts = array("I", bytes(4 * 32))
+        self.reset()
+
+    def reset(self):
+        self.state = _IDLE
+        self.t_edge = 0  # ticks_us when the current state's timer started
+        self.since_dark = self.window + 1  # samples since the sensor was last covered
+        self.since_wiggle = self.window
+        self.head = self.tail = 0
+
+    def update(self, raw, t_us) -> int:
+        """Step the recognizer with one sample; returns the event it produced or NONE."""
+        st = self.state
+        cal = self.cal
+        if cal is not None:
+            raw = cal.update(raw)
+            dark, light = cal.dark, cal.light
+        else:
+            dark, light = self.dark, self.light
+        covered = raw < (light if st == _DOWN or st == _RELEASE else dark)
+        ev = NONE
+        if st == _IDLE:
+            if covered:
+                self.state = _DOWN
+                self.t_edge = t_us
+        elif st == _DOWN:
+            held = time.ticks_diff(t_us, self.t_edge)
+            if not covered:
+                self.state = _GAP if held <= self.tap_max_us else _IDLE
+                self.t_edge = t_us
+            elif held >= self.hold_us:
+                ev = HOLD
+                self.state = _RELEASE
+        elif st == _GAP:
+            if covered:
+                ev = DOUBLE_TAP
+                self.state = _RELEASE
+            elif time.ticks_diff(t_us, self.t_edge) > self.gap_us:
+                ev = TAP
+                self.state = _IDLE
+        elif not covered:
+            self.state = _IDLE
+
+        # wiggle: lots of change with the sensor never covered for a whole window
+        self.motion.update(raw)
+        if covered:
+            self.since_dark = 0
+        elif self.since_dark <= self.window:
+            self.since_dark += 1
+        if self.since_wiggle < self.window:
+            self.since_wiggle += 1
+        elif (
+            ev == NONE
+            and self.since_dark > self.window  # no cover/uncover edge in the window
+            and self.motion.moving(self.wiggle_thresh)
+        ):
+            ev = WIGGLE
+            self.since_wiggle = 0
+
+        if ev != NONE:
+            self._push(ev, t_us)
+        return ev
+
+    def feed(self, sampler) -> int:
+        """Run every unread sample of a Sampler through update(); returns the count."""
+        vals, ts = self._vals, self._ts
+        total = 0
+        while True:
+            n = sampler.read_into(vals, ts)
+            for i in range(n):
+                self.update(vals[i], ts[i])
+            total += n
+            if n < len(vals):
+                return total
+
+    def pop(self) -> int:
+        """Oldest queued event (its time in event_us), or NONE."""
+        t = self.tail
+        if t == self.head:
+            return NONE
+        self.event_us = self.stamps[t]
+        self.tail = (t + 1) % QUEUE
+        return self.kinds[t]
+
+    def _push(self, ev, t_us):
+        h = self.head
+        nxt = (h + 1) % QUEUE
+        if nxt == self.tail:
+            self.tail = (self.tail + 1) % QUEUE  # full: drop the oldest
+        self.kinds[h] = ev
+        self.stamps[h] = t_us
+        self.head = nxt
@@ -0,0 +1,123 @@
+# sensing/history.py
+# Fixed-size history of light samples. Everything is allocated up front, so the
+# RAM cost is known when the buffer is created and appends never touch the heap.
+from array import array
+import time
+
+MAX_BUCKETS = 64  # most buckets a single query() returns
+
+
+class History:
+    """
+    Ring buffer of raw ADC values (array('H')) with delta-encoded timestamps: each
+    slot stores the time since the previous slot in units of ts_unit_ms in one byte,
+    and only the newest timestamp is kept in full. Gaps longer than 255 units are
+    clamped, so times older than such a gap read early by the excess.
+
+    With decimate > 1, that many incoming samples are averaged into one slot.
+    E.g. a day of 20 Hz samples averaged to one slot per 2 s:
+        History(43200, decimate=40, ts_unit_ms=10)  # 43200 * 3 bytes ~= 127 KB
+    """
+
+    def __init__(self, capacity, *, decimate=1, ts_unit_ms=10):
+        self.capacity = capacity
+        self.decimate = decimate
+        self.unit = ts_unit_ms
+        self.values = array("H", bytes(2 * capacity))
+        self.deltas = bytearray(capacity)
+        self.head = 0  # next slot to write
+        self.count = 0
+        self.last_ts = 0  # ticks_ms of the newest slot (as encoded)
+
+        self._acc = 0
+        self._acc_n = 0
+
+        # scratch space for query(), reused between calls
+        self._bmin = array("H", bytes(2 * MAX_BUCKETS))
+        self._bmax = array("H", bytes(2 * MAX_BUCKETS))
+        self._bsum = array("I", bytes(4 * MAX_BUCKETS))
+        self._bn = array("H", bytes(2 * MAX_BUCKETS))
+
+    @staticmethod
+    def nbytes(capacity):
+        """RAM used by the sample storage of a History with this capacity."""
+        return 3 * capacity
+
+    def append(self, raw, ts=None):
+        """Add one sample. O(1), no allocation."""
+        self._acc += raw
+        self._acc_n += 1
+        if self._acc_n < self.decimate:
+            return
+        raw = self._acc // self._acc_n
+        self._acc = 0
+        self._acc_n = 0
+
+        if ts is None:
+            ts = time.ticks_ms()
+        if self.count:
+            # round against the encoded clock so rounding errors don't accumulate
+            d = (time.ticks_diff(ts, self.last_ts) + self.unit // 2) // self.unit
+            d = 0 if d < 0 else 255 if d > 255 else d
+            self.last_ts = time.ticks_add(self.last_ts, d * self.unit)
+        else:
+            d = 0
+            self.last_ts = ts
+
+        self.values[self.head] = raw
+        self.deltas[self.head] = d
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def span_ms(self):
+        """Time covered by the stored samples."""
+        total = 0
+        i = self.head
+        for _ in range(self.count - 1):
+            i = (i - 1) % self.capacity
+            total += self.deltas[i]
+        return total * self.unit
+
+    def query(self, since, step, emit):
+        """
+        Downsample every sample newer than `since` (a ticks_ms value) into buckets
+        `step` ms wide, oldest first. Calls emit(bucket_ts, min, max, mean) per
+        non-empty bucket and returns how many there were. Buckets beyond
+        MAX_BUCKETS are folded into the last one, so pick step accordingly.
+        """
+        n_buckets = 0
+        bmin, bmax, bsum, bn = self._bmin, self._bmax, self._bsum, self._bn
+        for b in range(MAX_BUCKETS):
+            bn[b] = 0
+
+        i = self.head
+        age = 0  # ms between the newest slot and slot i
+        for _ in range(self.count):
+            i = (i - 1) % self.capacity
+            offset = time.ticks_diff(self.last_ts, since) - age
+            if offset < 0:
+                break
+            b = offset // step
+            if b >= MAX_BUCKETS:
+                b = MAX_BUCKETS - 1
+            v = self.values[i]
+            if bn[b] == 0:
+                bmin[b] = bmax[b] = v
+                bsum[b] = 0
+            elif v < bmin[b]:
+                bmin[b] = v
+            elif v > bmax[b]:
+                bmax[b] = v
+            bsum[b] += v
+            bn[b] += 1
+            if b >= n_buckets:
+                n_buckets = b + 1
+            age += self.deltas[i] * self.unit
+
+        emitted = 0
+        for b in range(n_buckets):
+            if bn[b]:
+                emit(time.ticks_add(since, b * step), bmin[b], bmax[b], bsum[b] // bn[b])
+                emitted += 1
+        return emitted
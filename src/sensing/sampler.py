@@ -0,0 +1,128 @@
+# sensing/sampler.py
+# Fixed-rate ADC sampling from a machine.Timer interrupt. The interrupt writes into
+# a single-producer/single-consumer ring, so the foreground loop can be as slow or
+# jittery as it likes without changing the sample rate.
+from array import array
+from machine import Timer
+import micropython
+import time
+
+from diag.metrics import histogram
+
+micropython.alloc_emergency_exception_buf(100)
+
+_adc_us = histogram(b"adc_read_us", (5, 10, 20, 50, 100, 200))
+
+
+class Sampler:
+    """
+    The IRQ only advances `head`, the consumer only advances `tail`, so no locks
+    are needed. When the ring is full new samples are dropped (and counted) until
+    the consumer catches up; call flush() after a long blocking section.
+    """
+
+    def __init__(self, adc, *, rate_hz=100, size=128):
+        if size & (size - 1):
+            raise ValueError("size must be a power of two")
+        self.adc = adc
+        self.rate_hz = rate_hz
+        self.period_us = 1000000 // rate_hz
+        self.mask = size - 1
+        self.values = array("H", bytes(2 * size))
+        self.stamps = array("I", bytes(4 * size))  # ticks_us of each sample
+        self.head = 0
+        self.tail = 0
+        self.last = 0  # newest raw value, even if it was dropped
+
+        # stats, reset with reset_stats()
+        self.count = 0
+        self.dropped = 0
+        self.jitter_max_us = 0  # worst |actual - nominal| sampling interval
+        self._last_us = None
+
+        self._timer = None
+
+    def start(self):
+        self.stop()
+        t = self._timer = Timer()
+        try:
+            # a hard IRQ keeps sampling on time even while the GC runs
+            t.init(freq=self.rate_hz, mode=Timer.PERIODIC, callback=self._isr, hard=True)
+        except TypeError:
+            t.init(freq=self.rate_hz, mode=Timer.PERIODIC, callback=self._isr)
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+
+    def _isr(self, _timer):
+        # runs in interrupt context: no allocation allowed
+        now = time.ticks_us()
+        raw = self.adc.read_u16()
+        _adc_us.observe(time.ticks_diff(time.ticks_us(), now))
+        self.last = raw
+        self.count += 1
+        if self._last_us is not None:
+            j = time.ticks_diff(now, self._last_us) - self.period_us
+            if j < 0:
+                j = -j
+            if j > self.jitter_max_us:
+                self.jitter_max_us = j
+        self._last_us = now
+
+        h = self.head
+        nxt = (h + 1) & self.mask
+        if nxt == self.tail:
+            self.dropped += 1
+            return
+        self.values[h] = raw
+        self.stamps[h] = now
+        self.head = nxt
+
+    # ---------- Consumer side ----------
+    def available(self) -> int:
+        return (self.head - self.tail) & self.mask
+
+    def pop(self):
+        """Oldest unread raw value, or None if there is none."""
+        t = self.tail
+        if t == self.head:
+            return None
+        raw = self.values[t]
+        self.tail = (t + 1) & self.mask
+        return raw
+
+    def pop_stamp(self):
+        """Like pop() but returns (raw, ticks_us)."""
+        t = self.tail
+        if t == self.head:
+            return None
+        item = (self.values[t], self.stamps[t])
+        self.tail = (t + 1) & self.mask
+        return item
+
+    def read_into(self, values, stamps=None) -> int:
+        """Move up to len(values) unread samples into caller-owned arrays."""
+        n = 0
+        t = self.tail
+        head = self.head
+        limit = len(values)
+        while t != head and n < limit:
+            values[n] = self.values[t]
+            if stamps is not None:
+                stamps[n] = self.stamps[t]
+            t = (t + 1) & self.mask
+            n += 1
+        self.tail = t
+        return n
+
+    def flush(self):
+        """Discard unread samples (e.g. ones that piled up during a blocking jingle)."""
+        self.tail = self.head
+
+    def reset_stats(self):
+        self.count = 0
+        self.dropped = 0
+        self.jitter_max_us = 0
+        self._last_us = None
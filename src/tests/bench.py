@@ -0,0 +1,221 @@
+# tests/bench.py
+# Benchmarks for the device code. Runs on the Pico (copy src/ over, then
+# `import tests.bench`) or on the host simulator:
+#   python -m sim src/tests/bench.py bench.json
+# Results are written as JSON (default bench.json) so runs on different commits
+# can be compared with archive/bench_compare.py. Under the simulator, waiting and
+# latencies are in virtual time, while work times are real CPU time on the PC.
+import json
+import sys
+import time
+from array import array
+
+import main
+from audio.synth import Synth, sequence
+from audio.tables import exp_curve
+from dsp.filters import EMA, FULL
+from hal.pwm_driver import PWMDriver
+from net import wire
+from net.service import _melody_json
+from sensing.sampler import Sampler
+
+try:
+    from time import perf_counter  # CPython only: time real work, not virtual time
+
+    def work_us():
+        return int(perf_counter() * 1000000)
+
+except ImportError:
+    work_us = time.ticks_us
+
+BRIGHT = 60000
+DARK = main.THRESHOLD // 4
+SECOND_TAP_MS = 243  # second tap starts 163 ms after the first ends...
+# ...plus a phase swept across one poll period, so the tap doesn't always land
+# on a poll (or a sample) and the poll latency shows up in the results
+results = {}
+
+
+def record(name, unit, values):
+    """Summarise one benchmark as n/mean/p50/p95/max and print it."""
+    v = sorted(values)
+    n = len(v)
+    results[name] = {
+        "unit": unit,
+        "n": n,
+        "mean": sum(v) / n if n else 0,
+        "p50": v[n // 2] if n else 0,
+        "p95": v[min(n - 1, n * 95 // 100)] if n else 0,
+        "max": v[-1] if n else 0,
+    }
+    print(name, results[name])
+
+
+class PulseADC:
+    """ADC stand-in that reads dark during scripted pulses, ms after arm()."""
+
+    def __init__(self, pulses, width_ms):
+        self.pulses = pulses
+        self.width = width_ms
+        self.t0 = time.ticks_ms()
+
+    def arm(self):
+        self.t0 = time.ticks_ms()
+
+    def read_u16(self):
+        dt = time.ticks_diff(time.ticks_ms(), self.t0)
+        for p in self.pulses:
+            if p <= dt < p + self.width:
+                return DARK
+        return BRIGHT
+
+
+class OnsetRecorder:
+    """Wraps a PWM object and notes the time of every write that makes sound."""
+
+    def __init__(self, pwm):
+        self.pwm = pwm
+        self.onsets = []
+
+    def freq(self, hz):
+        self.pwm.freq(hz)
+
+    def duty_u16(self, duty):
+        if duty:
+            self.onsets.append(time.ticks_ms())
+        self.pwm.duty_u16(duty)
+
+    def deinit(self):
+        self.pwm.deinit()
+
+
+def bench_demo_loop(iterations=50, period_ms=100):
+    """main.demo()'s loop: cost of one double_tap_debounce() pass, and period jitter."""
+    adc = PulseADC((), 0)
+    main.sampler.stop()
+    main.sampler = Sampler(adc, rate_hz=main.SAMPLE_HZ)
+    main.sampler.start()
+    work = []
+    jitter = []
+    last = time.ticks_ms()
+    for _ in range(iterations):
+        t = work_us()
+        main.double_tap_debounce()
+        work.append(time.ticks_diff(work_us(), t))
+        time.sleep_ms(period_ms)
+        now = time.ticks_ms()
+        jitter.append(abs(time.ticks_diff(now, last) - period_ms))
+        last = now
+    main.sampler.stop()
+    record("demo_loop_work", "us", work)
+    record("demo_loop_jitter", "ms", jitter)
+
+
+def bench_theremin_loop(iterations=200, period_ms=10):
+    """The maintest pipeline: drain samples, EMA, pitch lookup, PWM update."""
+    adc = PulseADC(tuple(range(0, iterations * period_ms, 300)), 150)
+    sampler = Sampler(adc, rate_hz=100)
+    buf = array("H", bytes(2 * 64))
+    ema = EMA(0.15)
+    lookup = exp_curve(200, 1800).lookup
+    buz = PWMDriver(16)
+    sampler.start()
+    work = []
+    for _ in range(iterations):
+        t = work_us()
+        n = sampler.read_into(buf)
+        if n:
+            buz.set_u16(lookup(FULL - ema.process(buf, n)), 30000)
+        work.append(time.ticks_diff(work_us(), t))
+        time.sleep_ms(period_ms)
+    sampler.stop()
+    buz.stop()
+    record("theremin_loop_work", "us", work)
+
+
+def bench_tap_detection(trials=10, poll_ms=main.LOOP_MS):
+    """Time from the second dark pulse starting to double_tap_debounce() returning."""
+    adc = PulseADC((0, SECOND_TAP_MS), 80)
+    main.sampler.stop()
+    main.sampler = Sampler(adc, rate_hz=main.SAMPLE_HZ)
+    main.sampler.start()
+    latency = []
+    missed = 0
+    for i in range(trials):
+        second = SECOND_TAP_MS + i * poll_ms // trials
+        adc.pulses = (0, second)
+        main.gestures.reset()
+        main.sampler.flush()
+        adc.arm()
+        while time.ticks_diff(time.ticks_ms(), adc.t0) < 2000:
+            if main.double_tap_debounce():
+                latency.append(time.ticks_diff(time.ticks_ms(), adc.t0) - second)
+                break
+            time.sleep_ms(poll_ms)
+        else:
+            missed += 1
+        time.sleep_ms(500)  # let the tap window lapse before the next trial
+    main.sampler.stop()
+    record("tap_detect_latency", "ms", latency)
+    results["tap_detect_latency"]["missed"] = missed
+
+
+def bench_note_onsets(notes=20, timer_ms=2):
+    """Scheduled vs actual note starts with the synth serviced from a Timer."""
+    drv = PWMDriver(16)
+    rec = drv.pwm = OnsetRecorder(drv.pwm)
+    synth = Synth(drv)
+    events = sequence([(60 + i % 12, 80) for i in range(notes)], gap_ms=20)
+    base = time.ticks_add(time.ticks_ms(), 50)
+    synth.start_timer(timer_ms)
+    synth.play(events, at=base)
+    while synth.busy():
+        time.sleep_ms(10)
+    synth.stop_timer()
+    err = []
+    for (_p, _v, start, _d), actual in zip(events, rec.onsets):
+        err.append(time.ticks_diff(actual, time.ticks_add(base, start)))
+    record("note_onset_error", "ms", err)
+    results["note_onset_error"]["missed"] = notes - len(rec.onsets)
+
+
+def bench_body_decode(notes=64, runs=50):
+    """/melody body to synth events: JSON (parse + convert) vs net/wire.py binary."""
+    melody = [{"freq": 262 + 10 * i, "ms": 100, "duty": 0.5} for i in range(notes)]
+    payload = {"notes": melody}
+    bodies = {"json": json.dumps(payload).encode(), "bin": wire.encode_melody(payload)}
+    decoders = {
+        "json": lambda b: _melody_json(json.loads(bytes(b))),
+        "bin": wire.decode_melody,
+    }
+    for kind, body in bodies.items():
+        buf = memoryview(bytearray(body))  # as it sits in the request buffer
+        decode = decoders[kind]
+        times = []
+        for _ in range(runs):
+            t = work_us()
+            decode(buf)
+            times.append(time.ticks_diff(work_us(), t))
+        name = "melody_decode_" + kind
+        record(name, "us", times)
+        results[name]["bytes"] = len(body)
+
+
+def run(out="bench.json"):
+    bench_demo_loop()
+    bench_theremin_loop()
+    bench_tap_detection()
+    bench_note_onsets()
+    bench_body_decode()
+    meta = {
+        "platform": sys.platform,
+        "impl": sys.implementation.name,
+        "sim": "sim" in sys.modules,
+        "time": time.time(),
+    }
+    with open(out, "w") as f:
+        json.dump({"meta": meta, "results": results}, f)
+    print("Wrote", out)
+
+
+run(sys.argv[1] if len(sys.argv) > 1 else "bench.json")
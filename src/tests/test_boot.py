@@ -0,0 +1,139 @@
+# tests/test_boot.py
+import asyncio
+import os
+import time
+
+import machine
+from audio.synth import Synth, sequence
+from diag import boot
+from hal.pwm_driver import PWMDriver
+from net.service import DeviceService
+from net.wifi import WiFi
+
+CACHE = "test_wifi_cache.json"
+AP = b"\x02\x00\x00\x00\x00\x01"
+
+
+class FakeWLAN:
+    """Fails the first `fail` connects (no such AP), then associates after 500 ms."""
+
+    def __init__(self, fail=0):
+        self.fail = fail
+        self.bssids = []  # the bssid= of each connect()
+        self.st = 0
+        self.up_at = 0
+
+    def active(self, on):
+        pass
+
+    def connect(self, ssid, key, bssid=None):
+        self.bssids.append(bssid)
+        if self.fail:
+            self.fail -= 1
+            self.st = -2
+        else:
+            self.st = 1
+            self.up_at = time.ticks_add(time.ticks_ms(), 500)
+
+    def isconnected(self):
+        return self.st == 1 and time.ticks_diff(time.ticks_ms(), self.up_at) >= 0
+
+    def status(self):
+        return self.st
+
+    def disconnect(self):
+        self.st = 0
+
+    def scan(self):
+        return [
+            (b"other", b"\x09" * 6, 1, -30, 3, 0),
+            (b"lab", b"\x07" * 6, 6, -70, 3, 0),
+            (b"lab", AP, 11, -50, 3, 0),
+        ]
+
+    def ifconfig(self):
+        return ("192.168.4.2", "255.255.255.0", "192.168.4.1", "192.168.4.1")
+
+
+async def connect(wifi):
+    t0 = time.ticks_ms()
+    task = asyncio.create_task(wifi.run())
+    await wifi.wait()
+    return task, time.ticks_diff(time.ticks_ms(), t0)
+
+
+print("Test 1: Milestones keep the first time they were reached")
+synth = Synth(PWMDriver(16))
+synth.on_start = lambda due, now, played: boot.mark(boot.FIRST_SOUND)
+assert boot.at(boot.FIRST_SOUND) is None
+synth.play(sequence([(84, 60)]), at=time.ticks_add(time.ticks_ms(), 30))
+while synth.busy():
+    synth.service()
+    time.sleep_ms(1)
+first = boot.at(boot.FIRST_SOUND)
+boot.mark(boot.FIRST_SOUND)
+assert first is not None and boot.at(boot.FIRST_SOUND) == first
+print("PASS: first sound at", first, "ms")
+
+print("Test 2: Failed attempts back off, then the AP is learned and cached")
+if CACHE in os.listdir():
+    os.remove(CACHE)
+wlan = FakeWLAN(fail=3)
+wifi = WiFi("lab", "pw", wlan=wlan, cache=CACHE)
+task, took = asyncio.run(connect(wifi))
+task.cancel()
+assert wifi.attempts.value >= 4 and wlan.bssids[-1] is None
+assert took >= 7000, took  # 1 + 2 + 4 s of backoff before the attempt that works
+assert wifi.bssid == AP and wifi.channel == 11 and wifi.ip() == "192.168.4.2"
+assert boot.at(boot.WIFI) is not None
+print("PASS: connected after", took, "ms")
+
+print("Test 3: The next boot joins the cached AP directly")
+wlan = FakeWLAN()
+wifi = WiFi("lab", "pw", wlan=wlan, cache=CACHE)
+assert wifi.bssid == AP
+task, took = asyncio.run(connect(wifi))
+task.cancel()
+assert wlan.bssids == [AP] and took < 2000, (wlan.bssids, took)
+assert WiFi("other", "pw", wlan=wlan, cache=CACHE).bssid is None
+print("PASS")
+
+print("Test 4: A stale cached AP is dropped, a lost link reconnected")
+
+
+async def drop_and_reconnect(wifi, wlan):
+    task, _ = await connect(wifi)
+    wlan.disconnect()
+    await asyncio.sleep_ms(1500)
+    assert not wifi.connected or wifi.reconnects.value
+    await wifi.wait()
+    task.cancel()
+
+
+wlan = FakeWLAN(fail=1)
+wifi = WiFi("lab", "pw", wlan=wlan, cache=CACHE)
+before = wifi.reconnects.value
+asyncio.run(drop_and_reconnect(wifi, wlan))
+assert wlan.bssids[:2] == [AP, None], wlan.bssids
+assert wifi.reconnects.value == before + 1 and wifi.connected
+os.remove(CACHE)
+print("PASS")
+
+print("Test 5: The service keeps the boot hook, the Timer keeps the synth to itself")
+started = []
+synth = Synth(PWMDriver(16))
+synth.on_start = lambda due, now, played: started.append(due)
+svc = DeviceService(synth, machine.ADC(28))
+due = time.ticks_add(time.ticks_ms(), 10)
+svc.traces.add(1, None, due, due, due)
+synth.play_hz([(440, 0.5, 0, 20)], at=due)
+time.sleep_ms(10)
+synth.service()
+assert started == [due] and svc.traces.onset[0] == svc.traces.due[0]
+synth.start_timer()
+asyncio.run(asyncio.wait_for(synth.run(), 1))  # returns instead of servicing too
+synth.stop_timer()
+print("PASS")
+
+boot.report()
+print("All boot tests complete.")
@@ -0,0 +1,74 @@
+# tests/test_calibrate.py
+from sensing.calibrate import Calibrator, MIN_SAMPLES, MIN_HYST
+from sensing.gestures import Gestures, DOUBLE_TAP, NONE
+from dsp.filters import FULL
+
+
+def feed(cal, value, n, noise=0):
+    """n samples of value, with a +-noise sawtooth so the histogram isn't one bin."""
+    for i in range(n):
+        cal.update(value + (i % 5 - 2) * noise // 2)
+
+
+print("Test 1: Defaults hold until warmed up")
+cal = Calibrator(dark=12345)
+feed(cal, 40000, MIN_SAMPLES - 1)
+assert not cal.ready and cal.dark == 12345, cal.dark
+print("PASS")
+
+print("Test 2: Steady room light puts dark at half of ambient")
+cal = Calibrator()
+feed(cal, 40000, 500, noise=400)
+assert abs(cal.ambient - 40000) < 1024, cal.ambient
+assert cal.dark == cal.ambient // 2, (cal.dark, cal.ambient)
+assert cal.light - cal.dark >= MIN_HYST
+print("PASS: ambient", cal.ambient, "dark", cal.dark, "light", cal.light)
+
+print("Test 3: After some taps, dark sits halfway between ambient and the floor")
+for _ in range(5):
+    feed(cal, 40000, 100, noise=400)
+    feed(cal, 4000, 10)
+assert cal.floor < 8000, cal.floor
+assert 15000 < cal.dark < 30000, cal.dark
+assert cal.dark < cal.light < cal.ambient
+print("PASS: floor", cal.floor, "dark", cal.dark)
+
+print("Test 4: Thresholds follow the room getting darker")
+feed(cal, 16000, 6000, noise=400)
+assert abs(cal.ambient - 16000) < 1024, cal.ambient
+assert cal.dark < 16000 * 3 // 4, cal.dark
+print("PASS: ambient", cal.ambient, "dark", cal.dark)
+
+print("Test 5: invert and normalize")
+cal = Calibrator(invert=True)
+assert cal.update(FULL - 1000) == 1000
+feed(cal, FULL - 40000, 300, noise=400)
+feed(cal, FULL - 5000, 20)
+feed(cal, FULL - 40000, 100, noise=400)
+assert cal.normalize(0) == 0 and cal.normalize(FULL) == FULL
+mid = cal.normalize((cal.floor + cal.top) // 2)
+assert abs(mid - FULL // 2) < 1024, mid
+print("PASS: floor", cal.floor, "top", cal.top)
+
+print("Test 6: Gestures with a calibrator find taps a fixed threshold would miss")
+# a dim room: ambient 12000, a finger 2000, both below a hand-tuned 30000
+g = Gestures(calibration=Calibrator(dark=30000))
+fixed = Gestures(dark=30000)
+got = []
+seen = []
+t = 0
+seq = [(12000, 200)] * 2 + [(2000, 8), (12000, 16), (2000, 8), (12000, 60)] * 3
+for value, n in seq:
+    for _ in range(n):
+        ev = g.update(value, t)
+        if ev != NONE:
+            got.append(ev)
+        ev = fixed.update(value, t)
+        if ev != NONE:
+            seen.append(ev)
+        t += 10000
+assert got.count(DOUBLE_TAP) == 3, got  # after a HOLD while still warming up
+assert DOUBLE_TAP not in seen, seen  # to it the sensor is covered all along
+print("PASS:", got)
+
+print("All calibrate tests complete.")
@@ -0,0 +1,99 @@
+# tests/test_core1.py
+import asyncio
+import time
+
+import sim
+from audio.core1 import SynthCore
+from audio.synth import Synth, sequence
+from hal.pwm_driver import PWMDriver
+
+synth = Synth(PWMDriver(16))
+core = SynthCore(synth, size=8)
+
+print("Test 1: Commands wait in the ring until core 1 takes them")
+t0 = time.ticks_ms()
+assert core.play_hz([(440, 0.5, 0, 100), (660, 0.25, 100, 100)], at=t0) == 2
+assert core.depth() == 3 and core.busy() and not synth.busy()
+core.step()
+assert core.depth() == 0 and core.busy() and synth.pwm.freq == 440
+time.sleep_ms(120)
+core.step()
+assert synth.pwm.freq == 660
+core.cancel()
+core.step()
+assert not core.busy() and synth.active is None
+print("PASS")
+
+print("Test 2: play() sends MIDI notes with velocity and appends")
+core.play(sequence([(69, 50)], velocity=0.5), at=time.ticks_ms())
+core.play(sequence([(81, 50)]), at=time.ticks_add(time.ticks_ms(), 100), append=True)
+core.step()
+assert synth.active == 69 and len(synth._queue) == 2
+try:
+    core.play([(200, 1.0, 0, 10)])
+    raise AssertionError("bad pitch was sent")
+except ValueError as e:
+    print("PASS:", e)
+core.step()
+
+print("Test 3: A full ring waits for the Timer (no core 1 in virtual time)")
+core.start()
+assert not core.on_core1 and core._timer is not None
+start = time.ticks_add(time.ticks_ms(), 20)
+core.play_hz([(300 + 10 * i, 0.5, 30 * i, 25) for i in range(20)], at=start)
+assert core.waits.value > 0
+while core.busy():
+    time.sleep_ms(5)
+core.stop()
+late = [time.ticks_diff(t // 1000, time.ticks_add(start, 30 * i)) for i, (t, _, _)
+        in enumerate(sim.onsets(16)[-20:])]
+assert len(late) == 20 and max(late) <= 1, late
+print("PASS: 20 notes, worst", max(late), "ms late")
+
+print("Test 4: Under asyncio a full ring goes to the backlog instead of blocking")
+
+
+async def long_melody():
+    core.start()
+    feeder = asyncio.create_task(core.run())
+    await asyncio.sleep_ms(0)
+    t0 = time.ticks_us()
+    start = time.ticks_add(time.ticks_ms(), 500)  # the melody loads at its COMMIT
+    notes = [(200 + i, 0.5, 5 * i, 4) for i in range(200)]
+    assert core.play_hz(notes, at=start) == 200
+    assert time.ticks_diff(time.ticks_us(), t0) < 1000  # returned without waiting
+    assert core._backlog and core.busy()
+    while core.busy():
+        await asyncio.sleep_ms(5)
+    feeder.cancel()
+    core.stop()
+    return [f for _, _, f in sim.onsets(16)[-200:]]
+
+
+got = asyncio.run(long_melody())
+assert got == list(range(200, 400))
+print("PASS")
+
+print("Test 5: Both synths refuse a freq the ring can't carry")
+for s in (synth, core):
+    try:
+        s.play_hz([(70000, 0.5, 0, 10)])
+        raise AssertionError("70 kHz was accepted")
+    except ValueError as e:
+        print("PASS:", type(s).__name__, e)
+
+print("Test 6: On a real second thread")
+clock = sim.install(realtime=True)
+core = SynthCore(Synth(PWMDriver(16)))
+core.start()
+assert core.on_core1
+start = time.ticks_add(time.ticks_ms(), 20)
+core.play_hz([(500, 0.5, 0, 30), (700, 0.5, 40, 30)], at=start)
+deadline = time.ticks_add(start, 1000)
+while core.busy() and time.ticks_diff(deadline, time.ticks_ms()) > 0:
+    time.sleep_ms(5)
+core.stop()
+assert not core.busy() and [f for _, _, f in sim.onsets(16)] == [500, 700]
+print("PASS")
+
+print("All core1 tests complete.")
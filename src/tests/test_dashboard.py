@@ -0,0 +1,46 @@
+# tests/test_dashboard.py
+# Host-side: the dashboard's poller against tiny local servers.
+import asyncio
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "archive"))
+from dashboard import DevicePoller, poll_all  # noqa: E402
+
+GOOD = b'{"status":"ok","device_id":"pico-w-1","norm":0.5}'
+REPLIES = {
+    "good": b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n" % len(GOOD) + GOOD,
+    "truncated": b"HTTP/1.1 200 OK\r\nContent-Length: 50\r\n\r\n" + GOOD[:10],
+    "garbage": b"?\r\n\r\n",
+}
+
+
+async def serve(reply):
+    async def client(reader, writer):
+        await reader.readline()
+        writer.write(reply)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(client, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def main():
+    servers = {name: await serve(reply) for name, reply in REPLIES.items()}
+    pollers = {name: DevicePoller("127.0.0.1", s[1]) for name, s in servers.items()}
+    statuses = await poll_all(list(pollers.values()), deadline_s=2.0)
+    for server, _ in servers.values():
+        server.close()
+    return dict(zip(pollers, statuses))
+
+
+print("Test 1: A truncated or garbled reply marks only that device offline")
+got = asyncio.run(main())
+assert got["good"]["status"] == "ok" and got["good"]["norm"] == 0.5, got["good"]
+assert got["truncated"]["status"] == "Offline (IncompleteReadError)", got["truncated"]
+assert got["garbage"]["status"] == "Offline (IndexError)", got["garbage"]
+print("PASS:", {k: v["status"] for k, v in got.items()})
+
+print("All dashboard tests complete.")
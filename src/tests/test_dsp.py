@@ -0,0 +1,39 @@
+# tests/test_dsp.py
+from array import array
+from dsp.filters import EMA, FastSlow, Hysteresis, MotionWindow, to_u16
+
+print("Test 1: Integer EMA tracks the float version")
+samples = [(i * 7919) % 65536 for i in range(500)]
+ema = EMA(0.15)
+ref = None
+for x in samples:
+    y = ema.update(x)
+    ref = x if ref is None else 0.15 * x + 0.85 * ref
+assert abs(y - ref) < 64, (y, ref)
+print("PASS:", y, "vs", int(ref))
+
+print("Test 2: Batch API matches per-sample updates")
+buf = array("H", samples)
+assert EMA(0.15).process(buf) == y
+print("PASS")
+
+print("Test 3: Fast/slow delta is ~0 on a steady signal")
+fs = FastSlow(0.3, 0.01)
+assert fs.process(array("H", [40000] * 100)) == 0
+print("PASS")
+
+print("Test 4: Motion window")
+mw = MotionWindow(20)
+mw.process(array("H", [0, 1000] * 20))
+assert mw.mean == 1000 and mw.moving(999) and not mw.moving(1000)
+print("PASS: mean", mw.mean)
+
+print("Test 5: Hysteresis keeps the current bin near an edge")
+edges = [to_u16(v) for v in (0.0, 0.25, 0.55, 0.85)] + [to_u16(1.01)]
+bins = Hysteresis(edges, to_u16(0.04))
+assert bins.classify(to_u16(0.30)) == 1
+assert bins.classify(to_u16(0.23)) == 1  # within HYST of the MID bin
+assert bins.classify(to_u16(0.20)) == 0
+print("PASS")
+
+print("All dsp tests complete.")
@@ -0,0 +1,64 @@
+# tests/test_gestures.py
+from sensing.gestures import Gestures, TAP, DOUBLE_TAP, HOLD, WIGGLE, NONE
+
+BRIGHT = 50000
+DARK = 5000
+PERIOD_US = 10000  # 100 Hz
+
+
+def run(g, levels, t0=0):
+    """Feed (value, ms) segments at 100 Hz; returns [(event, t_ms), ...]."""
+    events = []
+    t = t0
+    for value, ms in levels:
+        for _ in range(ms * 1000 // PERIOD_US):
+            ev = g.update(value, t)
+            if ev != NONE:
+                events.append((ev, t // 1000))
+            t = (t + PERIOD_US) & ((1 << 30) - 1)
+    return events
+
+
+print("Test 1: Single tap is reported once it can't become a double-tap")
+g = Gestures(dark=30000)
+got = run(g, [(BRIGHT, 300), (DARK, 100), (BRIGHT, 600)])
+assert got == [(TAP, 710)], got
+print("PASS:", got)
+
+print("Test 2: Double-tap on the first covered sample of the second tap")
+g.reset()
+got = run(g, [(BRIGHT, 300), (DARK, 80), (BRIGHT, 160), (DARK, 80), (BRIGHT, 600)])
+assert got == [(DOUBLE_TAP, 540)], got
+print("PASS:", got)
+
+print("Test 3: Hold while still covered, nothing on release")
+g.reset()
+got = run(g, [(BRIGHT, 100), (DARK, 1500), (BRIGHT, 500)])
+assert got == [(HOLD, 900)], got
+print("PASS:", got)
+
+print("Test 4: Covered too long for a tap but too short for a hold is nothing")
+g.reset()
+assert run(g, [(BRIGHT, 100), (DARK, 500), (BRIGHT, 800)]) == []
+print("PASS")
+
+print("Test 5: Wiggling without covering the sensor, taps don't count")
+g.reset()
+wave = [(BRIGHT, 30), (BRIGHT - 15000, 30)] * 20
+got = run(g, [(BRIGHT, 300)] + wave + [(BRIGHT, 500)])
+assert got and all(e == WIGGLE for e, _ in got), got
+assert got[0][1] < 500  # within a window of the waving starting
+g.reset()
+assert [e for e, _ in run(g, [(BRIGHT, 300)] + [(DARK, 80), (BRIGHT, 160)] * 4)] == [
+    DOUBLE_TAP,
+    DOUBLE_TAP,
+]
+print("PASS:", len(got), "wiggle events")
+
+print("Test 6: Events queue up for pop(), oldest first, wrapping ticks")
+g.reset()
+run(g, [(BRIGHT, 100), (DARK, 100), (BRIGHT, 500)], t0=(1 << 30) - 200000)
+assert g.pop() == TAP and g.pop() == NONE
+print("PASS")
+
+print("All gestures tests complete.")
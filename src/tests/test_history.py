@@ -0,0 +1,41 @@
+# tests/test_history.py
+from sensing.history import History
+from net.service import HISTORY_DECIMATE, HISTORY_SLOTS, HISTORY_UNIT_MS, SAMPLE_MS
+
+print("Test 1: Fixed RAM")
+h = History(100, decimate=2, ts_unit_ms=10)
+assert History.nbytes(100) == 300
+print("PASS: 100 slots =", History.nbytes(100), "bytes")
+
+print("Test 2: Wraps around and keeps the newest samples")
+t = 1000
+for i in range(300):
+    h.append(i, t)
+    t += 50
+assert h.count == 100
+assert h.span_ms() == 99 * 100, h.span_ms()
+print("PASS: span", h.span_ms(), "ms")
+
+print("Test 3: Range query with min/max/mean downsampling")
+out = []
+n = h.query(t - 2000, 500, lambda *bucket: out.append(bucket))
+assert n == 4, out
+assert out[0] == (t - 2000, 260, 268, 264), out[0]
+print("PASS:", out)
+
+print("Test 4: The service's ring holds a day of samples")
+day = 24 * 3600 * 1000
+slot_ms = HISTORY_DECIMATE * SAMPLE_MS
+assert HISTORY_SLOTS * slot_ms >= day and slot_ms <= 255 * HISTORY_UNIT_MS
+h = History(HISTORY_SLOTS, decimate=HISTORY_DECIMATE, ts_unit_ms=HISTORY_UNIT_MS)
+t = 0
+for i in range(day // SAMPLE_MS + 10 * HISTORY_DECIMATE):
+    h.append(i // 72000, t)  # the value climbs by one an hour
+    t += SAMPLE_MS
+assert h.count == HISTORY_SLOTS and h.span_ms() == (HISTORY_SLOTS - 1) * slot_ms
+out = []
+h.query(t - day, 3600 * 1000, lambda *bucket: out.append(bucket))
+assert len(out) == 24 and [b[1] for b in out[1:]] == list(range(1, 24)), out
+print("PASS:", History.nbytes(HISTORY_SLOTS), "bytes for", h.span_ms() // 1000, "s")
+
+print("All history tests complete.")
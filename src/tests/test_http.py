@@ -0,0 +1,93 @@
+# tests/test_http.py
+import asyncio
+import json
+
+from net.http import JSON, Server
+
+
+class Writer:
+    def __init__(self):
+        self.data = bytearray()
+        self.closed = False
+
+    def write(self, b):
+        self.data += b
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    async def wait_closed(self):
+        pass
+
+
+def echo(req, resp):
+    resp.json({"q": req.arg(b"q", b"").decode(), "body": req.json()})
+    return 200, JSON
+
+
+server = Server({b"/echo": (b"POST", echo)}, max_conns=2, req_size=64)
+
+
+async def exchange(raw):
+    """Feed raw bytes (then EOF) to one connection; returns what it wrote."""
+    reader = asyncio.StreamReader()
+    reader.feed_data(raw)
+    reader.feed_eof()
+    w = Writer()
+    await server._client(reader, w)
+    assert w.closed and len(server._pool) == 2  # buffers back in the pool
+    return bytes(w.data)
+
+
+def post(body, version=b"HTTP/1.1", length=None):
+    length = len(body) if length is None else length
+    return b"POST /echo?q=hi %s\r\nContent-Length: %d\r\n\r\n" % (version, length) + body
+
+
+def replies(data):
+    """[(status, body), ...] from a stream of responses."""
+    out = []
+    while data:
+        head, _, rest = data.partition(b"\r\n\r\n")
+        lines = head.split(b"\r\n")
+        length = 0
+        for h in lines[1:]:
+            name, _, value = h.partition(b": ")
+            if name == b"Content-Length":
+                length = int(value)
+        out.append((int(lines[0].split()[1]), rest[:length]))
+        data = rest[length:]
+    return out
+
+
+print("Test 1: Request line, query and body are parsed")
+got = replies(asyncio.run(exchange(post(b'{"a": 1}'))))
+assert got == [(200, b'{"q": "hi", "body": {"a": 1}}')], got
+print("PASS")
+
+print("Test 2: Keep-alive serves several requests, HTTP/1.0 closes after one")
+got = replies(asyncio.run(exchange(post(b"[1]") + post(b"[2]"))))
+assert [json.loads(b)["body"] for _, b in got] == [[1], [2]], got
+got = replies(asyncio.run(exchange(post(b"[1]", b"HTTP/1.0") + post(b"[2]"))))
+assert len(got) == 1, got
+print("PASS")
+
+print("Test 3: Errors: unknown path, wrong method, bad JSON, too large")
+raw = b"GET /nope HTTP/1.1\r\n\r\nGET /echo HTTP/1.1\r\n\r\n"
+got = replies(asyncio.run(exchange(raw + post(b"{oops") + post(b"x" * 100))))
+assert [s for s, _ in got] == [404, 405, 400, 413], got
+print("PASS")
+
+print("Test 4: A body shorter than its Content-Length closes the connection")
+assert asyncio.run(exchange(post(b'{"a"', length=20))) == b""
+print("PASS")
+
+print("Test 5: A negative Content-Length gets a 400 and the connection closes")
+got = replies(asyncio.run(exchange(post(b"", length=-5) + post(b"[1]"))))
+assert got == [(400, b'{"error":"bad content-length"}')], got
+print("PASS")
+
+print("All http tests complete.")
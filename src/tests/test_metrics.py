@@ -0,0 +1,45 @@
+# tests/test_metrics.py
+from diag import metrics
+from diag.buffer import Buffer
+
+print("Test 1: Histogram buckets, count, sum and max")
+h = metrics.histogram(b"test_us", (10, 100))
+for v in (5, 10, 11, 100, 5000):
+    h.observe(v)
+assert list(h.counts) == [2, 2, 1] and h.count == 5 and h.sum == 5126 and h.max == 5000
+out = Buffer(256)
+h.render(out)
+assert bytes(out.view()) == b"test_us count=5 sum=5126 max=5000 le10=2 le100=2 inf=1\n"
+print("PASS:", bytes(out.view()))
+
+print("Test 2: Registering twice returns the same metric")
+assert metrics.histogram(b"test_us") is h
+c = metrics.counter(b"test_count")
+c.inc()
+metrics.counter(b"test_count").inc(2)
+assert c.value == 3
+print("PASS")
+
+print("Test 3: Profiling off leaves functions untouched")
+
+
+def f(x):
+    return x + 1
+
+
+assert metrics.timed(b"f_us")(f) is f
+metrics.profiling(True)
+g = metrics.timed(b"f_us")(f)
+metrics.profiling(False)
+assert g is not f and g(1) == 2 and metrics.histogram(b"f_us").count == 1
+print("PASS")
+
+print("Test 4: Rendering everything")
+metrics.collect()
+out = Buffer(2048)
+metrics.render(out)
+text = bytes(out.view())
+assert b"heap_free " in text and b"gc_pause_us count=1" in text, text
+print("PASS:", len(text), "bytes")
+
+print("All metrics tests complete.")
@@ -0,0 +1,83 @@
+# tests/test_midicompile.py
+# Host-side: a small standard MIDI file built in memory, through to device scores.
+import os
+import shutil
+import struct
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "archive"))
+from midicompile import compile_midi, parse_midi  # noqa: E402
+from audio.score import ScoreReader  # noqa: E402
+
+
+def smf(track, division=480):
+    head = struct.pack(">4sIHHH", b"MThd", 6, 0, 1, division)
+    return head + struct.pack(">4sI", b"MTrk", len(track)) + track
+
+
+# 480 ticks per quarter at 480000 us per quarter: one tick per ms
+# fmt: off
+TRACK = bytes(
+    [
+        0x00, 0xFF, 0x51, 0x03, 0x07, 0x53, 0x00,  # tempo
+        0x00, 0x90, 60, 100,  # C4 on
+        0x00, 64, 100,  # E4 on, running status: a chord
+        0x83, 0x60, 0x80, 60, 64,  # 480 ticks later, C4 off
+        0x00, 64, 64,  # E4 off, running status
+        0x00, 0x90, 67, 100,  # G4 on
+        0x81, 0x70, 67, 0,  # 240 ticks later, G4 off as a velocity 0 note on
+        0x00, 0x99, 36, 100,  # a drum, skipped
+        0x64, 0x89, 36, 0,
+        0x00, 0xFF, 0x2F, 0x00,  # end of track
+    ]
+)
+# fmt: on
+DATA = smf(TRACK)
+
+print("Test 1: Parsing notes, chords and running status")
+notes = parse_midi(DATA)
+got = [(n.pitch, n.start, n.dur) for n in notes]
+assert got == [(64, 0, 480), (60, 0, 480), (67, 480, 240)], got
+assert all(abs(n.vel - 100 / 127) < 1e-9 for n in notes)
+with_drums = parse_midi(DATA, skip_drums=False)
+assert (36, 720, 100) in [(n.pitch, n.start, n.dur) for n in with_drums]
+print("PASS:", got)
+
+print("Test 2: Default tempo and bad files (expect errors)")
+slow = parse_midi(smf(TRACK[7:]))  # no tempo event: 120 bpm
+assert [(n.start, n.dur) for n in slow][2] == (500, 250), slow
+for bad in (b"RIFF" + DATA[4:], DATA[:8] + b"\x00\x02" + DATA[10:], DATA[:14] + b"MTrX"):
+    try:
+        parse_midi(bad)
+        raise AssertionError("accepted a bad file")
+    except ValueError as e:
+        print("  ValueError:", e)
+print("PASS")
+
+print("Test 3: Compiling for two devices")
+tmp = tempfile.mkdtemp()
+try:
+    path = os.path.join(tmp, "tiny.mid")
+    with open(path, "wb") as f:
+        f.write(DATA)
+    compiled = compile_midi(path, 2, cache_dir=tmp)
+    v = round(100 / 127, 3)
+    # the chord is split; G4 follows E4, the closer of the two lines
+    assert compiled.devices == [[(64, v, 0, 480), (67, v, 480, 240)], [(60, v, 0, 480)]]
+    assert compiled.stats["notes"] == 3 and compiled.stats["parts"] == 2
+    assert compiled.stats["length_ms"] == 720 and compiled.stats["dropped"] == 0
+    score = [(p, t, d) for p, vel, t, d in ScoreReader(compiled.score(0))]
+    assert score == [(64, 0, 480), (67, 480, 240)], score
+    melody = compiled.melody_notes(1, 1000)
+    assert melody == [{"freq": 262, "ms": 480, "duty": round(0.5 * v, 3), "at": 1000}]
+
+    cached = compile_midi(path, 2, cache_dir=tmp)
+    assert cached.devices == compiled.devices and cached.stats == compiled.stats
+    assert len([f for f in os.listdir(tmp) if f.endswith(".json")]) == 1
+finally:
+    shutil.rmtree(tmp)
+print("PASS:", compiled.stats)
+
+print("All midicompile tests complete.")
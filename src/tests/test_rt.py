@@ -0,0 +1,48 @@
+# tests/test_rt.py
+import gc
+import time
+
+from diag import metrics
+from diag.rt import Line, RealTime
+
+print("Test 1: Telemetry line formatting")
+line = Line(64)
+line.field(b"raw", 5000)
+line.field(b"val", 92, 2)
+line.field(b"on", True)
+assert bytes(line.view()) == b"raw=5000 val=0.92 on=1"
+line.emit()
+assert line.n == 0
+print("PASS")
+
+print("Test 2: Fixed-period schedule and overruns")
+rt = RealTime(10)
+rt.start()
+assert not gc.isenabled()
+t0 = time.ticks_ms()
+for _ in range(5):
+    rt.begin()
+    time.sleep_ms(3)  # the loop's work
+    rt.end()
+    rt.wait()
+assert time.ticks_diff(time.ticks_ms(), t0) in (49, 50, 51)
+assert rt.work.count == 5 and rt.alloc.count == 5 and rt.overruns.value == 0
+rt.begin()
+time.sleep_ms(15)
+rt.end()
+rt.wait()
+assert rt.overruns.value == 1
+print("PASS")
+
+print("Test 3: Collections only when the heap needs one")
+runs = metrics.gc_runs.value
+assert not rt.idle(1000)  # nothing allocated since start()
+rt.collect_after = 0
+assert rt.idle(1000) and metrics.gc_runs.value == runs + 1
+off = RealTime(10, enabled=False, collect_after=0)
+assert not off.idle(1000)
+rt.stop()
+assert gc.isenabled()
+print("PASS")
+
+print("All rt tests complete.")
@@ -0,0 +1,64 @@
+# tests/test_score.py
+from hal.pwm_driver import PWMDriver
+from audio.synth import Synth, sequence
+from audio.score import ScoreReader, encode, encode_events, HEADER_SIZE, RECORD_SIZE
+import os
+import time
+
+melody = [(60, 300), (62, 300), (64, 300), (65, 600)]
+
+print("Test 1: Round trip matches sequence()")
+data = encode(melody, velocity=0.7, gap_ms=50)
+assert len(data) == HEADER_SIZE + 4 * RECORD_SIZE
+events = list(ScoreReader(data))
+expect = sequence(melody, velocity=0.7, gap_ms=50)
+for (p, v, t, d), (p2, v2, t2, d2) in zip(events, expect):
+    assert (p, t, d) == (p2, t2, d2) and abs(v - v2) < 0.01, (events, expect)
+print("PASS:", len(data), "bytes for", len(events), "notes")
+
+print("Test 2: Chords, leading silence and long rests")
+evs = [(60, 1.0, 500, 200), (64, 1.0, 500, 200), (67, 0.5, 40500, 100)]
+reader = ScoreReader(memoryview(encode_events(evs)))
+got = [(p, t, d) for p, v, t, d in reader]
+assert got == [(60, 500, 200), (64, 500, 200), (67, 40500, 100)], got
+assert reader.duration_ms() == 40600
+print("PASS:", reader.count, "records")
+
+print("Test 3: Streaming from a file")
+with open("test_score.bin", "wb") as f:
+    f.write(encode([(60 + i % 12, 50) for i in range(100)]))
+with open("test_score.bin", "rb") as f:
+    reader = ScoreReader(f, chunk=8)
+    n = 0
+    for p, v, t, d in reader:
+        assert p == 60 + n % 12 and t == 50 * n
+        n += 1
+    assert n == 100
+os.remove("test_score.bin")
+print("PASS: read", n, "notes 8 at a time")
+
+print("Test 4: Bad data (expect errors)")
+for bad in (b"NOPE\x01\x00\x00\x00", data[:-1], b"SCO"):
+    try:
+        ScoreReader(bad)
+        raise AssertionError("accepted %r" % bad)
+    except ValueError as e:
+        print("PASS:", e)
+long_chord = [(60, 1.0, 0, 32768), (64, 1.0, 0, 32768)]
+assert [t for p, v, t, d in ScoreReader(encode_events(long_chord))] == [0, 0]
+try:
+    encode_events([(60, 1.0, 0, 40000), (64, 1.0, 0, 40000)])
+    raise AssertionError("packed a 40000 ms chord note")
+except ValueError as e:
+    print("PASS:", e)
+
+print("Test 5: Synth streams a score")
+synth = Synth(PWMDriver(pin_num=16))
+t0 = time.ticks_ms()
+synth.play_score(ScoreReader(data))
+while synth.busy():
+    synth.service()
+    time.sleep_ms(1)
+print("PASS: played in", time.ticks_diff(time.ticks_ms(), t0), "ms (~1650)")
+
+print("All score tests complete.")
@@ -0,0 +1,69 @@
+# tests/test_sse.py
+import asyncio
+import time
+
+from net.http import Request
+from net.sse import EventHub, _Client
+
+BRIGHT = 20000
+
+
+class Writer:
+    """Collects what is written; once closed, drain() fails like a reset socket."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.closed = False
+
+    def write(self, b):
+        self.data += b
+
+    async def drain(self):
+        if self.closed:
+            raise OSError("connection reset")
+
+
+def request(query):
+    req = Request(64)
+    req.query = query
+    return req
+
+
+async def publish(hub, ms):
+    t0 = time.ticks_ms()
+    while time.ticks_diff(time.ticks_ms(), t0) < ms:
+        hub.publish(BRIGHT, time.ticks_ms())
+        await asyncio.sleep_ms(50)
+
+
+print("Test 1: Bad query arguments get a 400")
+hub = EventHub(heartbeat_ms=1000)
+for query in (b"eps=abc", b"rate_ms=fast"):
+    w = Writer()
+    asyncio.run(hub.open(request(query)).run(w))
+    assert w.data.startswith(b"HTTP/1.1 400"), w.data
+print("PASS")
+
+print("Test 2: Viewers whose frames are all filtered still get pings")
+
+
+async def viewers():
+    writers = [Writer() for _ in range(hub.max_clients)]
+    tasks = [asyncio.create_task(hub.open(request(b"eps=1")).run(w)) for w in writers]
+    await publish(hub, 2500)
+    assert len(hub.clients) == hub.max_clients
+    for w in writers:
+        assert w.data.count(b"data:") == 1, w.data  # steady light: only the first
+        assert w.data.count(b": ping") >= 2, w.data
+        w.closed = True
+    await publish(hub, 3000)  # 3 heartbeats
+    assert not hub.clients, len(hub.clients)
+    assert isinstance(hub.open(request(b"eps=1")), _Client)
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(r, OSError) for r in results)  # the server closes them
+
+
+asyncio.run(viewers())
+print("PASS: slots reclaimed")
+
+print("All sse tests complete.")
@@ -1,6 +1,6 @@
 # tests/test_synth.py
 from hal.pwm_driver import PWMDriver
-from audio.synth import Synth
+from audio.synth import Synth, sequence
 import time
 
 pwm = PWMDriver(pin_num=16)
@@ -25,4 +25,61 @@ time.sleep_ms(200)
 synth.all_notes_off()
 print("PASS: stopped safely")
 
+print("Test 5: Scheduled melody returns immediately")
+t0 = time.ticks_ms()
+synth.play(sequence([(60, 200), (64, 200), (67, 300)], gap_ms=20))
+assert time.ticks_diff(time.ticks_ms(), t0) < 20, "play() blocked"
+while synth.busy():
+    synth.service()
+    time.sleep_ms(1)
+print("PASS: melody finished in", time.ticks_diff(time.ticks_ms(), t0), "ms (~740)")
+
+print("Test 6: Cancel mid-melody")
+synth.play(sequence([(72, 400), (74, 400)]))
+synth.service()
+time.sleep_ms(100)
+synth.cancel()
+assert not synth.busy() and synth.active is None
+print("PASS: cancelled")
+
+print("Test 7: Repeated notes skip redundant PWM writes")
+synth.note_on(67, velocity=0.5)
+writes = pwm.writes
+synth.note_on(67, velocity=0.5)
+synth.note_on(67, velocity=0.5)
+assert pwm.writes == writes, "unchanged note rewrote the PWM"
+synth.note_off()
+print("PASS:", pwm.skipped, "writes skipped so far")
+
+print("Test 8: Chords spread over voices, oldest note stolen")
+poly = Synth([PWMDriver(pin_num=16), PWMDriver(pin_num=18)])
+poly.note_on(60)
+poly.note_on(64)
+assert [v.pitch for v in poly.voices] == [60, 64]
+poly.note_on(67)  # both busy: replaces 60, the oldest
+assert [v.pitch for v in poly.voices] == [67, 64] and poly.active == 67
+poly.note_off(64)
+assert [v.pitch for v in poly.voices] == [67, None]
+poly.all_notes_off()
+print("PASS: voices", [v.pitch for v in poly.voices])
+
+print("Test 9: Scheduled chord")
+poly.play(sequence([((60, 64), 200), (67, 100)]))
+poly.service()
+assert [v.pitch for v in poly.voices] == [60, 64]
+time.sleep_ms(210)
+poly.service()
+assert [v.pitch for v in poly.voices] == [67, None]
+while poly.busy():
+    poly.service()
+    time.sleep_ms(1)
+print("PASS: chord then single note")
+
+print("Test 10: Two voices on one PWM slice (expect error)")
+try:
+    Synth([PWMDriver(pin_num=16), PWMDriver(pin_num=17)])
+    raise AssertionError("two voices shared a slice")
+except ValueError as e:
+    print("PASS:", e)
+
 print("All synth tests complete.")
@@ -0,0 +1,40 @@
+# tests/test_tables.py
+from audio.tables import MIDI_HZ, build_midi_table, set_midi_table
+from audio.synth import Synth
+
+
+def old_hz(p):
+    # what Synth.midi_to_hz() computed before the table
+    return 440.0 * (2 ** ((p - 69) / 12))
+
+
+print("Test 1: Standard tuning matches the old formula")
+assert MIDI_HZ[69] == 440 and MIDI_HZ[81] == 880 and MIDI_HZ[57] == 220
+assert MIDI_HZ[0] == 8 and MIDI_HZ[127] == 12544, (MIDI_HZ[0], MIDI_HZ[127])
+worst = max(abs(MIDI_HZ[p] - old_hz(p)) for p in range(128))
+assert worst <= 0.5, worst
+assert Synth.midi_to_hz(60) == 262
+print("PASS: worst rounding error", round(worst, 3), "Hz")
+
+print("Test 2: Alternative tunings")
+try:
+    build_midi_table(a4_hz=432.0)
+    assert MIDI_HZ[69] == 432 and MIDI_HZ[81] == 864 and MIDI_HZ[60] == 257
+    assert Synth.midi_to_hz(69) == 432  # every user of the table sees the change
+    build_midi_table(divisions=24)  # quarter tones: 12 steps make half an octave
+    assert MIDI_HZ[69] == 440 and MIDI_HZ[81] == 622 and MIDI_HZ[70] == 453
+    build_midi_table(a4_hz=100000.0)  # clamped to what array('H') and PWM take
+    assert MIDI_HZ[127] == 65535 and MIDI_HZ[69] == 65535
+    set_midi_table([p * 10 + 0.4 for p in range(128)])
+    assert MIDI_HZ[1] == 10 and MIDI_HZ[0] == 1
+    try:
+        set_midi_table([440] * 12)
+        raise AssertionError("accepted 12 frequencies")
+    except ValueError:
+        pass
+finally:
+    build_midi_table()
+assert MIDI_HZ[69] == 440
+print("PASS")
+
+print("All tables tests complete.")
@@ -0,0 +1,61 @@
+# tests/test_trace.py
+import json
+import time
+
+from audio.synth import Synth
+from hal.pwm_driver import PWMDriver
+from diag.buffer import Buffer
+from net.trace import TraceLog
+
+print("Test 1: Stage timings, with the onset filled in by the synth")
+log = TraceLog(4)
+synth = Synth(PWMDriver(16))
+synth.on_start = log.note_started
+now = time.ticks_ms()
+due = time.ticks_add(now, 20)
+log.add(7, 3, now, time.ticks_add(now, 2), due)
+log.add(8, None, now, now, time.ticks_add(now, 500))
+synth.play_hz([(440, 0.5, 0, 50)], at=due)
+time.sleep_ms(25)
+synth.service()
+out = Buffer(512)
+log.write_json(out)
+got = json.loads(bytes(out.view()))["traces"]
+assert got[0]["id"] == 7 and got[0]["net_ms"] == 3 and got[0]["parse_ms"] == 2
+assert got[0]["wait_ms"] == 18 and 0 <= got[0]["late_ms"] <= 5
+assert got[1]["net_ms"] is None and got[1]["late_ms"] is None  # not started yet
+assert not got[0]["dropped"] and not got[1]["dropped"]
+print("PASS:", got)
+
+print("Test 2: since and paging")
+out.reset()
+log.write_json(out, since=7)
+assert [t["id"] for t in json.loads(bytes(out.view()))["traces"]] == [8]
+out.reset()
+log.write_json(out, limit=1)
+assert [t["id"] for t in json.loads(bytes(out.view()))["traces"]] == [7]
+print("PASS")
+
+print("Test 3: The ring keeps the newest records")
+for i in range(10, 16):
+    log.add(i, 0, now, now, now)
+out.reset()
+log.write_json(out)
+assert [t["id"] for t in json.loads(bytes(out.view()))["traces"]] == [12, 13, 14, 15]
+print("PASS")
+
+print("Test 4: A note that was over before it could start is reported dropped")
+log = TraceLog(4)
+synth.on_start = log.note_started
+now = time.ticks_ms()
+log.add(20, None, now, now, now)
+synth.play_hz([(440, 0.5, 0, 10)], at=now)
+time.sleep_ms(30)
+synth.service()  # fell behind: the note would have ended 20 ms ago
+out.reset()
+log.write_json(out)
+(rec,) = json.loads(bytes(out.view()))["traces"]
+assert rec["dropped"] and rec["late_ms"] >= 10 and synth.active is None, rec
+print("PASS:", rec)
+
+print("All trace tests complete.")
@@ -0,0 +1,64 @@
+# tests/test_udp.py
+import struct
+import time
+
+from audio.synth import Synth
+from hal.pwm_driver import PWMDriver
+from net.clock import Clock
+from net.packet import FORMAT, MAGIC, VERSION, pack, unpack
+from net.udp import NoteListener
+
+synth = Synth(PWMDriver(16))
+clock = Clock()
+udp = NoteListener(synth, clock, part=1)
+
+print("Test 1: Packing round trip")
+data = pack(7, 70000, 440, 250, duty=0.5, at=123456, parts=0b110)
+assert len(data) == 18
+assert unpack(data) == [7, 1, 70000 & 0xFFFF, 0b110, 123456, 440, 250, 128]
+assert unpack(b"XX" + data[2:]) is None and unpack(data[:10]) is None
+print("PASS")
+
+print("Test 2: Duplicates and stale packets are dropped")
+now = time.ticks_ms()
+assert udp.handle(pack(1, 10, 440, 100), now)
+assert not udp.handle(pack(1, 10, 440, 100), now)  # duplicate
+assert not udp.handle(pack(1, 9, 440, 100), now)  # older
+assert udp.handle(pack(1, 12, 440, 100), now)  # a gap is fine
+assert udp.handle(pack(2, 1, 440, 100), now)  # new session starts over
+assert udp.dropped.value == 2
+print("PASS")
+
+print("Test 3: Only this device's part plays")
+assert not udp.handle(pack(2, 2, 440, 100, parts=0b1), now)
+assert udp.handle(pack(2, 3, 440, 100, parts=0b11), now)
+print("PASS")
+
+print("Test 4: Scheduled notes need a sync and must not be over")
+assert not udp.handle(pack(2, 4, 440, 100, at=1000), now)
+clock.add_sample(1000, now, now, 1000)  # conductor 1000 == local now
+assert udp.handle(pack(2, 5, 440, 100, at=1050), now)
+assert not udp.handle(pack(2, 6, 440, 100, at=800), now)
+assert udp.late.value == 1
+synth.cancel()
+assert udp.handle(pack(2, 7, 523, 100, at=1020), now)
+time.sleep_ms(30)
+synth.service()
+assert synth.pwm.freq == 523
+print("PASS")
+
+print("Test 5: Out-of-range notes are dropped, not raised")
+# pack() refuses these, so build them by hand as a broken conductor might
+def raw(seq, freq, ms):
+    return struct.pack(FORMAT, MAGIC, VERSION, 2, 0, seq, 0xFFFF, 0, freq, ms, 128)
+
+
+dropped = udp.dropped.value
+assert not udp.handle(raw(8, 0, 100), now)  # freq 0
+assert not udp.handle(raw(9, 440, 0), now)
+assert not udp.handle(raw(10, 440, 65535), now)  # longer than /tone allows
+assert udp.dropped.value == dropped + 3
+assert udp.handle(pack(2, 11, 440, 100), now)
+print("PASS")
+
+print("All udp tests complete.")
@@ -0,0 +1,67 @@
+# tests/test_wire.py
+from net import wire
+from net.service import _melody_json
+
+print("Test 1: Tone round trip")
+body = wire.encode_tone({"freq": 440, "ms": 300, "duty": 0.5, "at": 1234})
+assert len(body) == wire.TONE_SIZE
+freq, ms, duty, at, trace, sent = wire.decode_tone(memoryview(body))
+assert (freq, ms, at, trace, sent) == (440, 300, 1234, None, None)
+assert abs(duty - 0.5) < 0.0001
+print("PASS")
+
+print("Test 2: Melody with gap_ms and a chord")
+payload = {
+    "notes": [{"freq": 523, "ms": 200}, {"freq": [262, 330], "ms": 400, "duty": 1.0}],
+    "gap_ms": 20,
+    "append": True,
+    "trace": 9,
+    "sent": 5000,
+}
+body = wire.encode_melody(payload)
+assert len(body) == wire.MELODY_SIZE + 3 * wire.NOTE_SIZE
+events, at, trace, sent, append = wire.decode_melody(memoryview(body))
+got = [(f, s, m) for f, _d, s, m in events]
+assert got == [(523, 0, 200), (262, 220, 400), (330, 220, 400)]
+assert events[1][1] == 1.0 and (at, trace, sent, append) == (None, 9, 5000, True)
+print("PASS")
+
+print("Test 3: Melody with conductor timestamps")
+notes = [{"freq": 440, "ms": 100, "at": 70000}, {"freq": 494, "ms": 100, "at": 70150}]
+events, at, _t, _s, append = wire.decode_melody(wire.encode_melody({"notes": notes}))
+assert at == 70000 and [e[2] for e in events] == [0, 150] and not append
+j_events, j_at = _melody_json({"notes": notes})[:2]
+assert j_at == at and [e[2] for e in j_events] == [0, 150]
+print("PASS")
+
+print("Test 4: Bad bodies are rejected")
+for bad in (body[:-1], b"\x02" + body[1:], b""):
+    try:
+        wire.decode_melody(bad)
+        assert False, bad
+    except ValueError:
+        pass
+try:
+    wire.encode_tone({"freq": [262, 330], "ms": 100})
+    assert False
+except ValueError:
+    pass
+late = [{"freq": 440, "ms": 100, "at": 70150}, {"freq": 494, "ms": 100, "at": 70000}]
+for encode in (wire.encode_melody, _melody_json):  # binary and JSON agree
+    try:
+        encode({"notes": late})
+        assert False, encode
+    except ValueError:
+        pass
+print("PASS")
+
+print("Test 5: A trace id without a sent time")
+body = wire.encode_tone({"freq": 440, "ms": 300, "trace": 7})
+assert wire.decode_tone(body)[4:] == (7, None)
+body = wire.encode_melody({"notes": [], "trace": 7})
+assert wire.decode_melody(body)[2:4] == (7, None)
+body = wire.encode_tone({"freq": 440, "ms": 1, "trace": 7, "sent": 0})
+assert wire.decode_tone(body)[5] == 0  # a real 0 is kept
+print("PASS")
+
+print("All wire tests complete.")